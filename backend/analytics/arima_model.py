@@ -2,38 +2,54 @@
 import pandas as pd
 import numpy as np
 from statsmodels.tsa.arima.model import ARIMA
-from pandas.tseries.holiday import USFederalHolidayCalendar
 from pandas.tseries.offsets import CustomBusinessDay, BusinessHour
 import logging
+import time
+from functools import lru_cache
+from analytics.downsampling import lttb_series
+from analytics.order_search import (
+    SEARCH_BUDGET,
+    recall_order,
+    remember_order,
+    seed_params,
+    stepwise_search,
+)
+from analytics.param_store import param_store
+from analytics.sessions import nyse_sessions, to_utc
 
 logger = logging.getLogger(__name__)
 
 
 # Market Calendar System - handles all time-related operations
 class MarketCalendar:
+    """
+    Market-time operations backed by the process-wide NYSE session index,
+    so lookups are binary searches instead of holiday-calendar computations.
+    """
+
     def __init__(self):
-        self.calendar = USFederalHolidayCalendar()
+        self.sessions = nyse_sessions
+        self.calendar = nyse_sessions.calendar
+
+    def __reduce__(self):
+        # All state lives in the process-wide session index; rebuild against
+        # the receiving process's copy (lets forecasters cross processes)
+        return (MarketCalendar, ())
 
     def is_market_open(self, timestamp: pd.Timestamp) -> bool:
         """Check if given timestamp is within market hours"""
-        if timestamp.tz is None:
-            timestamp = pd.Timestamp(timestamp, tz="UTC").tz_convert("America/New_York")
-
-        # Check if it's a weekday
-        if timestamp.weekday() > 4:  # 5 = Saturday, 6 = Sunday
-            return False
-
-        # Check if it's a holiday
-        holidays = self.calendar.holidays(start=timestamp, end=timestamp)
-        if timestamp.date() in holidays:
-            return False
-
-        # Check if within market hours (9:30 AM - 4:00 PM)
-        is_within_hours = (
-            timestamp.hour > 9 or (timestamp.hour == 9 and timestamp.minute >= 30)
-        ) and (timestamp.hour < 16)
-
-        return is_within_hours
+        sessions = self.sessions.around(timestamp)
+        return bool(sessions.locate(np.array([to_utc(timestamp).value]))[1][0])
+
+    def market_hours_mask(self, index: pd.DatetimeIndex) -> np.ndarray:
+        """Vectorized is_market_open: True for timestamps within market hours"""
+        if len(index) == 0:
+            return np.zeros(0, dtype=bool)
+        if index.tz is None:
+            index = index.tz_localize("UTC")
+        instants = index.tz_convert("UTC").asi8
+        sessions = self.sessions.covering(int(instants.min()), int(instants.max()))
+        return sessions.locate(instants)[1]
 
     def intervals_until_market_close(
         self, timestamp: pd.Timestamp, interval_minutes: int
@@ -57,56 +73,17 @@ class MarketCalendar:
 
     def get_freq_unit(self, interval: str) -> str:
         """Get pandas frequency string for market-aware intervals"""
-        us_calendar = USFederalHolidayCalendar()
-        trading_day = CustomBusinessDay(calendar=us_calendar)
-        if interval.endswith("m"):
-            minutes = int(interval[:-1])
-            return CustomBusinessDay(
-                calendar=us_calendar,
-                offset=pd.Timedelta(minutes=minutes),
-            )
-        elif interval.endswith("h"):
-            return BusinessHour(start="9:30", end="16:00")
-        elif interval == "1d":
-            return trading_day
-        elif interval == "1wk":
-            return "W-FRI"
-        else:
-            return "BM"
+        return _freq_unit(interval)
 
     def get_next_market_timestamp(self, timestamp: pd.Timestamp) -> pd.Timestamp:
         """Find next valid market time, handling overnight, weekend and holiday transitions"""
-        if timestamp.tz is None:
-            timestamp = pd.Timestamp(timestamp, tz="UTC").tz_convert("America/New_York")
-        elif str(timestamp.tz) != "America/New_York":
-            timestamp = timestamp.tz_convert("America/New_York")
-
-        next_time = timestamp
-
-        # If outside market hours, move to next market open
-        if (
-            (next_time.hour >= 16)
-            or (next_time.hour < 9)
-            or (next_time.hour == 9 and next_time.minute < 30)
-        ):
-            next_time = next_time.replace(hour=9, minute=30)
-            if next_time <= timestamp:
-                next_time = next_time + pd.Timedelta(days=1)
-
-        # Skip weekends
-        while next_time.weekday() in [5, 6]:  # 5 = Saturday, 6 = Sunday
-            next_time = next_time + pd.Timedelta(days=1)
-            next_time = next_time.replace(hour=9, minute=30)
-
-        # Skip holidays
-        holidays = self.calendar.holidays(
-            start=next_time, end=next_time + pd.Timedelta(days=10)
+        sessions = self.sessions.around(timestamp)
+        i, is_open = sessions.locate(np.array([to_utc(timestamp).value]))
+        if is_open[0]:
+            return to_utc(timestamp).tz_convert("America/New_York")
+        return pd.Timestamp(int(sessions.opens[i[0]]), tz="UTC").tz_convert(
+            "America/New_York"
         )
-        while next_time.date() in holidays:
-            next_time = next_time + pd.Timedelta(days=1)
-            next_time = next_time.replace(hour=9, minute=30)
-
-        return next_time
 
     def generate_forecast_dates(
         self, start: pd.Timestamp, interval: str, steps: int
@@ -115,45 +92,70 @@ class MarketCalendar:
         if start.tz is None:
             start = pd.Timestamp(start, tz="UTC").tz_convert("America/New_York")
 
-        trading_times = []
-        current_time = start
-
         if interval.endswith("m"):
             minutes = int(interval[:-1])
         elif interval.endswith("h"):
             minutes = int(interval[:-1]) * 60
         else:
-            # For daily/weekly/monthly intervals, use simple date range
-            freq = self.get_freq_unit(interval)
             next_trading_time = self.get_next_market_timestamp(start)
+            if interval == "1d":
+                # The next `steps` session dates at the same time of day
+                sessions = self.sessions.around(
+                    next_trading_time, pd.Timedelta(days=2 * steps + 10)
+                )
+                day = next_trading_time.tz_localize(None).normalize()
+                first = sessions.days.searchsorted(day)
+                dates = sessions.days[first : first + steps] + (
+                    next_trading_time.tz_localize(None) - day
+                )
+                return dates.tz_localize("America/New_York")
+
+            # Weekly/monthly steps do not depend on individual holidays
             return pd.date_range(
-                start=next_trading_time, periods=steps, freq=freq, tz="America/New_York"
+                start=next_trading_time,
+                periods=steps,
+                freq=self.get_freq_unit(interval),
+                tz="America/New_York",
             )
 
-        while len(trading_times) < steps:
-            #     intervals_left = self.intervals_until_market_close(current_time, minutes)
-            #     if intervals_left > 0:
-            #         next_time = current_time + pd.Timedelta(minutes=minutes)
-            #         # Only add if it would be a new unique timestamp
-            #         if not trading_times or next_time > trading_times[-1]:
-            #             trading_times.append(next_time)
-            #             current_time = next_time
-            #         else:
-            #             # Move to next market day if we would create a duplicate
-            #             current_time = self.get_next_market_timestamp(current_time)
-            #     else:
-            #         # Move to start of next market day
-            #         current_time = self.get_next_market_timestamp(current_time)
-            #         # Only add the timestamp if it would be unique
-            #         if not trading_times or current_time > trading_times[-1]:
-            #             trading_times.append(current_time)
-            if self.is_market_open(current_time):
-                trading_times.append(current_time)
-                current_time = current_time + pd.Timedelta(minutes=minutes)
-            else:
-                current_time = self.get_next_market_timestamp(current_time)
-
-        return pd.DatetimeIndex(trading_times, tz="America/New_York")
+        # Every session yields at least one slot, so `steps` sessions suffice
+        step = pd.Timedelta(minutes=minutes).value
+        sessions = self.sessions.around(start, pd.Timedelta(days=2 * steps + 10))
+        i, is_open = sessions.locate(np.array([start.value]))
+        i = int(i[0])
+
+        # Slots run from the session open (or from `start` inside the first
+        # session) every `step` until the close
+        opens = sessions.opens[i : i + steps].copy()
+        closes = sessions.closes[i : i + steps]
+        if is_open[0]:
+            opens[0] = start.value
+        counts = -(-(closes - opens) // step)
+        ends = np.cumsum(counts)
+        used = int(np.searchsorted(ends, steps)) + 1
+        counts, ends = counts[:used], ends[:used]
+
+        offsets = np.arange(ends[-1]) - np.repeat(ends - counts, counts)
+        times = np.repeat(opens[:used], counts) + offsets * step
+        return pd.DatetimeIndex(times[:steps], tz="UTC").tz_convert("America/New_York")
+
+
+@lru_cache(maxsize=None)
+def _freq_unit(interval: str):
+    if interval.endswith("m"):
+        minutes = int(interval[:-1])
+        return CustomBusinessDay(
+            calendar=nyse_sessions.calendar,
+            offset=pd.Timedelta(minutes=minutes),
+        )
+    elif interval.endswith("h"):
+        return BusinessHour(start="9:30", end="16:00")
+    elif interval == "1d":
+        return CustomBusinessDay(calendar=nyse_sessions.calendar)
+    elif interval == "1wk":
+        return "W-FRI"
+    else:
+        return "BM"
 
 
 # Model Configuration System - separates parameter configuration
@@ -209,6 +211,13 @@ class ModelConfig:
             return 10
 
 
+# Confidence levels (percent) of the bands returned with every ARIMA forecast
+BAND_LEVELS = (80, 95)
+# Percentiles of simulated paths in the optional fan chart
+FAN_QUANTILES = (5, 25, 50, 75, 95)
+MAX_SIMULATIONS = 5000
+
+
 # Core forecasting system
 class TimeSeriesForecaster:
     def __init__(self, market_calendar: MarketCalendar, config: ModelConfig):
@@ -226,8 +235,19 @@ class TimeSeriesForecaster:
         self.last_timestamp = None
         self.period = None
         self.interval = None
-
-    def train(self, data: pd.DataFrame, period: str, interval: str) -> bool:
+        # Optimizer report for the last fit (see _fit_arima)
+        self.fit_stats = None
+
+    def train(
+        self,
+        data: pd.DataFrame,
+        period: str,
+        interval: str,
+        ticker: str = None,
+        budget: float = None,
+        start_order: tuple = None,
+        start_params: dict = None,
+    ) -> bool:
         """
         Train the forecasting model on historical data
 
@@ -235,10 +255,19 @@ class TimeSeriesForecaster:
             data: DataFrame with Close prices and datetime index
             period: The time period for forecasting
             interval: The time interval for data
+            ticker: Stock ticker symbol; when given, the order chosen for the
+                same (ticker, period, interval) last time is tried first, and
+                the fit starts from the parameters estimated last time
+            budget: Seconds the whole training may take; the fallback order
+                search stops in time and keeps the best order found so far
+            start_order, start_params: used instead of the order and
+                parameters remembered for ticker in this process (a worker
+                process is handed the ones its parent remembers)
 
         Returns:
             bool: True if training was successful
         """
+        started = time.monotonic()
         self.period = period
         self.interval = interval
         self.training_data = data
@@ -253,13 +282,21 @@ class TimeSeriesForecaster:
         # Store the last timestamp for forecasting
         self.last_timestamp = data.index[-1]
 
-        # Get default parameters and try to fit model
-        best_order = self.config.get_default_parameters(period, interval)
+        # Start from the last chosen order, else the configured default
+        best_order = (
+            start_order
+            or (ticker and recall_order(ticker, period, interval))
+            or self.config.get_default_parameters(period, interval)
+        )
+
+        if start_params is None:
+            start_params = ticker and param_store.get(
+                ticker, period, interval, best_order
+            )
 
         try:
             # Try with default parameters first
-            model = ARIMA(data["Close"], order=best_order)
-            self.model_fit = model.fit()
+            self.model_fit = self._fit_arima(data["Close"], best_order, start_params)
 
             # Test forecast to ensure it doesn't produce NaNs
             steps = self.config.get_forecast_steps(period, interval)
@@ -268,45 +305,132 @@ class TimeSeriesForecaster:
             if pd.isna(test_forecast).any():
                 raise ValueError("Initial model parameters produced NaN forecasts")
 
-            return True
-
         except Exception:
-            # Grid search for better parameters
-            best_aic = float("inf")
-            best_model = None
-
-            for p in range(0, 3):
-                for d in range(0, 2):
-                    for q in range(0, 3):
-                        try:
-                            order = (p, d, q)
-                            model = ARIMA(data["Close"], order=order)
-                            model_fit = model.fit()
-
-                            # Verify forecast doesn't produce NaNs
-                            test_forecast = model_fit.forecast(steps=1)
-                            if (
-                                not pd.isna(test_forecast).any()
-                                and model_fit.aic < best_aic
-                            ):
-                                best_aic = model_fit.aic
-                                best_model = model_fit
-
-                        except Exception:
-                            continue
-
-            if best_model is not None:
-                self.model_fit = best_model
-                return True
-            else:
+            # Stepwise search over a process pool for a better order
+            search_budget = SEARCH_BUDGET
+            if budget is not None:
+                search_budget = min(
+                    search_budget, budget - (time.monotonic() - started)
+                )
+                if search_budget <= 0:
+                    return False
+            best = stepwise_search(
+                data["Close"].to_numpy(dtype=float), best_order, search_budget
+            )
+            if best is None:
                 return False
 
-    def forecast(self, steps: int = None) -> "ForecastResult":
+            best_order, _, params = best
+            # Re-running the filter with the searched parameters is enough;
+            # no need to optimize again in this process
+            model = ARIMA(data["Close"], order=best_order)
+            self.model_fit = model.smooth(
+                np.array([params[name] for name in model.param_names])
+            )
+
+        if ticker:
+            remember_order(ticker, period, interval, best_order)
+            param_store.put(
+                ticker,
+                period,
+                interval,
+                best_order,
+                dict(zip(self.model_fit.model.param_names, self.model_fit.params)),
+            )
+        return True
+
+    def _fit_arima(self, closes: pd.Series, order: tuple, start_params=None):
+        """
+        Fit ARIMA by MLE, warm-started from `start_params` (by name) when
+        given. A warm start that fails or does not converge is retried from
+        statsmodels' default initial values.
+
+        Records iterations and fit time in self.fit_stats and param_store.
+        """
+        model = ARIMA(closes, order=order)
+        started = time.perf_counter()
+        model_fit = None
+        fell_back = False
+
+        if start_params:
+            try:
+                model_fit = model.fit(start_params=seed_params(model, start_params))
+                if not (model_fit.mle_retvals or {}).get("converged", True):
+                    model_fit = None
+            except Exception:
+                model_fit = None
+            fell_back = model_fit is None
+
+        warm = model_fit is not None
+        if model_fit is None:
+            model_fit = model.fit()
+
+        retvals = model_fit.mle_retvals or {}
+        self.fit_stats = {
+            "order": tuple(order),
+            "warm_start": warm,
+            "warm_start_failed": fell_back,
+            "iterations": int(retvals.get("iterations", 0)),
+            "converged": bool(retvals.get("converged", True)),
+            "fit_ms": (time.perf_counter() - started) * 1000,
+        }
+        param_store.record_fit(
+            warm, self.fit_stats["iterations"], self.fit_stats["fit_ms"], fell_back
+        )
+        logger.debug(f"ARIMA{tuple(order)} fit: {self.fit_stats}")
+        return model_fit
+
+    def update(self, data: pd.DataFrame) -> int:
+        """
+        Bring the fitted model up to date with `data` without re-estimating
+        its parameters.
+
+        Bars after the last trained timestamp extend the fitted results, so
+        only the new observations are filtered. If the last trained bar
+        changed (a revised partial bar) or is no longer in the window, the
+        fitted parameters are re-applied to the whole window instead.
+
+        Args:
+            data: DataFrame with Close prices and datetime index
+
+        Returns:
+            int: Number of new observations incorporated
+        """
+        if self.model_fit is None:
+            raise ValueError("Model has not been trained yet")
+        if data["Close"].isnull().any():
+            raise ValueError("Cannot update model with missing Close values")
+
+        closes = data["Close"]
+        new = closes[closes.index > self.last_timestamp]
+        previous = self.training_data["Close"]
+        unchanged = (
+            self.last_timestamp in closes.index
+            and closes[self.last_timestamp] == previous.iloc[-1]
+        )
+
+        if unchanged:
+            if len(new):
+                # The fitted model has a plain integer index, so pass values
+                self.model_fit = self.model_fit.extend(new.to_numpy())
+        else:
+            self.model_fit = self.model_fit.apply(closes, refit=False)
+
+        self.training_data = data
+        self.last_timestamp = data.index[-1]
+        return len(new)
+
+    def forecast(self, steps: int = None, simulations: int = 0) -> "ForecastResult":
         """
         Generate forecast using the trained model
 
+        Confidence bands (BAND_LEVELS) come from the state-space forecast
+        variance of the same fit, so they cost no extra fitting.
+
         Args:
             steps: Number of steps to forecast (defaults to config value)
+            simulations: If > 0, also simulate this many future paths from
+                the fitted model and summarize them as FAN_QUANTILES
 
         Returns:
             ForecastResult: Object with forecast series and metadata
@@ -317,15 +441,27 @@ class TimeSeriesForecaster:
         if steps is None:
             steps = self.config.get_forecast_steps(self.period, self.interval)
         try:
-            # Generate the raw forecast values
-            forecast_values = self.model_fit.forecast(steps=steps)
-
-            # Convert forecast values to a simple numpy array
-            forecast_array = (
-                forecast_values.values
-                if hasattr(forecast_values, "values")
-                else np.array(forecast_values)
-            )
+            # Mean and variance of the forecast in one pass (forecast() would
+            # compute the same prediction and drop the variance)
+            prediction = self.model_fit.get_forecast(steps=steps)
+            forecast_array = np.asarray(prediction.predicted_mean)
+
+            bands = {}
+            for level in BAND_LEVELS:
+                interval = np.asarray(prediction.conf_int(alpha=1 - level / 100))
+                bands[f"lower_{level}"] = interval[:, 0]
+                bands[f"upper_{level}"] = interval[:, 1]
+
+            fan = None
+            if simulations > 0:
+                # All paths in one call: shape (steps, simulations)
+                paths = np.asarray(
+                    self.model_fit.simulate(
+                        steps, repetitions=simulations, anchor="end"
+                    )
+                ).reshape(steps, -1)
+                quantiles = np.percentile(paths, FAN_QUANTILES, axis=1)
+                fan = {f"p{q}": row for q, row in zip(FAN_QUANTILES, quantiles)}
 
             # Generate appropriate future dates
             future_dates = self.market_calendar.generate_forecast_dates(
@@ -340,9 +476,20 @@ class TimeSeriesForecaster:
                 data=forecast_array[:min_length], index=future_dates[:min_length]
             )
 
+            index = future_dates[:min_length]
             return ForecastResult(
                 historical_series=self.training_data["Close"],
                 forecast_series=forecast_series,
+                bands=pd.DataFrame(
+                    {name: values[:min_length] for name, values in bands.items()},
+                    index=index,
+                ),
+                fan=pd.DataFrame(
+                    {name: values[:min_length] for name, values in fan.items()},
+                    index=index,
+                )
+                if fan
+                else None,
             )
 
         except Exception as e:
@@ -352,16 +499,28 @@ class TimeSeriesForecaster:
 class ForecastResult:
     """Class for handling forecast results with consistent interface"""
 
-    def __init__(self, historical_series: pd.Series, forecast_series: pd.Series):
+    def __init__(
+        self,
+        historical_series: pd.Series,
+        forecast_series: pd.Series,
+        bands: pd.DataFrame = None,
+        fan: pd.DataFrame = None,
+    ):
         """
         Initialize with historical and forecast data
 
         Args:
             historical_series: Series with historical prices
             forecast_series: Series with forecasted prices
+            bands: Optional lower_<level>/upper_<level> columns on the
+                forecast index
+            fan: Optional p<quantile> columns of simulated paths on the
+                forecast index
         """
         self.historical = historical_series
         self.forecast = forecast_series
+        self.bands = bands
+        self.fan = fan
         self.last_historical_point = historical_series.iloc[-1]
         self.last_timestamp = historical_series.index[-1]
 
@@ -370,17 +529,42 @@ class ForecastResult:
         last_point = pd.Series(self.last_historical_point, index=[self.last_timestamp])
         return pd.concat([last_point, self.forecast])
 
-    def to_dict(self, ticker: str = "forecast") -> dict:
-        """Convert to frontend-friendly format with specified ticker"""
+    def to_dict(
+        self, ticker: str = "forecast", max_points: int = None, bands: bool = False
+    ) -> dict:
+        """Convert to frontend-friendly format with specified ticker, optionally
+        LTTB-downsampled to at most max_points. With bands=True, the confidence
+        bands (and fan quantiles, if simulated) are added column-wise under
+        "bands" ({"time": [...], "lower_80": [...], ...}), aligned with the
+        points of the forecast path"""
         connected_series = self.to_connected_series()
+        if max_points:
+            connected_series = lttb_series(connected_series, max_points)
         result = {
             ticker: [
                 {"time": ts.isoformat(), "value": float(val)}
                 for ts, val in connected_series.items()
             ]
         }
+        if bands and self.bands is not None:
+            result["bands"] = self._bands_columns(connected_series.index)
         return result
 
+    def _bands_columns(self, index: pd.Index) -> dict:
+        columns = [self.bands] if self.fan is None else [self.bands, self.fan]
+        frame = pd.concat(columns, axis=1)
+        # Bands start from the last historical point, where they have no width
+        anchor = pd.DataFrame(
+            self.last_historical_point,
+            index=[self.last_timestamp],
+            columns=frame.columns,
+        )
+        frame = pd.concat([anchor, frame]).reindex(index)
+        return {
+            "time": [ts.isoformat() for ts in frame.index],
+            **{name: frame[name].astype(float).tolist() for name in frame.columns},
+        }
+
     def __str__(self) -> str:
         """String representation for logging"""
         return f"ForecastResult: {len(self.forecast)} points, starting at {self.forecast.index[0]}"
@@ -395,7 +579,7 @@ class ForecastModelFactory:
         Create a forecasting model of the specified type
 
         Args:
-            model_type: Type of model to create ('arima', 'exponential_smoothing', etc.)
+            model_type: Type of model to create ('arima', 'holt', 'theta', 'auto', etc.)
             **kwargs: Additional arguments to pass to the model constructor
 
         Returns:
@@ -404,11 +588,23 @@ class ForecastModelFactory:
         market_calendar = kwargs.get("market_calendar", MarketCalendar())
         config = kwargs.get("config", ModelConfig())
 
+        # Imported here: light_models builds on this module
+        from analytics.light_models import LIGHT_MODELS
+
         if model_type.lower() == "arima":
             return TimeSeriesForecaster(market_calendar, config)
+        elif model_type.lower() in LIGHT_MODELS:
+            return LIGHT_MODELS[model_type.lower()](market_calendar, config)
         else:
             raise ValueError(f"Unsupported model type: {model_type}")
 
+    @staticmethod
+    def available_models() -> list:
+        """Model types accepted by create_model"""
+        from analytics.light_models import LIGHT_MODELS
+
+        return ["arima", *LIGHT_MODELS]
+
 
 # # Example usage
 # if __name__ == "__main__":
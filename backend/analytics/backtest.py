@@ -0,0 +1,321 @@
+# backend/analytics/backtest.py
+"""
+Rolling-origin backtests for ForecastModelFactory models.
+
+    python -m analytics.backtest --tickers AAPL MSFT --pairs 1y:1d 5d:5m \
+        --models arima auto --orders default 1,1,1 2,1,2 --output backtest.parquet
+
+Each (ticker, period, interval, model, order) series is evaluated over the
+last `folds` forecast horizons: the model is trained on every bar before the
+origin and scored on the next horizon. Series run in parallel in spawned
+worker processes; one row per fold is written to a Parquet file.
+"""
+
+import argparse
+import itertools
+import logging
+import multiprocessing
+import os
+import time
+import tracemalloc
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from analytics.arima_model import ForecastModelFactory, MarketCalendar, ModelConfig
+from analytics.order_search import MAX_D, MAX_P, MAX_Q
+
+logger = logging.getLogger(__name__)
+
+Order = Tuple[int, int, int]
+
+DEFAULT_FOLDS = 5
+BACKTEST_WORKERS = min(4, os.cpu_count() or 1)
+
+
+class FixedOrderConfig(ModelConfig):
+    """ModelConfig that starts every ARIMA fit from one order"""
+
+    def __init__(self, order: Order):
+        self.order = tuple(order)
+
+    def get_default_parameters(self, period: str, interval: str) -> tuple:
+        return self.order
+
+
+def rolling_origins(n: int, horizon: int, folds: int) -> List[int]:
+    """Start index of each of the last `folds` test windows of `horizon` bars"""
+    return [n - k * horizon for k in range(folds, 0, -1) if n - k * horizon >= 10]
+
+
+def score_forecast(
+    last: float, predicted: np.ndarray, actual: np.ndarray
+) -> Tuple[float, float, float]:
+    """
+    MAE, MAPE (percent) and directional accuracy (share of steps where the
+    forecast and the actual moved the same way from the last training close)
+    """
+    errors = predicted - actual
+    mae = float(np.mean(np.abs(errors)))
+    mape = float(np.mean(np.abs(errors / actual)) * 100)
+    direction = float(np.mean(np.sign(predicted - last) == np.sign(actual - last)))
+    return mae, mape, direction
+
+
+def _fit(model: str, order: Optional[Order], train: pd.DataFrame, period, interval):
+    config = FixedOrderConfig(order) if order is not None else ModelConfig()
+    forecaster = ForecastModelFactory.create_model(
+        model, market_calendar=MarketCalendar(), config=config
+    )
+    # No ticker: keeps the remembered-order cache out of the experiment
+    return forecaster, forecaster.train(train, period, interval)
+
+
+def backtest_series(
+    ticker: str,
+    period: str,
+    interval: str,
+    closes: pd.DataFrame,
+    model: str = "arima",
+    order: Optional[Order] = None,
+    folds: int = DEFAULT_FOLDS,
+    trace_memory: bool = False,
+) -> List[dict]:
+    """
+    Evaluate one model configuration on one series (runs in a worker
+    process).
+
+    Args:
+        closes: DataFrame with a Close column and New York datetime index
+        order: ARIMA order to start from; None uses PDQ_MAP
+        trace_memory: also refit each fold under tracemalloc to record its
+            peak allocation (kept out of the timed fit, which it slows down)
+
+    Returns:
+        One dict per fold
+    """
+    warnings.simplefilter("ignore")
+    horizon = ModelConfig.get_forecast_steps(period, interval)
+    rows = []
+
+    for fold, origin in enumerate(rolling_origins(len(closes), horizon, folds)):
+        train = closes.iloc[:origin]
+        actual = closes["Close"].to_numpy(dtype=float)[origin : origin + horizon]
+        row = {
+            "ticker": ticker,
+            "period": period,
+            "interval": interval,
+            "model": model,
+            "start_order": str(order) if order is not None else None,
+            "fitted_order": None,
+            "fold": fold,
+            "train_bars": origin,
+            "test_bars": len(actual),
+            "ok": False,
+            "mae": np.nan,
+            "mape": np.nan,
+            "directional_accuracy": np.nan,
+            "fit_ms": np.nan,
+            "forecast_ms": np.nan,
+            "peak_bytes": np.nan,
+        }
+
+        started = time.perf_counter()
+        try:
+            forecaster, trained = _fit(model, order, train, period, interval)
+        except Exception as e:
+            logger.warning(f"{ticker} {period}/{interval} fold {fold}: {e}")
+            trained = False
+        row["fit_ms"] = (time.perf_counter() - started) * 1000
+
+        if trained:
+            started = time.perf_counter()
+            predicted = forecaster.forecast(steps=len(actual)).forecast.to_numpy()
+            row["forecast_ms"] = (time.perf_counter() - started) * 1000
+
+            # The ARIMA fallback search may have replaced the starting order
+            fitted_model = getattr(forecaster.model_fit, "model", None)
+            if hasattr(fitted_model, "order"):
+                row["fitted_order"] = str(tuple(fitted_model.order))
+
+            length = min(len(predicted), len(actual))
+            if length:
+                row["ok"] = True
+                row["mae"], row["mape"], row["directional_accuracy"] = score_forecast(
+                    train["Close"].iloc[-1], predicted[:length], actual[:length]
+                )
+
+        if trace_memory:
+            tracemalloc.start()
+            try:
+                _fit(model, order, train, period, interval)
+            except Exception:
+                pass
+            row["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        rows.append(row)
+    return rows
+
+
+def run_backtest(
+    tickers: List[str],
+    pairs: List[Tuple[str, str]],
+    models: List[str],
+    orders: List[Optional[Order]],
+    folds: int = DEFAULT_FOLDS,
+    workers: int = BACKTEST_WORKERS,
+    trace_memory: bool = False,
+) -> pd.DataFrame:
+    """
+    Backtest every ticker x (period, interval) x model combination; ARIMA
+    runs once per entry in `orders` (None = PDQ_MAP default). History is
+    read through the bar store in this process and shipped to the workers.
+    """
+    from analytics.data_fetcher import fetch_stock_frame
+
+    tasks = []
+    for ticker, (period, interval) in itertools.product(tickers, pairs):
+        try:
+            bars = fetch_stock_frame(ticker, period, interval)
+        except ValueError as e:
+            logger.warning(f"Skipping {ticker} {period}/{interval}: {e}")
+            continue
+        closes = bars[["Close"]].dropna().tz_convert("America/New_York")
+        for model in models:
+            for order in orders if model.lower() == "arima" else [None]:
+                tasks.append(
+                    (
+                        ticker,
+                        period,
+                        interval,
+                        closes,
+                        model,
+                        order,
+                        folds,
+                        trace_memory,
+                    )
+                )
+
+    rows = []
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        futures = {pool.submit(backtest_series, *task): task for task in tasks}
+        for done, future in enumerate(as_completed(futures), 1):
+            ticker, period, interval, _, model, order = futures[future][:6]
+            try:
+                rows.extend(future.result())
+            except Exception as e:
+                logger.warning(f"{ticker} {period}/{interval} {model} {order}: {e}")
+            logger.info(f"{done}/{len(futures)} series done")
+
+    return pd.DataFrame(rows)
+
+
+def summarize(results: pd.DataFrame) -> pd.DataFrame:
+    """Mean accuracy and median cost per (period, interval, model, start order)"""
+    keys = ["period", "interval", "model", "start_order"]
+    return (
+        results.fillna({"start_order": "default"})
+        .groupby(keys)
+        .agg(
+            folds=("ok", "size"),
+            failed=("ok", lambda ok: int((~ok).sum())),
+            mae=("mae", "mean"),
+            mape=("mape", "mean"),
+            directional_accuracy=("directional_accuracy", "mean"),
+            fit_ms=("fit_ms", "median"),
+            peak_mb=("peak_bytes", lambda b: b.median() / 2**20),
+        )
+        .sort_values(["period", "interval", "mape"])
+    )
+
+
+def best_orders(results: pd.DataFrame) -> dict:
+    """Lowest mean-MAPE ARIMA start order per period/interval, shaped like PDQ_MAP"""
+    arima = results[(results["model"].str.lower() == "arima") & results["ok"]]
+    arima = arima.fillna({"start_order": "default"})
+    means = arima.groupby(["period", "interval", "start_order"])["mape"].mean()
+    suggested = {}
+    for (period, interval), scores in means.groupby(level=[0, 1]):
+        order = scores.idxmin()[2]
+        if order == "default":
+            order = str(ModelConfig.get_default_parameters(period, interval))
+        suggested.setdefault(period, {})[interval] = order
+    return suggested
+
+
+def _parse_order(text: str) -> Optional[Order]:
+    if text == "default":
+        return None
+    return tuple(int(part) for part in text.split(","))
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tickers", nargs="+", required=True)
+    parser.add_argument(
+        "--pairs",
+        nargs="+",
+        help="period:interval pairs (default: every PDQ_MAP combination)",
+    )
+    parser.add_argument("--models", nargs="+", default=["arima"])
+    parser.add_argument(
+        "--orders",
+        nargs="+",
+        default=["default"],
+        help='ARIMA start orders as p,d,q, or "default" for PDQ_MAP',
+    )
+    parser.add_argument(
+        "--order-grid",
+        action="store_true",
+        help="evaluate every order within the stepwise search bounds",
+    )
+    parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS)
+    parser.add_argument("--workers", type=int, default=BACKTEST_WORKERS)
+    parser.add_argument("--memory", action="store_true", help="trace peak memory")
+    parser.add_argument("--output", default="backtest.parquet")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    pairs = (
+        [tuple(pair.split(":")) for pair in args.pairs]
+        if args.pairs
+        else [
+            (period, interval)
+            for period, intervals in ModelConfig.PDQ_MAP.items()
+            for interval in intervals
+        ]
+    )
+    orders = [_parse_order(order) for order in args.orders]
+    if args.order_grid:
+        orders += list(
+            itertools.product(range(MAX_P + 1), range(MAX_D + 1), range(MAX_Q + 1))
+        )
+
+    results = run_backtest(
+        [ticker.upper() for ticker in args.tickers],
+        pairs,
+        args.models,
+        orders,
+        folds=args.folds,
+        workers=args.workers,
+        trace_memory=args.memory,
+    )
+    if results.empty:
+        print("No folds were evaluated")
+        return
+
+    results.to_parquet(args.output, index=False)
+    with pd.option_context("display.width", 160, "display.max_rows", None):
+        print(summarize(results).round(3))
+    print(f"\nSuggested PDQ_MAP orders: {best_orders(results)}")
+    print(f"{len(results)} folds written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,514 @@
+# backend/analytics/bar_store.py
+import logging
+import re
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import PyMongoError
+
+from analytics.arima_model import MarketCalendar
+from db import db
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+ACTION_COLUMNS = ["Dividends", "Stock Splits"]
+
+# Relative difference between the stored and re-downloaded open of the
+# overlapping bar that means upstream has re-adjusted the history
+ADJUSTMENT_RTOL = 1e-4
+
+# Bar length for each yfinance interval
+INTERVAL_DURATIONS = {
+    "1m": pd.Timedelta(minutes=1),
+    "2m": pd.Timedelta(minutes=2),
+    "5m": pd.Timedelta(minutes=5),
+    "15m": pd.Timedelta(minutes=15),
+    "30m": pd.Timedelta(minutes=30),
+    "60m": pd.Timedelta(hours=1),
+    "90m": pd.Timedelta(minutes=90),
+    "1h": pd.Timedelta(hours=1),
+    "1d": pd.Timedelta(days=1),
+    "5d": pd.Timedelta(days=5),
+    "1wk": pd.Timedelta(weeks=1),
+    "1mo": pd.Timedelta(days=30),
+    "3mo": pd.Timedelta(days=90),
+}
+
+# Stored bars are considered fresh for one bar length, within these bounds
+MIN_REFRESH_AGE = pd.Timedelta(seconds=60)
+MAX_REFRESH_AGE = pd.Timedelta(minutes=15)
+
+# Oldest instant used for period="max"
+EPOCH_START = pd.Timestamp("1900-01-01", tz="UTC")
+
+_PERIOD_PATTERN = re.compile(r"^(\d+)(d|mo|y)$")
+
+# Coarser intervals that can be built locally, with their finer sources
+# (finest first). 90m is left out because its session alignment is unclear.
+DERIVATION_SOURCES = {
+    "5m": ["1m"],
+    "15m": ["1m", "5m"],
+    "30m": ["1m", "5m"],
+    "60m": ["1m", "5m"],
+    "1h": ["1m", "5m"],
+    "1wk": ["1d"],
+    "1mo": ["1d"],
+}
+
+# How far back yfinance serves each intraday interval
+SOURCE_HISTORY_LIMITS = {
+    "1m": pd.Timedelta(days=7),
+    "5m": pd.Timedelta(days=59),
+}
+
+# Fetched on a miss so that sibling intervals can be derived from it later
+DEFAULT_SOURCES = {
+    "15m": "5m",
+    "30m": "5m",
+    "60m": "5m",
+    "1h": "5m",
+    "1wk": "1d",
+    "1mo": "1d",
+}
+
+_AGGREGATIONS = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Volume": "sum",
+}
+
+_market_calendar = MarketCalendar()
+
+
+def period_start(period: str, now: pd.Timestamp) -> Optional[pd.Timestamp]:
+    """
+    Earliest instant covered by a yfinance period string, or None if the
+    period is not understood (those requests bypass the store).
+
+    Day periods count trading days, so they are approximated with business days.
+    """
+    if period == "max":
+        return EPOCH_START
+    if period == "ytd":
+        year_start = (
+            now.tz_convert("America/New_York").normalize().replace(month=1, day=1)
+        )
+        return year_start.tz_convert("UTC")
+
+    match = _PERIOD_PATTERN.match(period)
+    if not match:
+        return None
+
+    count, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        return now - pd.offsets.BDay(count)
+    if unit == "mo":
+        return now - pd.DateOffset(months=count)
+    return now - pd.DateOffset(years=count)
+
+
+def slice_period(bars: pd.DataFrame, period: str, now: pd.Timestamp) -> pd.DataFrame:
+    """Select the bars yfinance would have returned for `period`"""
+    if bars.empty:
+        return bars
+
+    match = _PERIOD_PATTERN.match(period)
+    if match and match.group(2) == "d":
+        # "1d"/"5d" mean the last N trading sessions, not N calendar days
+        session_dates = bars.index.tz_convert("America/New_York").normalize()
+        last_sessions = session_dates.unique()[-int(match.group(1)) :]
+        return bars[session_dates.isin(last_sessions)]
+
+    return bars[bars.index >= period_start(period, now)]
+
+
+def refresh_age(interval: str) -> pd.Timedelta:
+    """How long stored bars for an interval are served without asking upstream"""
+    duration = INTERVAL_DURATIONS.get(interval, MIN_REFRESH_AGE)
+    return min(max(duration, MIN_REFRESH_AGE), MAX_REFRESH_AGE)
+
+
+def resample_bars(bars: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """
+    Build coarser OHLCV bars from finer ones, aligned the way yfinance labels them:
+
+    - intraday bins start at the 9:30 New York open (9:30, 9:45, ... for 15m;
+      9:30, 10:30, ... 15:30 for 1h) and never span two sessions
+    - weekly bars start on Monday, monthly bars on the first of the month,
+      at New York midnight
+
+    Bars outside market hours (per MarketCalendar) are dropped before
+    intraday aggregation.
+    """
+    if bars.empty:
+        return bars
+
+    if interval in ("1wk", "1mo"):
+        rule = "W-MON" if interval == "1wk" else "MS"
+        # Binned on New York dates: on the UTC index a bar's day could differ
+        # and the labels would fall on Sunday evening, New York time
+        local = bars.tz_convert("America/New_York")
+        resampled = local.resample(rule, label="left", closed="left").agg(_AGGREGATIONS)
+        resampled = resampled.dropna(subset=["Open"])
+        return resampled.tz_convert("UTC")
+
+    bars = bars[_market_calendar.market_hours_mask(bars.index)]
+    if bars.empty:
+        return bars
+
+    step = INTERVAL_DURATIONS[interval]
+    local = bars.index.tz_convert("America/New_York")
+    session_open = local.normalize() + pd.Timedelta(hours=9, minutes=30)
+    bin_start = session_open + ((local - session_open) // step) * step
+
+    resampled = bars.groupby(bin_start.tz_convert("UTC")).agg(_AGGREGATIONS)
+    resampled.index.name = None
+    return resampled
+
+
+def normalize_download(
+    frame: pd.DataFrame, ticker: str, columns: list = OHLCV_COLUMNS
+) -> pd.DataFrame:
+    """
+    Flatten a yf.download(group_by="ticker") frame to OHLCV columns (or the
+    given ones, e.g. ACTION_COLUMNS) with a UTC index. Naive timestamps are
+    treated as UTC, matching fetch_stock_data.
+    """
+    if frame is None or frame.empty:
+        return pd.DataFrame(columns=columns)
+
+    if isinstance(frame.columns, pd.MultiIndex):
+        downloaded = frame.columns.get_level_values(0)
+        if ticker not in downloaded:
+            ticker = ticker.upper()
+        if ticker not in downloaded:
+            return pd.DataFrame(columns=columns)
+        frame = frame[ticker]
+
+    frame = frame.reindex(columns=columns).dropna(how="all")
+    index = pd.DatetimeIndex(frame.index)
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+    frame.index = index.tz_convert("UTC")
+    return frame.astype(float)
+
+
+class BarStore:
+    """
+    Persistent OHLCV bar store keyed by (ticker, interval).
+
+    Bars live in the `ohlcv_bars` collection (unique on ticker/interval/timestamp)
+    and each key has a document in `ohlcv_coverage` recording how far back the
+    stored bars reach, the last stored bar and when upstream was last asked.
+    A request is answered from the store when the coverage reaches back far
+    enough; otherwise only the missing part is downloaded:
+
+    - no coverage or too short: download the full period once
+    - stale (older than one bar): download from the last stored bar onwards
+    - fresh: no upstream call at all
+
+    yfinance bars are split- and dividend-adjusted, so a split or dividend
+    rescales all history before it. A delta download that reports a new
+    corporate action, or whose re-downloaded first bar no longer matches the
+    stored one, therefore drops the stored bars for that key and downloads
+    the full period again instead of appending on a different basis.
+    """
+
+    def __init__(self, database=db):
+        self.bars = database["ohlcv_bars"]
+        self.coverage = database["ohlcv_coverage"]
+        self._indexes_ready = False
+
+    def _ensure_indexes(self):
+        if self._indexes_ready:
+            return
+        self.bars.create_index(
+            [("ticker", ASCENDING), ("interval", ASCENDING), ("timestamp", ASCENDING)],
+            unique=True,
+        )
+        self.coverage.create_index(
+            [("ticker", ASCENDING), ("interval", ASCENDING)], unique=True
+        )
+        self._indexes_ready = True
+
+    def get_bars(self, ticker: str, period: str, interval: str) -> pd.DataFrame:
+        """
+        Return OHLCV bars (UTC index) for the ticker, period and interval,
+        downloading only what the store does not have yet.
+        """
+        return self.get_bars_many([ticker], period, interval)[ticker]
+
+    def get_bars_many(self, tickers: list, period: str, interval: str) -> dict:
+        """
+        Return {ticker: OHLCV bars} for several tickers. All tickers missing
+        from the store share one multi-ticker download, and all stale tickers
+        share one delta download.
+        """
+        now = pd.Timestamp.now(tz="UTC")
+        start = period_start(period, now)
+        if start is None:
+            return self._download_frames(tickers, interval, period)
+
+        try:
+            self._ensure_indexes()
+
+            source = self.source_interval(tickers, period, interval, start, now)
+            if source != interval:
+                frames = self.get_bars_many(tickers, period, source)
+                return {
+                    ticker: resample_bars(bars, interval)
+                    for ticker, bars in frames.items()
+                }
+
+            self._refresh(tickers, period, interval, start, now)
+            # Day periods are sliced by session, so read a few extra days for them
+            is_day_period = period != "ytd" and period.endswith("d")
+            read_from = start - pd.Timedelta(days=7) if is_day_period else start
+            return {
+                ticker: slice_period(
+                    self._read(ticker, interval, read_from), period, now
+                )
+                for ticker in tickers
+            }
+        except PyMongoError as e:
+            logger.warning(
+                f"Bar store unavailable, downloading {tickers} directly: {e}"
+            )
+            return self._download_frames(tickers, interval, period)
+
+    def source_interval(
+        self,
+        tickers: list,
+        period: str,
+        interval: str,
+        start: pd.Timestamp,
+        now: pd.Timestamp,
+    ) -> str:
+        """
+        Pick the interval to read from the store for a request: the finest
+        finer interval already stored for the whole window, otherwise the
+        default source for the interval (so 5m/15m/30m/1h share one 5m series
+        and 1d/1wk/1mo share one daily series), otherwise the interval itself.
+        """
+        sources = [
+            source
+            for source in DERIVATION_SOURCES.get(interval, [])
+            if source not in SOURCE_HISTORY_LIMITS
+            or start >= now - SOURCE_HISTORY_LIMITS[source]
+        ]
+
+        for source in sources:
+            if all(
+                self.plan(ticker, period, source, start, now)[0] != "full"
+                for ticker in tickers
+            ):
+                return source
+
+        default = DEFAULT_SOURCES.get(interval)
+        return default if default in sources else interval
+
+    def plan(
+        self,
+        ticker: str,
+        period: str,
+        interval: str,
+        start: pd.Timestamp,
+        now: pd.Timestamp,
+    ) -> tuple:
+        """
+        Decide how to bring (ticker, interval) up to date for a request.
+
+        Returns:
+            ("fresh", None), ("delta", last_timestamp) or ("full", None)
+        """
+        coverage = self.coverage.find_one(
+            {"ticker": ticker.upper(), "interval": interval}
+        )
+        if coverage is None or "last_timestamp" not in coverage:
+            return "full", None
+
+        covered_from = pd.Timestamp(coverage["covered_from"], tz="UTC")
+        if covered_from > start:
+            return "full", None
+
+        fetched_at = pd.Timestamp(coverage["fetched_at"], tz="UTC")
+        if now - fetched_at < refresh_age(interval):
+            return "fresh", None
+
+        return "delta", pd.Timestamp(coverage["last_timestamp"], tz="UTC")
+
+    def _refresh(
+        self,
+        tickers: list,
+        period: str,
+        interval: str,
+        start: pd.Timestamp,
+        now: pd.Timestamp,
+    ):
+        full, delta = [], {}
+        for ticker in tickers:
+            action, since = self.plan(ticker, period, interval, start, now)
+            if action == "full":
+                full.append(ticker)
+            elif action == "delta":
+                delta[ticker] = since
+
+        if full:
+            frame = self._download(full, interval, period=period)
+            for ticker in full:
+                bars = normalize_download(frame, ticker)
+                self.write(ticker, interval, bars, start, now)
+
+        if delta:
+            # Re-download the last stored bar as well, it may have been partial
+            frame = self._download(
+                list(delta), interval, start=min(delta.values()), actions=True
+            )
+            readjusted = []
+            for ticker, since in delta.items():
+                bars = normalize_download(frame, ticker)
+                bars = bars[bars.index >= since]
+                actions = normalize_download(frame, ticker, ACTION_COLUMNS)
+                if self._basis_changed(ticker, interval, bars, actions, since):
+                    readjusted.append(ticker)
+                else:
+                    self.write(ticker, interval, bars, None, now)
+
+            if readjusted:
+                logger.info(
+                    f"Adjusted prices changed for {readjusted} ({interval}), "
+                    "refetching their history"
+                )
+                for ticker in readjusted:
+                    self.clear(ticker, interval)
+                frame = self._download(readjusted, interval, period=period)
+                for ticker in readjusted:
+                    bars = normalize_download(frame, ticker)
+                    self.write(ticker, interval, bars, start, now)
+
+    def _basis_changed(
+        self,
+        ticker: str,
+        interval: str,
+        bars: pd.DataFrame,
+        actions: pd.DataFrame,
+        since: pd.Timestamp,
+    ) -> bool:
+        """
+        Whether a delta download is on a different adjustment basis than the
+        stored bars: a split or dividend after the last stored bar, or that
+        bar's open re-downloaded at a different price
+        """
+        if (actions[actions.index > since].fillna(0) != 0).any().any():
+            return True
+        if since not in bars.index:
+            return False
+        stored = self.bars.find_one(
+            {
+                "ticker": ticker.upper(),
+                "interval": interval,
+                "timestamp": since.to_pydatetime(),
+            },
+            {"_id": 0, "Open": 1},
+        )
+        if stored is None or stored.get("Open") is None:
+            return False
+        return not np.isclose(
+            bars.loc[since, "Open"], stored["Open"], rtol=ADJUSTMENT_RTOL
+        )
+
+    def clear(self, ticker: str, interval: str):
+        """Drop the stored bars and coverage of (ticker, interval)"""
+        key = {"ticker": ticker.upper(), "interval": interval}
+        self.bars.delete_many(key)
+        self.coverage.delete_one(key)
+
+    def _download_frames(self, tickers: list, interval: str, period: str) -> dict:
+        frame = self._download(tickers, interval, period=period)
+        return {ticker: normalize_download(frame, ticker) for ticker in tickers}
+
+    @staticmethod
+    def _download(
+        tickers,
+        interval: str,
+        period: str = None,
+        start: pd.Timestamp = None,
+        actions: bool = False,
+    ):
+        """
+        Single upstream call for one ticker or a list of tickers; with
+        actions=True the frame also has Dividends and Stock Splits columns
+        """
+        kwargs = (
+            {"period": period} if start is None else {"start": start.to_pydatetime()}
+        )
+        return yf.download(
+            tickers=tickers,
+            interval=interval,
+            group_by="ticker",
+            progress=False,
+            auto_adjust=True,
+            actions=actions,
+            **kwargs,
+        )
+
+    def write(
+        self,
+        ticker: str,
+        interval: str,
+        bars: pd.DataFrame,
+        covered_from: Optional[pd.Timestamp],
+        now: pd.Timestamp,
+    ):
+        """
+        Upsert bars and advance the coverage document for (ticker, interval).
+
+        Args:
+            bars: normalized OHLCV frame with a UTC index
+            covered_from: start of the period that was downloaded in full,
+                or None for a delta download
+            now: time of the upstream call
+        """
+        key = {"ticker": ticker.upper(), "interval": interval}
+
+        if not bars.empty:
+            records = bars.reset_index(names="timestamp").to_dict("records")
+            self.bars.bulk_write(
+                [
+                    UpdateOne(
+                        {**key, "timestamp": record["timestamp"].to_pydatetime()},
+                        {"$set": {column: record[column] for column in OHLCV_COLUMNS}},
+                        upsert=True,
+                    )
+                    for record in records
+                ],
+                ordered=False,
+            )
+
+        update = {"$set": {"fetched_at": now.to_pydatetime()}}
+        if not bars.empty:
+            update["$max"] = {"last_timestamp": bars.index[-1].to_pydatetime()}
+        if covered_from is not None:
+            # A delta download never extends coverage backwards
+            update["$min"] = {"covered_from": covered_from.to_pydatetime()}
+        self.coverage.update_one(key, update, upsert=True)
+
+    def _read(self, ticker: str, interval: str, start: pd.Timestamp) -> pd.DataFrame:
+        cursor = self.bars.find(
+            {
+                "ticker": ticker.upper(),
+                "interval": interval,
+                "timestamp": {"$gte": max(start, EPOCH_START).to_pydatetime()},
+            },
+            {"_id": 0, "timestamp": 1, **{column: 1 for column in OHLCV_COLUMNS}},
+        ).sort("timestamp", ASCENDING)
+
+        frame = pd.DataFrame(list(cursor), columns=["timestamp", *OHLCV_COLUMNS])
+        frame.index = pd.DatetimeIndex(pd.to_datetime(frame.pop("timestamp"), utc=True))
+        return frame
@@ -2,6 +2,13 @@
 import yfinance as yf
 import logging
 import pandas as pd
+from analytics.arima_model import MarketCalendar
+from analytics.bar_store import BarStore
+from analytics.downsampling import downsample_bars, lttb_series
+from analytics.encoding import encode_columnar
+from analytics.quote_cache import QuoteCache
+from analytics.sessions import MarketSessions
+from analytics.single_flight import SingleFlight
 
 logging.basicConfig(
     level=logging.INFO,
@@ -11,53 +18,268 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Persistent (ticker, interval) bar store; only new bars are fetched upstream
+bar_store = BarStore()
 
-def fetch_stock_data(ticker: str, period: str = "1y", interval: str = "1d") -> dict:
+# Concurrent identical upstream requests share one in-flight call
+_history_flight = SingleFlight("history")
+_info_flight = SingleFlight("info")
+_options_flight = SingleFlight("options")
+_option_chain_flight = SingleFlight("option_chain")
+_batch_flight = SingleFlight("history_batch")
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def fetch_stock_data(
+    ticker: str,
+    period: str = "1y",
+    interval: str = "1d",
+    max_points: int = None,
+    downsample: str = "ohlc",
+) -> dict:
     """
-    Fetches stock data for a given ticker symbol
+    Fetches stock data for a given ticker symbol. Bars come from the bar
+    store, which only downloads bars newer than the ones it already has.
+    Concurrent requests for the same ticker/period/interval share one fetch.
 
     Args:
         ticker: Stock ticker symbol
         period: Time period to fetch
         interval: Time interval between data points
-        is_prediction: Whether data is for prediction
+        max_points: Maximum number of bars to return (None for all)
+        downsample: "ohlc" (merge into candles) or "lttb" (keep Close shape)
     Returns:
         Dictionary with stock data formatted for frontend/model
     """
+    stock_data = fetch_stock_frame(ticker, period, interval)
+    stock_data = downsample_bars(stock_data, max_points, downsample)
+    return {ticker: _format_bars(stock_data, interval)}
+
+
+def fetch_stock_frame(
+    ticker: str, period: str = "1y", interval: str = "1d"
+) -> pd.DataFrame:
+    """
+    Fetches OHLCV bars (UTC index) for a ticker. The returned DataFrame may be
+    shared with concurrent callers and must not be modified in place.
+    """
+    return _history_flight.do(
+        (ticker, period, interval), _fetch_stock_frame, ticker, period, interval
+    )
+
 
+def _fetch_stock_frame(ticker: str, period: str, interval: str) -> pd.DataFrame:
     try:
-        stock_data = yf.download(
-            tickers=ticker, period=period, interval=interval, group_by="ticker"
-        )
+        stock_data = bar_store.get_bars(ticker, period, interval)
 
         if stock_data.empty:
             raise ValueError(f"No data available for ticker {ticker}")
 
-        # Convert index to NY timezone
-        if stock_data.index.tz is None:
-            stock_data.index = stock_data.index.tz_localize("UTC")
-        stock_data.index = stock_data.index.tz_convert("America/New_York")
+        return stock_data
+
+    except Exception as e:
+        raise ValueError(f"Error fetching data for ticker {ticker}: {e}")
+
+
+def fetch_stock_columnar(
+    ticker: str,
+    period: str = "1y",
+    interval: str = "1d",
+    fmt: str = "columnar",
+    max_points: int = None,
+    downsample: str = "ohlc",
+) -> tuple:
+    """
+    Fetches stock data encoded column-wise: one shared epoch-millisecond
+    timestamp array plus one array per OHLCV field
+
+    Args:
+        ticker: Stock ticker symbol
+        period: Time period to fetch
+        interval: Time interval between data points
+        fmt: "columnar" (JSON), "msgpack" or "arrow" (IPC stream)
+        max_points: Maximum number of bars to return (None for all)
+        downsample: "ohlc" (merge into candles) or "lttb" (keep Close shape)
+    Returns:
+        (payload bytes, media type)
+    """
+    stock_data = fetch_stock_frame(ticker, period, interval)
+    stock_data = downsample_bars(stock_data, max_points, downsample)
+    return encode_columnar(
+        ticker, stock_data, _to_display_index(stock_data, interval), fmt
+    )
+
+
+def _to_display_index(stock_data: pd.DataFrame, interval: str) -> pd.DatetimeIndex:
+    """NY-timezone index, with weekly bars shown on Friday instead of Monday"""
+    # Convert index to NY timezone (stored bars are UTC)
+    index = stock_data.index.tz_convert("America/New_York")
+
+    # Adjust dates for weekly data to show Friday instead of Monday
+    if interval == "1wk":
+        index = index + pd.Timedelta(days=4)
+
+    return index
+
+
+def _format_bars(stock_data: pd.DataFrame, interval: str) -> dict:
+    """{column: {iso_timestamp: value}} for the frontend/model"""
+    timestamps = [date.isoformat() for date in _to_display_index(stock_data, interval)]
+
+    return {
+        column: {
+            date: float(value)
+            for date, value in zip(timestamps, stock_data[column])
+            if pd.notna(value)
+        }
+        for column in OHLCV_COLUMNS
+    }
+
 
-        # Adjust dates for weekly data to show Friday instead of Monday
-        if interval == "1wk":
-            stock_data.index = stock_data.index + pd.Timedelta(days=4)
+def _sparkline(stock_data: pd.DataFrame, interval: str, points: int) -> dict:
+    """Close prices only, downsampled to at most `points` with LTTB"""
+    closes = lttb_series(stock_data["Close"], points)
 
-        result = {ticker: {}}
-        for column in ["Open", "High", "Low", "Close", "Volume"]:
-            result[ticker][column] = {
-                date.isoformat(): float(value)
-                for date, value in zip(stock_data.index, stock_data[(ticker, column)])
-                if pd.notna(value)
-            }
+    return {
+        "time": [date.isoformat() for date in _to_display_index(closes, interval)],
+        "close": closes.to_numpy(dtype=float).tolist(),
+    }
 
-        return result
 
+def fetch_batch_stock_data(
+    tickers: list,
+    period: str = "1y",
+    interval: str = "1d",
+    sparkline: bool = False,
+    points: int = 60,
+) -> dict:
+    """
+    Fetches stock data for several tickers with at most one multi-ticker
+    download for the tickers missing from the bar store (plus one delta
+    download for the stale ones)
+
+    Args:
+        tickers: Stock ticker symbols
+        period: Time period to fetch
+        interval: Time interval between data points
+        sparkline: Return only close prices, LTTB-downsampled to `points`
+        points: Maximum number of points per ticker in sparkline mode
+    Returns:
+        Dictionary keyed by ticker; tickers without data are left out
+    """
+    tickers = list(dict.fromkeys(tickers))
+    return _batch_flight.do(
+        (tuple(sorted(tickers)), period, interval, sparkline, points),
+        _fetch_batch_stock_data,
+        tickers,
+        period,
+        interval,
+        sparkline,
+        points,
+    )
+
+
+def _fetch_batch_stock_data(
+    tickers: list, period: str, interval: str, sparkline: bool, points: int
+) -> dict:
+    try:
+        frames = bar_store.get_bars_many(tickers, period, interval)
     except Exception as e:
-        raise ValueError(f"Error fetching data for ticker {ticker}: {e}")
+        raise ValueError(f"Error fetching data for tickers {tickers}: {e}")
+
+    result = {}
+    for ticker in tickers:
+        stock_data = frames.get(ticker)
+        if stock_data is None or stock_data.empty:
+            logger.warning(f"No data available for ticker {ticker} in batch")
+            continue
+
+        result[ticker] = (
+            _sparkline(stock_data, interval, points)
+            if sparkline
+            else _format_bars(stock_data, interval)
+        )
+
+    return result
+
+
+def _load_ticker_info(ticker: str) -> dict:
+    """
+    Fetches yf.Ticker(ticker).info, coalescing concurrent requests
+    """
+    return _info_flight.do(ticker.upper(), lambda: yf.Ticker(ticker).info)
+
 
+# Market-hours-aware TTL cache in front of the (slow) .info call
+quote_cache = QuoteCache(_load_ticker_info)
 
-def get_market_status():
+
+def get_ticker_info(ticker: str, profile_only: bool = False) -> dict:
+    """
+    Returns yf.Ticker(ticker).info from the quote cache. Quote fields are
+    refreshed every minute while the market is open and kept until the
+    next open while it is closed.
+
+    Args:
+        ticker: Stock ticker symbol
+        profile_only: Only profile fields (summary, officers, sector) are
+            needed, so entries up to a day old are acceptable
+    Returns:
+        Shared info dict (do not modify)
     """
-    Checks if the market is currently open via yfinance
+    return quote_cache.get(ticker, profile_only=profile_only)
+
+
+def get_option_expirations(ticker: str) -> tuple:
     """
+    Returns the listed option expiration dates, coalescing concurrent requests
+    """
+    return _options_flight.do(ticker.upper(), lambda: yf.Ticker(ticker).options)
+
+
+def get_option_chain(ticker: str, expiration_date: str):
+    """
+    Returns the option chain for one expiration, coalescing concurrent requests
+    """
+    return _option_chain_flight.do(
+        (ticker.upper(), expiration_date),
+        lambda: yf.Ticker(ticker).option_chain(expiration_date),
+    )
+
+
+def get_coalescing_stats() -> dict:
+    """
+    Returns single-flight counters for each coalesced upstream call
+    """
+    return {
+        flight.name: flight.stats()
+        for flight in (
+            _history_flight,
+            _info_flight,
+            _options_flight,
+            _option_chain_flight,
+            _batch_flight,
+        )
+    }
+
+
+def _upstream_market_open() -> bool:
     return yf.Market("US").status["status"] == "open"
+
+
+# Session index shared with MarketCalendar; yfinance is only consulted
+# occasionally to catch unscheduled closures
+market_sessions = MarketSessions(
+    MarketCalendar().sessions, upstream=_upstream_market_open
+)
+
+
+def get_market_status() -> dict:
+    """
+    Checks if the market is currently open using the precomputed session table
+
+    Returns:
+        dict with is_open plus the next open and close instants (UTC)
+    """
+    return market_sessions.status()
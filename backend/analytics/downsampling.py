@@ -0,0 +1,115 @@
+# backend/analytics/downsampling.py
+import numpy as np
+import pandas as pd
+
+DOWNSAMPLE_MODES = ("ohlc", "lttb")
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of the `threshold` points that
+    best preserve the visual shape of a line series.
+
+    Bucket averages are computed for all buckets at once with np.add.reduceat;
+    the per-bucket selection is a vectorized argmax over the bucket's points.
+
+    Args:
+        x: monotonically increasing x values (e.g. epoch timestamps)
+        y: y values, same length as x
+        threshold: number of points to keep (first and last always kept)
+    Returns:
+        Sorted array of selected indices
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # threshold - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    starts, ends = edges[:-1], edges[1:]
+    sizes = ends - starts
+
+    avg_x = np.add.reduceat(x[:-1], starts) / sizes
+    avg_y = np.add.reduceat(y[:-1], starts) / sizes
+    # The bucket after the last one is the final point itself
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket, (start, end) in enumerate(zip(starts, ends)):
+        ax, ay = x[previous], y[previous]
+        area = np.abs(
+            (ax - next_x[bucket]) * (y[start:end] - ay)
+            - (ax - x[start:end]) * (next_y[bucket] - ay)
+        )
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+
+    return selected
+
+
+def lttb_series(series: pd.Series, threshold: int) -> pd.Series:
+    """LTTB on a datetime-indexed series, using epoch time as x"""
+    series = series.dropna()
+    if len(series) <= threshold:
+        return series
+    x = pd.DatetimeIndex(series.index).asi8
+    return series.iloc[lttb_indices(x, series.to_numpy(dtype=float), threshold)]
+
+
+def ohlc_buckets(bars: pd.DataFrame, max_points: int) -> pd.DataFrame:
+    """
+    Aggregate consecutive bars into at most `max_points` candles:
+    first Open, max High, min Low, last Close, summed Volume. Each candle
+    keeps the timestamp of its first bar.
+    """
+    n = len(bars)
+    if n <= max_points:
+        return bars
+
+    starts = np.unique(np.linspace(0, n, max_points + 1).astype(int)[:-1])
+    last = np.append(starts[1:], n) - 1
+
+    volume = np.nan_to_num(bars["Volume"].to_numpy(dtype=float))
+    return pd.DataFrame(
+        {
+            "Open": bars["Open"].to_numpy(dtype=float)[starts],
+            "High": np.fmax.reduceat(bars["High"].to_numpy(dtype=float), starts),
+            "Low": np.fmin.reduceat(bars["Low"].to_numpy(dtype=float), starts),
+            "Close": bars["Close"].to_numpy(dtype=float)[last],
+            "Volume": np.add.reduceat(volume, starts),
+        },
+        index=bars.index[starts],
+    )
+
+
+def downsample_bars(bars: pd.DataFrame, max_points: int, mode: str = "ohlc"):
+    """
+    Bound the number of bars returned for a chart.
+
+    Args:
+        bars: OHLCV DataFrame with a DatetimeIndex
+        max_points: maximum number of rows to return
+        mode: "ohlc" to merge bars into candles, "lttb" to keep the rows that
+            best preserve the Close line
+    """
+    if mode not in DOWNSAMPLE_MODES:
+        raise ValueError(f"Unsupported downsample mode {mode}")
+    if not max_points or len(bars) <= max_points:
+        return bars
+
+    if mode == "lttb":
+        closes = bars["Close"].dropna()
+        keep = lttb_indices(
+            pd.DatetimeIndex(closes.index).asi8,
+            closes.to_numpy(dtype=float),
+            max_points,
+        )
+        return bars.loc[closes.index[keep]]
+
+    return ohlc_buckets(bars, max_points)
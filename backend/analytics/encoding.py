@@ -0,0 +1,97 @@
+# backend/analytics/encoding.py
+import json
+from typing import Optional, Tuple
+
+import msgpack
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Wire formats for history responses. "json" is the original
+# {ticker: {column: {iso_timestamp: value}}} layout; the others share one
+# epoch-millisecond timestamp array plus one array per OHLCV field.
+FORMAT_MEDIA_TYPES = {
+    "json": "application/json",
+    "columnar": "application/json",
+    "msgpack": "application/x-msgpack",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+ACCEPT_FORMATS = {
+    "application/x-msgpack": "msgpack",
+    "application/msgpack": "msgpack",
+    "application/vnd.apache.arrow.stream": "arrow",
+}
+
+
+def negotiate_format(requested: Optional[str], accept: Optional[str]) -> str:
+    """
+    Pick the response format from an explicit ?format= value or the Accept header.
+    Anything unrecognised falls back to the original JSON layout.
+    """
+    if requested:
+        requested = requested.lower()
+        if requested not in FORMAT_MEDIA_TYPES:
+            raise ValueError(
+                f"Unsupported format {requested}, expected one of {list(FORMAT_MEDIA_TYPES)}"
+            )
+        return requested
+
+    for media_type in (accept or "").split(","):
+        media_type = media_type.split(";")[0].strip().lower()
+        if media_type in ACCEPT_FORMATS:
+            return ACCEPT_FORMATS[media_type]
+
+    return "json"
+
+
+def _epoch_ms(index: pd.DatetimeIndex) -> np.ndarray:
+    return index.as_unit("ms").asi8
+
+
+def encode_columnar(
+    ticker: str, bars: pd.DataFrame, index: pd.DatetimeIndex, fmt: str
+) -> Tuple[bytes, str]:
+    """
+    Encode OHLCV bars column-wise without per-row Python work.
+
+    Args:
+        ticker: Stock ticker symbol (kept in the payload/schema metadata)
+        bars: DataFrame with OHLCV columns
+        index: display index for the bars (timezone-aware)
+        fmt: "columnar", "msgpack" or "arrow"
+    Returns:
+        (payload bytes, media type)
+    """
+    timestamps = _epoch_ms(index)
+    columns = {column: bars[column].to_numpy(dtype=float) for column in bars.columns}
+
+    if fmt == "arrow":
+        arrays = [pa.array(timestamps, type=pa.timestamp("ms", tz=str(index.tz)))]
+        arrays += [pa.array(values, from_pandas=True) for values in columns.values()]
+        batch = pa.RecordBatch.from_arrays(arrays, names=["time", *columns])
+        batch = batch.replace_schema_metadata({"ticker": ticker})
+
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+        return sink.getvalue().to_pybytes(), FORMAT_MEDIA_TYPES["arrow"]
+
+    if fmt == "msgpack":
+        payload = {
+            "ticker": ticker,
+            "time": timestamps.tolist(),
+            **{column: values.tolist() for column, values in columns.items()},
+        }
+        return msgpack.packb(payload, use_bin_type=True), FORMAT_MEDIA_TYPES["msgpack"]
+
+    # JSON has no NaN, so missing values become null
+    payload = {
+        "ticker": ticker,
+        "time": timestamps.tolist(),
+        **{
+            column: np.where(np.isnan(values), None, values).tolist()
+            for column, values in columns.items()
+        },
+    }
+    return json.dumps(payload).encode(), FORMAT_MEDIA_TYPES["columnar"]
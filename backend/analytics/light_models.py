@@ -0,0 +1,343 @@
+# backend/analytics/light_models.py
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from analytics.arima_model import ForecastResult, MarketCalendar, ModelConfig
+
+logger = logging.getLogger(__name__)
+
+# Seasonal period in bars: one regular session for intraday intervals,
+# a week of sessions for daily bars, a year for monthly bars
+SEASON_LENGTHS = {
+    "1m": 390,
+    "2m": 195,
+    "5m": 78,
+    "15m": 26,
+    "30m": 13,
+    "60m": 7,
+    "90m": 5,
+    "1h": 7,
+    "1d": 5,
+    "1wk": 52,
+    "1mo": 12,
+}
+
+# Smoothing parameter grids searched (all at once) by Holt and Theta
+ALPHA_GRID = np.linspace(0.05, 0.95, 19)
+BETA_GRID = np.array([0.01, 0.05, 0.1, 0.2, 0.3])
+PHI_GRID = np.array([0.9, 0.98, 1.0])
+
+MAX_AR_LAGS = 10
+# Rolling-origin holdout used by the auto model
+HOLDOUT_ORIGINS = 3
+MIN_TRAIN_POINTS = 10
+
+
+class LightForecaster:
+    """
+    Base for closed-form/grid-fitted forecasters that are cheap enough to
+    refit on every request. Same interface as TimeSeriesForecaster
+    (train/forecast), minus incremental updates.
+
+    Subclasses implement _fit(y), storing their state in self.model_fit,
+    and _predict(steps).
+    """
+
+    def __init__(self, market_calendar: MarketCalendar, config: ModelConfig):
+        self.market_calendar = market_calendar
+        self.config = config
+        self.model_fit: Optional[Dict] = None
+        self.training_data = None
+        self.last_timestamp = None
+        self.period = None
+        self.interval = None
+        self.season = 1
+
+    def train(
+        self, data: pd.DataFrame, period: str, interval: str, ticker: str = None
+    ) -> bool:
+        """
+        Train the forecasting model on historical data
+
+        Args:
+            data: DataFrame with Close prices and datetime index
+            period: The time period for forecasting
+            interval: The time interval for data
+            ticker: Unused; accepted for interface compatibility
+
+        Returns:
+            bool: True if training was successful
+        """
+        self.period = period
+        self.interval = interval
+        self.training_data = data
+        self.season = SEASON_LENGTHS.get(interval, 1)
+
+        if len(data) < MIN_TRAIN_POINTS:
+            return False
+        if data["Close"].isnull().any() or data["Close"].std() == 0:
+            return False
+
+        self.last_timestamp = data.index[-1]
+        try:
+            self._fit(data["Close"].to_numpy(dtype=float))
+            return True
+        except Exception as e:
+            logger.warning(f"{type(self).__name__} failed to fit: {e}")
+            return False
+
+    def forecast(self, steps: int = None, simulations: int = 0) -> ForecastResult:
+        """
+        Generate forecast using the trained model (point path only; these
+        models carry no forecast variance, so no bands)
+
+        Args:
+            steps: Number of steps to forecast (defaults to config value)
+            simulations: Unused; accepted for interface compatibility
+
+        Returns:
+            ForecastResult: Object with forecast series and metadata
+        """
+        if self.model_fit is None:
+            raise ValueError("Model has not been trained yet")
+
+        if steps is None:
+            steps = self.config.get_forecast_steps(self.period, self.interval)
+
+        values = self._predict(steps)
+        future_dates = self.market_calendar.generate_forecast_dates(
+            self.last_timestamp, self.interval, steps
+        )
+        length = min(len(future_dates), len(values))
+        return ForecastResult(
+            historical_series=self.training_data["Close"],
+            forecast_series=pd.Series(values[:length], index=future_dates[:length]),
+        )
+
+    def _fit(self, y: np.ndarray):
+        raise NotImplementedError
+
+    def _predict(self, steps: int) -> np.ndarray:
+        raise NotImplementedError
+
+
+class NaiveForecaster(LightForecaster):
+    """Repeats the last observation"""
+
+    def _fit(self, y):
+        self.model_fit = {"last": y[-1]}
+
+    def _predict(self, steps):
+        return np.full(steps, self.model_fit["last"])
+
+
+class DriftForecaster(LightForecaster):
+    """Random walk with drift: the average historical change continues"""
+
+    def _fit(self, y):
+        self.model_fit = {"last": y[-1], "slope": (y[-1] - y[0]) / (len(y) - 1)}
+
+    def _predict(self, steps):
+        return self.model_fit["last"] + self.model_fit["slope"] * np.arange(
+            1, steps + 1
+        )
+
+
+class SeasonalNaiveForecaster(LightForecaster):
+    """
+    Repeats the last season (e.g. the previous session's intraday path),
+    shifted so it starts from the last observation. Falls back to naive
+    when the history is shorter than one season.
+    """
+
+    def _fit(self, y):
+        if len(y) <= self.season:
+            self.model_fit = {"last": y[-1], "pattern": np.zeros(1)}
+            return
+        season = y[-self.season - 1 :]
+        self.model_fit = {"last": y[-1], "pattern": season[1:] - season[0]}
+
+    def _predict(self, steps):
+        pattern = self.model_fit["pattern"]
+        return self.model_fit["last"] + np.resize(pattern, steps)
+
+
+def _holt_grid(y: np.ndarray, alphas, betas, phis):
+    """
+    Damped Holt (additive trend) for every parameter combination at once.
+    Returns the in-sample one-step SSE, final level and final trend per
+    combination.
+    """
+    level = np.full(alphas.shape, y[0])
+    trend = np.full(alphas.shape, y[1] - y[0])
+    sse = np.zeros(alphas.shape)
+    for value in y[1:]:
+        prediction = level + phis * trend
+        error = value - prediction
+        sse += error**2
+        level = prediction + alphas * error
+        trend = phis * trend + alphas * betas * error
+    return sse, level, trend
+
+
+class HoltForecaster(LightForecaster):
+    """
+    Exponential smoothing with a damped additive trend (ETS(A,Ad,N)),
+    parameters chosen by in-sample SSE over a grid evaluated in one pass
+    """
+
+    def _fit(self, y):
+        alphas, betas, phis = (
+            grid.ravel() for grid in np.meshgrid(ALPHA_GRID, BETA_GRID, PHI_GRID)
+        )
+        sse, level, trend = _holt_grid(y, alphas, betas, phis)
+        best = int(np.argmin(sse))
+        self.model_fit = {
+            "alpha": alphas[best],
+            "beta": betas[best],
+            "phi": phis[best],
+            "level": level[best],
+            "trend": trend[best],
+        }
+
+    def _predict(self, steps):
+        fit = self.model_fit
+        damping = np.cumsum(fit["phi"] ** np.arange(1, steps + 1))
+        return fit["level"] + damping * fit["trend"]
+
+
+class ThetaForecaster(LightForecaster):
+    """
+    Theta method (Hyndman & Billah formulation): simple exponential
+    smoothing plus half the linear-regression slope
+    """
+
+    def _fit(self, y):
+        n = len(y)
+        # SES for every alpha at once
+        level = np.full(ALPHA_GRID.shape, y[0])
+        sse = np.zeros(ALPHA_GRID.shape)
+        for value in y[1:]:
+            error = value - level
+            sse += error**2
+            level = level + ALPHA_GRID * error
+        best = int(np.argmin(sse))
+
+        slope = np.polyfit(np.arange(n), y, 1)[0]
+        self.model_fit = {
+            "alpha": ALPHA_GRID[best],
+            "level": level[best],
+            "slope": slope,
+            "n": n,
+        }
+
+    def _predict(self, steps):
+        fit = self.model_fit
+        alpha, n = fit["alpha"], fit["n"]
+        h = np.arange(1, steps + 1)
+        return fit["level"] + fit["slope"] / 2 * (
+            h - 1 + 1 / alpha - (1 - alpha) ** n / alpha
+        )
+
+
+class ARLeastSquaresForecaster(LightForecaster):
+    """
+    AR(p) with intercept on first differences, fitted by ordinary least
+    squares over a lag matrix; p is chosen by AIC on a common sample
+    """
+
+    def _fit(self, y):
+        diffs = np.diff(y)
+        max_lags = max(1, min(MAX_AR_LAGS, len(diffs) // 5))
+        # Rows are [d(t-max_lags), ..., d(t-1), d(t)]
+        windows = sliding_window_view(diffs, max_lags + 1)
+        target = windows[:, -1]
+        lags = windows[:, -2::-1]
+        rows = len(target)
+
+        best = None
+        for p in range(1, max_lags + 1):
+            design = np.column_stack([np.ones(rows), lags[:, :p]])
+            coef, _, _, _ = np.linalg.lstsq(design, target, rcond=None)
+            rss = float(np.sum((target - design @ coef) ** 2))
+            aic = rows * np.log(max(rss, 1e-12) / rows) + 2 * (p + 1)
+            if best is None or aic < best[0]:
+                best = (aic, coef)
+
+        coef = best[1]
+        self.model_fit = {
+            "last": y[-1],
+            "intercept": coef[0],
+            "phi": coef[1:],
+            "history": diffs[-(len(coef) - 1) :][::-1],
+        }
+
+    def _predict(self, steps):
+        fit = self.model_fit
+        recent = list(fit["history"])
+        changes = np.empty(steps)
+        for step in range(steps):
+            change = fit["intercept"] + float(np.dot(fit["phi"], recent))
+            changes[step] = change
+            recent = [change] + recent[:-1]
+        return fit["last"] + np.cumsum(changes)
+
+
+class AutoForecaster(LightForecaster):
+    """
+    Picks the light model with the lowest mean absolute error over a
+    rolling-origin holdout (the last HOLDOUT_ORIGINS windows of one
+    forecast horizon each), then fits it on the full series
+    """
+
+    candidates = ("naive", "drift", "seasonal_naive", "holt", "theta", "ar")
+
+    def _fit(self, y):
+        steps = self.config.get_forecast_steps(self.period, self.interval)
+        horizon = max(1, min(steps, len(y) // (HOLDOUT_ORIGINS + 2)))
+
+        scores = {}
+        for name in self.candidates:
+            errors = []
+            for k in range(HOLDOUT_ORIGINS, 0, -1):
+                origin = len(y) - k * horizon
+                if origin < MIN_TRAIN_POINTS:
+                    continue
+                model = self._candidate(name)
+                model._fit(y[:origin])
+                actual = y[origin : origin + horizon]
+                errors.append(np.mean(np.abs(model._predict(len(actual)) - actual)))
+            if errors:
+                scores[name] = float(np.mean(errors))
+
+        chosen = min(scores, key=scores.get) if scores else "drift"
+        model = self._candidate(chosen)
+        model._fit(y)
+        self.model_fit = {"model": chosen, "scores": scores, "state": model.model_fit}
+
+    def _predict(self, steps):
+        model = self._candidate(self.model_fit["model"])
+        model.model_fit = self.model_fit["state"]
+        return model._predict(steps)
+
+    def _candidate(self, name: str) -> LightForecaster:
+        model = LIGHT_MODELS[name](self.market_calendar, self.config)
+        model.season = self.season
+        model.period, model.interval = self.period, self.interval
+        return model
+
+
+LIGHT_MODELS = {
+    "naive": NaiveForecaster,
+    "drift": DriftForecaster,
+    "seasonal_naive": SeasonalNaiveForecaster,
+    "holt": HoltForecaster,
+    "ets": HoltForecaster,
+    "theta": ThetaForecaster,
+    "ar": ARLeastSquaresForecaster,
+    "auto": AutoForecaster,
+}
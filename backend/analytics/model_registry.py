@@ -0,0 +1,283 @@
+# backend/analytics/model_registry.py
+import logging
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from analytics.arima_model import (
+    ForecastModelFactory,
+    ForecastResult,
+    MarketCalendar,
+    ModelConfig,
+)
+from analytics.single_flight import SingleFlight
+from analytics.training_runner import FitCancelled, FitTimeout, training_runner
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on the pickled size of all cached fitted models
+MAX_REGISTRY_BYTES = 256 * 1024 * 1024
+MAX_REGISTRY_ENTRIES = 256
+# Full refit once the model is this old or has absorbed this share of new bars
+REFIT_MAX_AGE = pd.Timedelta(hours=6)
+REFIT_NEW_BAR_FRACTION = 0.25
+# Standardized one-step forecast errors on new bars that count as drift
+DRIFT_RMS_Z = 2.0
+DRIFT_MAX_Z = 4.0
+DRIFT_MIN_BARS = 3
+# Served (not cached) when a request-time ARIMA fit misses its deadline
+FALLBACK_MODEL = "auto"
+
+ModelKey = Tuple[str, str, str, str]
+
+
+class _Entry:
+    def __init__(self, forecaster, nobs: int):
+        self.forecaster = forecaster
+        self.fitted_at = pd.Timestamp.now(tz="UTC")
+        self.nobs_at_fit = nobs
+        self.new_bars = 0
+        self.size = 0
+
+
+class ModelRegistry:
+    """
+    Fitted forecasters kept per (ticker, period, interval, model type).
+
+    A repeat request only runs the Kalman filter over the bars that arrived
+    since the previous request (TimeSeriesForecaster.update) and forecasts from the
+    cached parameters. Parameters are re-estimated when the model is older
+    than REFIT_MAX_AGE, has absorbed too many new bars, or its one-step
+    forecast errors on the new bars show drift. Entries are evicted
+    least-recently-used first to stay within a byte budget.
+
+    Given a deadline, ARIMA fits run in the killable training runner; a fit
+    that misses it is answered with FALLBACK_MODEL, and a fit that every
+    waiting caller has cancelled is abandoned. With isolate_fits off (in
+    processes that must not start workers of their own, like the forecast
+    job workers) they run in this process instead, with the order search
+    limited to the deadline.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = MAX_REGISTRY_BYTES,
+        max_entries: int = MAX_REGISTRY_ENTRIES,
+        isolate_fits: bool = True,
+    ):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.isolate_fits = isolate_fits
+        self.market_calendar = MarketCalendar()
+        self.config = ModelConfig()
+        self._entries: "OrderedDict[ModelKey, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Serializes work per key; concurrent identical requests share a result
+        self._flight = SingleFlight("model_registry")
+        # Cancel events of the callers waiting on each flight
+        self._waiters: Dict[tuple, List[threading.Event]] = {}
+        self._stats = {
+            "updates": 0,
+            "fits": 0,
+            "scheduled_refits": 0,
+            "drift_refits": 0,
+            "evictions": 0,
+            "fallbacks": 0,
+            "cancelled": 0,
+        }
+
+    def forecast(
+        self,
+        ticker: str,
+        period: str,
+        interval: str,
+        data: pd.DataFrame,
+        model_type: str = "arima",
+        simulations: int = 0,
+        deadline: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> ForecastResult:
+        """
+        Forecast from a cached model brought up to date with `data`,
+        fitting a new one when there is none or a refit is due.
+
+        Args:
+            simulations: simulated paths for the fan chart (ARIMA only)
+            deadline: seconds an ARIMA fit may take, in a killable worker
+                (or, without isolate_fits, in this process with its order
+                search limited to it); None fits in this process without a
+                limit
+            cancel: set when the caller no longer wants the result; a fit
+                is abandoned once all callers sharing it have cancelled
+
+        Raises:
+            ValueError: if the model cannot be trained on `data`
+            FitCancelled: if every caller waiting on the fit cancelled
+        """
+        key = (ticker.upper(), period, interval, model_type.lower())
+        flight_key = (*key, simulations)
+        cancel = cancel or threading.Event()
+        with self._lock:
+            self._waiters.setdefault(flight_key, []).append(cancel)
+        try:
+            return self._flight.do(
+                flight_key,
+                self._forecast,
+                key,
+                data,
+                simulations,
+                deadline,
+                lambda: self._all_cancelled(flight_key),
+            )
+        finally:
+            with self._lock:
+                waiters = self._waiters[flight_key]
+                waiters.remove(cancel)
+                if not waiters:
+                    del self._waiters[flight_key]
+
+    def _all_cancelled(self, flight_key: tuple) -> bool:
+        with self._lock:
+            return all(event.is_set() for event in self._waiters[flight_key])
+
+    def _forecast(
+        self,
+        key: ModelKey,
+        data: pd.DataFrame,
+        simulations: int = 0,
+        deadline: Optional[float] = None,
+        cancelled=None,
+    ) -> ForecastResult:
+        ticker, period, interval, model_type = key
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry.size
+
+        if entry is not None and not self._refit_due(entry, key):
+            try:
+                new_bars = entry.forecaster.update(data)
+                entry.new_bars += new_bars
+                if self._drifted(entry.forecaster, new_bars):
+                    logger.info(f"Forecast errors drifted for {key}, refitting")
+                    self._count("drift_refits")
+                    entry = None
+                else:
+                    self._count("updates")
+            except Exception as e:
+                logger.warning(f"Incremental update failed for {key}, refitting: {e}")
+                entry = None
+        else:
+            entry = None
+
+        if entry is None:
+            try:
+                forecaster = self._train(key, data, deadline, cancelled)
+            except FitTimeout as e:
+                logger.warning(f"{e} for {key}, serving {FALLBACK_MODEL} instead")
+                self._count("fallbacks")
+                return self._train(
+                    (ticker, period, interval, FALLBACK_MODEL), data
+                ).forecast(simulations=simulations)
+            except FitCancelled:
+                self._count("cancelled")
+                raise
+            self._count("fits")
+            entry = _Entry(forecaster, len(data))
+
+        result = entry.forecaster.forecast(simulations=simulations)
+        # Models without update() are refit on every request, so caching
+        # them would only cost the pickling and the memory
+        if hasattr(entry.forecaster, "update"):
+            self._store(key, entry)
+        return result
+
+    def _train(
+        self,
+        key: ModelKey,
+        data: pd.DataFrame,
+        deadline: Optional[float] = None,
+        cancelled=None,
+    ):
+        ticker, period, interval, model_type = key
+        if deadline is not None and model_type == "arima" and self.isolate_fits:
+            forecaster = training_runner.train_arima(
+                data,
+                period,
+                interval,
+                ticker=ticker,
+                config=self.config,
+                deadline=deadline,
+                cancelled=cancelled,
+            )
+        else:
+            forecaster = ForecastModelFactory.create_model(
+                model_type, market_calendar=self.market_calendar, config=self.config
+            )
+            # The deadline only bounds an in-process ARIMA order search
+            budget = {"budget": deadline} if model_type == "arima" else {}
+            if not forecaster.train(data, period, interval, ticker=ticker, **budget):
+                forecaster = None
+        if forecaster is None:
+            raise ValueError("Failed to train model")
+        return forecaster
+
+    def _refit_due(self, entry: _Entry, key: ModelKey) -> bool:
+        if (
+            pd.Timestamp.now(tz="UTC") - entry.fitted_at > REFIT_MAX_AGE
+            or entry.new_bars > REFIT_NEW_BAR_FRACTION * entry.nobs_at_fit
+        ):
+            logger.info(f"Scheduled refit for {key}")
+            self._count("scheduled_refits")
+            return True
+        return False
+
+    @staticmethod
+    def _drifted(forecaster, new_bars: int) -> bool:
+        """Whether the standardized one-step errors of the new bars are too large"""
+        if new_bars == 0:
+            return False
+        errors = forecaster.model_fit.standardized_forecasts_error[0, -new_bars:]
+        errors = errors[np.isfinite(errors)]
+        if len(errors) == 0:
+            return False
+        if np.abs(errors).max() > DRIFT_MAX_Z:
+            return True
+        return (
+            len(errors) >= DRIFT_MIN_BARS and np.sqrt(np.mean(errors**2)) > DRIFT_RMS_Z
+        )
+
+    def _store(self, key: ModelKey, entry: _Entry):
+        try:
+            entry.size = len(
+                pickle.dumps(entry.forecaster.model_fit, pickle.HIGHEST_PROTOCOL)
+            )
+        except Exception as e:
+            logger.warning(f"Not caching model for {key}: {e}")
+            return
+        if entry.size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self._stats["evictions"] += 1
+
+    def _count(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "bytes": self._bytes}
+
+
+model_registry = ModelRegistry()
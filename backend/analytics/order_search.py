@@ -0,0 +1,283 @@
+# backend/analytics/order_search.py
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import warnings
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from statsmodels.tsa.arima.model import ARIMA
+from statsmodels.tsa.stattools import kpss
+
+logger = logging.getLogger(__name__)
+
+Order = Tuple[int, int, int]
+
+MAX_P = 3
+MAX_D = 1
+MAX_Q = 3
+# Significance level of the KPSS test that picks the differencing order
+KPSS_ALPHA = 0.05
+# Wall-clock budget for the whole search, in seconds
+SEARCH_BUDGET = 10.0
+SEARCH_WORKERS = min(4, os.cpu_count() or 1)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+# Searches currently using the pool
+_searches = 0
+
+# Last chosen order per (ticker, period, interval)
+_chosen_orders: Dict[Tuple[str, str, str], Order] = {}
+_orders_lock = threading.Lock()
+
+
+def remember_order(ticker: str, period: str, interval: str, order: Order):
+    with _orders_lock:
+        _chosen_orders[(ticker.upper(), period, interval)] = tuple(order)
+
+
+def recall_order(ticker: str, period: str, interval: str) -> Optional[Order]:
+    with _orders_lock:
+        return _chosen_orders.get((ticker.upper(), period, interval))
+
+
+def _reset_pool(pool: ProcessPoolExecutor):
+    """Drop `pool`, if it is still the shared one, after it broke"""
+    global _pool
+    with _pool_lock:
+        if pool is not _pool:
+            return
+        _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _kill_pool(pool: ProcessPoolExecutor):
+    # A pool shut down without waiting lets its workers finish their
+    # current tasks, and the executor keeps no public handle on them
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.kill()
+
+
+def _enter_search() -> ProcessPoolExecutor:
+    """Count a search in and return the shared pool, starting it if needed"""
+    # Spawned (not forked) workers, so they never inherit the server's
+    # threads, sockets or Mongo client
+    global _pool, _searches
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=SEARCH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        _searches += 1
+        return _pool
+
+
+def _leave_search(pool: ProcessPoolExecutor, kill: bool) -> bool:
+    """
+    Count a search out. With kill, and no other search using the pool,
+    its workers are killed (the next search starts a new pool).
+
+    Returns:
+        Whether the pool was killed
+    """
+    global _pool, _searches
+    with _pool_lock:
+        _searches -= 1
+        if not kill or _searches > 0 or pool is not _pool:
+            return False
+        _pool = None
+    _kill_pool(pool)
+    return True
+
+
+def seed_params(model: ARIMA, start_params: Dict[str, float]) -> np.ndarray:
+    """
+    Start vector for `model` taking parameters shared by name with
+    `start_params`; the rest keep statsmodels' defaults
+    """
+    if all(name in start_params for name in model.param_names):
+        # Computing the defaults runs a preliminary regression; skip it
+        return np.array([start_params[name] for name in model.param_names])
+    return np.array(
+        [
+            start_params.get(name, default)
+            for name, default in zip(model.param_names, model.start_params)
+        ]
+    )
+
+
+def fit_order(
+    values: np.ndarray, order: Order, start_params: Optional[Dict[str, float]] = None
+) -> Optional[Tuple[Order, float, Dict[str, float]]]:
+    """
+    Fit one candidate order (runs in a worker process).
+
+    Parameters shared by name with `start_params` (e.g. ar.L1, ma.L1,
+    sigma2 from a neighbouring order) seed the optimizer; the rest keep
+    statsmodels' defaults.
+
+    Returns:
+        (order, aic, params by name), or None if the fit or its one-step
+        forecast failed
+    """
+    warnings.simplefilter("ignore")
+    model = ARIMA(values, order=order)
+
+    seeded = seed_params(model, start_params) if start_params else None
+
+    for params in (seeded, None) if seeded is not None else (None,):
+        try:
+            model_fit = model.fit(start_params=params)
+            if np.isnan(model_fit.forecast(steps=1)).any() or not np.isfinite(
+                model_fit.aic
+            ):
+                return None
+            return (
+                order,
+                float(model_fit.aic),
+                dict(zip(model.param_names, map(float, model_fit.params))),
+            )
+        except Exception:
+            continue
+    return None
+
+
+def choose_d(values: np.ndarray, max_d: int = MAX_D) -> int:
+    """
+    Differencing order from repeated KPSS tests: difference while the
+    series rejects level stationarity at KPSS_ALPHA, up to max_d.
+    """
+    series = np.asarray(values, dtype=float)
+    for d in range(max_d):
+        if len(series) < 10 or np.std(series) == 0:
+            return d
+        with warnings.catch_warnings():
+            # kpss warns when the statistic is outside its p-value table
+            warnings.simplefilter("ignore")
+            p_value = kpss(series, regression="c", nlags="auto")[1]
+        if p_value >= KPSS_ALPHA:
+            return d
+        series = np.diff(series)
+    return max_d
+
+
+def _neighbours(order: Order) -> Iterable[Order]:
+    """
+    Stepwise moves: p or q by one, or both together. d stays fixed, since
+    AIC is not comparable across differencing orders.
+    """
+    p, d, q = order
+    moves = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, -1)]
+    for dp, dq in moves:
+        candidate = (p + dp, d, q + dq)
+        if _in_bounds(candidate):
+            yield candidate
+
+
+def _in_bounds(order: Order) -> bool:
+    p, d, q = order
+    return 0 <= p <= MAX_P and 0 <= d <= MAX_D and 0 <= q <= MAX_Q
+
+
+def stepwise_search(
+    values: np.ndarray,
+    start_order: Order,
+    budget: float = SEARCH_BUDGET,
+) -> Optional[Tuple[Order, float, Dict[str, float]]]:
+    """
+    Hyndman-Khandakar style stepwise ARIMA order search by AIC.
+
+    The differencing order d is chosen once with KPSS tests (choose_d);
+    only p and q are searched, since AIC values of models fitted to
+    differently differenced series cannot be compared. Fits the start
+    (p, q) and the (2,d,2), (0,d,0), (1,d,0), (0,d,1) seeds in parallel,
+    then repeatedly fits the unvisited neighbours of the current best
+    (warm-started from its parameters) until no neighbour improves it.
+
+    When the wall-clock budget runs out, queued candidates are cancelled
+    and the best fit found so far is returned. Fits still running are
+    killed with the pool's workers, so they do not hold them past the
+    budget; the next search pays for starting a new pool. If another
+    search is sharing the pool they are left to finish instead, and can
+    keep up to SEARCH_WORKERS workers busy for one more fit.
+
+    Args:
+        values: observations as a float array
+        start_order: order whose p and q to start from (e.g. the last
+            chosen order)
+        budget: seconds before the search stops
+
+    Returns:
+        (order, aic, params by name) of the best candidate, or None
+    """
+    deadline = time.monotonic() + budget
+    d = choose_d(values)
+    p, _, q = start_order
+    seeds = [(p, d, q), (2, d, 2), (0, d, 0), (1, d, 0), (0, d, 1)]
+    seeds = [order for order in seeds if _in_bounds(order)]
+
+    best = None
+    visited = set()
+    pending: Dict[Future, Order] = {}
+
+    pool = _enter_search()
+
+    def submit(orders, start_params=None):
+        for order in orders:
+            if order in visited:
+                continue
+            visited.add(order)
+            pending[pool.submit(fit_order, values, order, start_params)] = order
+
+    try:
+        submit(seeds)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.info(
+                    f"Order search budget spent, cancelling {len(pending)} candidates"
+                )
+                break
+
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            improved = False
+            for future in done:
+                pending.pop(future)
+                result = future.result()
+                if result is not None and (best is None or result[1] < best[1]):
+                    best = result
+                    improved = True
+
+            # Expand around a new best as soon as it appears; its neighbours
+            # start from its parameters
+            if improved:
+                submit(_neighbours(best[0]), best[2])
+    except BrokenProcessPool:
+        logger.warning("Order search worker pool broke, recreating it")
+        _reset_pool(pool)
+    finally:
+        running = [
+            future for future in pending if not future.cancel() and not future.done()
+        ]
+        if _leave_search(pool, kill=bool(running)):
+            logger.info(f"Killed {len(running)} order search fits past the budget")
+
+    if best is not None:
+        logger.info(
+            f"Order search chose {best[0]} (AIC {best[1]:.1f}) "
+            f"after {len(visited)} candidates"
+        )
+    return best
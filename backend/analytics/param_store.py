@@ -0,0 +1,174 @@
+# backend/analytics/param_store.py
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+from pymongo import ASCENDING
+from pymongo.errors import PyMongoError
+
+from db import db
+
+logger = logging.getLogger(__name__)
+
+# Parameter vectors kept in memory; Mongo holds the rest
+MAX_CACHED_PARAMS = 1024
+
+ParamKey = Tuple[str, str, str, Tuple[int, int, int]]
+
+
+class ParamStore:
+    """
+    Last estimated ARIMA parameters per (ticker, period, interval, order),
+    used as start_params for the next fit of the same series.
+
+    Kept in an in-process LRU and in the "arima_params" collection, so
+    worker processes and restarts start warm too. Mongo errors only cost the
+    warm start, never the fit. Also aggregates warm/cold fit statistics.
+    """
+
+    def __init__(self, database=db, max_cached: int = MAX_CACHED_PARAMS):
+        self.collection = database["arima_params"]
+        self.max_cached = max_cached
+        self._cache: "OrderedDict[ParamKey, Dict[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._indexes_ready = False
+        self._stats = {
+            "warm_fits": 0,
+            "cold_fits": 0,
+            "warm_fallbacks": 0,
+            "warm_iterations": 0,
+            "cold_iterations": 0,
+            "warm_fit_ms": 0.0,
+            "cold_fit_ms": 0.0,
+        }
+
+    @staticmethod
+    def _key(ticker: str, period: str, interval: str, order) -> ParamKey:
+        return (ticker.upper(), period, interval, tuple(int(x) for x in order))
+
+    def _ensure_indexes(self):
+        if self._indexes_ready:
+            return
+        self.collection.create_index(
+            [
+                ("ticker", ASCENDING),
+                ("period", ASCENDING),
+                ("interval", ASCENDING),
+                ("order", ASCENDING),
+            ],
+            unique=True,
+        )
+        self._indexes_ready = True
+
+    def get(
+        self, ticker: str, period: str, interval: str, order
+    ) -> Optional[Dict[str, float]]:
+        """Parameters by name from the last fit of this series and order, if any"""
+        key = self._key(ticker, period, interval, order)
+        with self._lock:
+            params = self._cache.get(key)
+            if params is not None:
+                self._cache.move_to_end(key)
+                return params
+
+        try:
+            doc = self.collection.find_one(
+                {
+                    "ticker": key[0],
+                    "period": period,
+                    "interval": interval,
+                    "order": list(key[3]),
+                },
+                {"params": 1},
+            )
+        except PyMongoError as e:
+            logger.warning(f"Could not read ARIMA parameters for {key}: {e}")
+            return None
+        if doc is None:
+            return None
+
+        self._remember(key, doc["params"])
+        return doc["params"]
+
+    def put(
+        self,
+        ticker: str,
+        period: str,
+        interval: str,
+        order,
+        params: Dict[str, float],
+        persist: bool = True,
+    ):
+        """
+        Save the parameters (by name) estimated for this series and order.
+        persist=False only caches them in this process, for parameters a
+        worker process has already saved.
+        """
+        key = self._key(ticker, period, interval, order)
+        params = {name: float(value) for name, value in params.items()}
+        self._remember(key, params)
+        if not persist:
+            return
+
+        try:
+            self._ensure_indexes()
+            self.collection.update_one(
+                {
+                    "ticker": key[0],
+                    "period": period,
+                    "interval": interval,
+                    "order": list(key[3]),
+                },
+                {
+                    "$set": {
+                        "params": params,
+                        "updated_at": pd.Timestamp.now(tz="UTC").to_pydatetime(),
+                    }
+                },
+                upsert=True,
+            )
+        except PyMongoError as e:
+            logger.warning(f"Could not save ARIMA parameters for {key}: {e}")
+
+    def _remember(self, key: ParamKey, params: Dict[str, float]):
+        with self._lock:
+            self._cache[key] = params
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+
+    def record_fit(self, warm: bool, iterations: int, fit_ms: float, fell_back: bool):
+        """Count one fit: warm-started or cold, its optimizer iterations and time"""
+        kind = "warm" if warm else "cold"
+        with self._lock:
+            self._stats[f"{kind}_fits"] += 1
+            self._stats[f"{kind}_iterations"] += iterations
+            self._stats[f"{kind}_fit_ms"] += fit_ms
+            if fell_back:
+                self._stats["warm_fallbacks"] += 1
+
+    def stats(self) -> dict:
+        """Fit counts with mean optimizer iterations and fit time, warm vs cold"""
+        with self._lock:
+            stats = dict(self._stats)
+            cached = len(self._cache)
+        summary = {
+            "warm_fits": stats["warm_fits"],
+            "cold_fits": stats["cold_fits"],
+            "warm_fallbacks": stats["warm_fallbacks"],
+            "cached_params": cached,
+        }
+        for kind in ("warm", "cold"):
+            fits = stats[f"{kind}_fits"]
+            summary[f"{kind}_mean_iterations"] = (
+                round(stats[f"{kind}_iterations"] / fits, 1) if fits else None
+            )
+            summary[f"{kind}_mean_fit_ms"] = (
+                round(stats[f"{kind}_fit_ms"] / fits, 1) if fits else None
+            )
+        return summary
+
+
+param_store = ParamStore()
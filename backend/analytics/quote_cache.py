@@ -0,0 +1,135 @@
+# backend/analytics/quote_cache.py
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+import pandas as pd
+
+from analytics.arima_model import MarketCalendar
+
+logger = logging.getLogger(__name__)
+
+# Quote fields are served for this long while the market is open
+OPEN_MARKET_TTL = pd.Timedelta(seconds=60)
+# Profile fields (summary, officers, sector, ...) rarely change
+PROFILE_TTL = pd.Timedelta(days=1)
+# Expired entries younger than this are served while a refresh runs
+QUOTE_STALE_WINDOW = pd.Timedelta(minutes=5)
+PROFILE_STALE_WINDOW = pd.Timedelta(days=1)
+# Tickers kept; the least recently requested are evicted beyond this
+MAX_QUOTE_ENTRIES = 2048
+
+
+class QuoteCache:
+    """
+    TTL cache for yf.Ticker(...).info with stale-while-revalidate.
+
+    The quote TTL follows the market: short while it is open, and until the
+    next open while it is closed (prices cannot move before then). Callers
+    that only need profile fields (business summary, officers, sector) accept
+    entries up to a day old. Expired entries within the stale window are
+    returned immediately while one background refresh per ticker runs.
+    At most max_entries tickers are kept, least recently requested evicted
+    first.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], dict],
+        market_calendar: MarketCalendar = None,
+        max_refresh_workers: int = 2,
+        max_entries: int = MAX_QUOTE_ENTRIES,
+    ):
+        self.loader = loader
+        self.market_calendar = market_calendar or MarketCalendar()
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._refresh_pool = ThreadPoolExecutor(
+            max_workers=max_refresh_workers, thread_name_prefix="quote-refresh"
+        )
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "evictions": 0,
+        }
+
+    def quote_expiry(self, now: pd.Timestamp) -> pd.Timestamp:
+        """When quote fields fetched at `now` stop being fresh"""
+        if self.market_calendar.is_market_open(now):
+            return now + OPEN_MARKET_TTL
+        return max(
+            self.market_calendar.get_next_market_timestamp(now), now + OPEN_MARKET_TTL
+        )
+
+    def get(self, ticker: str, profile_only: bool = False) -> dict:
+        """
+        Cached info dict for a ticker. The dict is shared and must not be modified.
+
+        Args:
+            ticker: Stock ticker symbol
+            profile_only: caller only reads slow-changing profile fields
+        """
+        key = ticker.upper()
+        now = pd.Timestamp.now(tz="UTC")
+        ttl_field, stale_window = (
+            ("profile_expires", PROFILE_STALE_WINDOW)
+            if profile_only
+            else ("quote_expires", QUOTE_STALE_WINDOW)
+        )
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            if entry is not None and now < entry[ttl_field]:
+                self._stats["hits"] += 1
+                return entry["info"]
+            if entry is not None and now < entry[ttl_field] + stale_window:
+                self._stats["stale_hits"] += 1
+                self._schedule_refresh(key)
+                return entry["info"]
+            self._stats["misses"] += 1
+
+        return self._load(key)
+
+    def _load(self, key: str) -> dict:
+        info = self.loader(key)
+        now = pd.Timestamp.now(tz="UTC")
+        with self._lock:
+            self._entries[key] = {
+                "info": info,
+                "quote_expires": self.quote_expiry(now),
+                "profile_expires": now + PROFILE_TTL,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+        return info
+
+    def _schedule_refresh(self, key: str):
+        # Called with self._lock held
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        self._stats["refreshes"] += 1
+        self._refresh_pool.submit(self._refresh, key)
+
+    def _refresh(self, key: str):
+        try:
+            self._load(key)
+        except Exception as e:
+            logger.warning(f"Background refresh of {key} info failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries)}
@@ -0,0 +1,292 @@
+# backend/analytics/sessions.py
+import logging
+import threading
+from typing import Callable, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar,
+    GoodFriday,
+    Holiday,
+    USLaborDay,
+    USMartinLutherKingJr,
+    USMemorialDay,
+    USPresidentsDay,
+    USThanksgivingDay,
+    nearest_workday,
+    sunday_to_monday,
+)
+
+logger = logging.getLogger(__name__)
+
+MARKET_TZ = "America/New_York"
+REGULAR_OPEN = pd.Timedelta(hours=9, minutes=30)
+REGULAR_CLOSE = pd.Timedelta(hours=16)
+EARLY_CLOSE = pd.Timedelta(hours=13)
+
+# How far ahead of now the status table must reach
+SESSION_HORIZON = pd.Timedelta(days=366)
+# Extra sessions added on either side whenever the index has to grow
+INDEX_PADDING = pd.Timedelta(days=2 * 366)
+# Minimum time between upstream status checks
+RECONCILE_INTERVAL = pd.Timedelta(minutes=15)
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """
+    Full-day NYSE closures. Differs from the federal calendar by adding
+    Good Friday and dropping Columbus and Veterans Day.
+    """
+
+    rules = [
+        Holiday("New Year's Day", month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday(
+            "Juneteenth",
+            month=6,
+            day=19,
+            start_date="2022-06-19",
+            observance=nearest_workday,
+        ),
+        Holiday("Independence Day", month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday("Christmas Day", month=12, day=25, observance=nearest_workday),
+    ]
+
+
+def early_close_dates(start: pd.Timestamp, end: pd.Timestamp) -> pd.DatetimeIndex:
+    """1 PM closes: July 3, the day after Thanksgiving and Christmas Eve"""
+    years = range(start.year, end.year + 1)
+    thanksgiving = USThanksgivingDay.dates(
+        pd.Timestamp(start.year, 1, 1), pd.Timestamp(end.year, 12, 31)
+    )
+    candidates = pd.DatetimeIndex(
+        [pd.Timestamp(year, 7, 3) for year in years]
+        + [pd.Timestamp(year, 12, 24) for year in years]
+    ).append(thanksgiving + pd.Timedelta(days=1))
+    return candidates[(candidates >= start) & (candidates <= end)].sort_values()
+
+
+def build_session_table(
+    calendar: AbstractHolidayCalendar, start: pd.Timestamp, end: pd.Timestamp
+) -> pd.DataFrame:
+    """
+    One row per trading day between start and end (naive dates), with the
+    session's open and close as UTC instants.
+    """
+    days = pd.bdate_range(start.normalize(), end.normalize())
+    holidays = calendar.holidays(start=days.min(), end=days.max())
+    days = days[~days.isin(holidays)]
+
+    early = days.isin(early_close_dates(days.min(), days.max()))
+    local = days.tz_localize(MARKET_TZ)
+    close_offset = np.where(early, EARLY_CLOSE, REGULAR_CLOSE)
+
+    return pd.DataFrame(
+        {
+            "open": (local + REGULAR_OPEN).tz_convert("UTC"),
+            "close": (local + pd.to_timedelta(close_offset)).tz_convert("UTC"),
+            "early_close": early,
+        },
+        index=days,
+    )
+
+
+class Sessions(NamedTuple):
+    """One immutable build of the session index"""
+
+    table: pd.DataFrame
+    # Session open/close instants as UTC epoch nanoseconds, sorted
+    opens: np.ndarray
+    closes: np.ndarray
+    # Naive session dates and full-day holidays
+    days: pd.DatetimeIndex
+    holidays: pd.DatetimeIndex
+    # Range of UTC epoch nanoseconds the build is valid for
+    covers_from: int
+    covers_to: int
+
+    def locate(self, instants: np.ndarray):
+        """
+        For each instant: index of the first session whose close is still
+        ahead, and whether that session has already opened
+        """
+        i = np.searchsorted(self.closes, instants, side="right")
+        inside = i < len(self.closes)
+        is_open = inside & (self.opens[np.minimum(i, len(self.opens) - 1)] <= instants)
+        return i, is_open
+
+
+class SessionIndex:
+    """
+    Trading sessions built once per process from a holiday calendar and
+    grown (rebuilt with padding) when a lookup falls outside the range.
+    Readers always see a complete Sessions snapshot.
+    """
+
+    def __init__(self, calendar: AbstractHolidayCalendar):
+        self.calendar = calendar
+        self._lock = threading.Lock()
+        self._sessions: Optional[Sessions] = None
+
+    def covering(self, first: int, last: int) -> Sessions:
+        """Sessions valid for UTC epoch nanoseconds first..last"""
+        sessions = self._sessions
+        if (
+            sessions is not None
+            and sessions.covers_from <= first
+            and last <= sessions.covers_to
+        ):
+            return sessions
+
+        with self._lock:
+            sessions = self._sessions
+            if sessions is not None:
+                first = min(first, sessions.covers_from)
+                last = max(last, sessions.covers_to)
+            start = (
+                pd.Timestamp(first, tz="UTC").tz_convert(MARKET_TZ).tz_localize(None)
+                - INDEX_PADDING
+            ).normalize()
+            end = (
+                pd.Timestamp(last, tz="UTC").tz_convert(MARKET_TZ).tz_localize(None)
+                + INDEX_PADDING
+            ).normalize()
+
+            table = build_session_table(self.calendar, start, end)
+            # Usable up to the last session's close so there is always a next one
+            sessions = Sessions(
+                table=table,
+                opens=pd.DatetimeIndex(table["open"]).asi8,
+                closes=pd.DatetimeIndex(table["close"]).asi8,
+                days=table.index,
+                holidays=self.calendar.holidays(start=start, end=end),
+                covers_from=pd.Timestamp(start, tz=MARKET_TZ).value,
+                covers_to=int(table["close"].iloc[-2].value),
+            )
+            self._sessions = sessions
+            logger.info(
+                f"Built market session index {start.date()}..{end.date()} "
+                f"({len(table)} sessions)"
+            )
+            return sessions
+
+    def around(self, timestamp: pd.Timestamp, ahead: pd.Timedelta = None) -> Sessions:
+        """Sessions covering `timestamp` and, optionally, `ahead` past it"""
+        value = to_utc(timestamp).value
+        return self.covering(value, value + (ahead.value if ahead is not None else 0))
+
+
+def to_utc(timestamp: pd.Timestamp) -> pd.Timestamp:
+    """Naive timestamps are taken to be UTC"""
+    if timestamp.tz is None:
+        return timestamp.tz_localize("UTC")
+    return timestamp.tz_convert("UTC")
+
+
+# Process-wide NYSE session index shared by every MarketCalendar
+nyse_sessions = SessionIndex(NYSEHolidayCalendar())
+
+
+class MarketSessions:
+    """
+    Market status answered from the precomputed session index.
+
+    The index always reaches at least SESSION_HORIZON past now and grows
+    when it would fall short. An optional upstream status check runs in the
+    background at most every RECONCILE_INTERVAL; if it disagrees with the
+    table (unscheduled closure, calendar gap) its answer is used for one
+    interval.
+    """
+
+    def __init__(
+        self,
+        index: SessionIndex,
+        upstream: Optional[Callable[[], bool]] = None,
+    ):
+        self.index = index
+        self.upstream = upstream
+        self._lock = threading.Lock()
+        self._override: Optional[bool] = None
+        self._override_until: Optional[pd.Timestamp] = None
+        self._reconciled_at: Optional[pd.Timestamp] = None
+        self._reconciling = False
+
+    def _locate(self, now: pd.Timestamp):
+        sessions = self.index.around(now, SESSION_HORIZON)
+        i, is_open = sessions.locate(np.array([to_utc(now).value]))
+        return sessions, int(i[0]), bool(is_open[0])
+
+    def status(self, now: Optional[pd.Timestamp] = None) -> dict:
+        """
+        Whether the market is open at `now`, with the next open and close.
+
+        Returns:
+            dict with is_open, next_open, next_close (UTC ISO strings),
+            early_close for the current/next session and the answer's source
+        """
+        now = now or pd.Timestamp.now(tz="UTC")
+        sessions, i, is_open = self._locate(now)
+        next_open = sessions.opens[i + 1 if is_open else i]
+        next_close = sessions.closes[i]
+
+        source = "calendar"
+        self._maybe_reconcile(now)
+        if (
+            self._override is not None
+            and now < self._override_until
+            and self._override != is_open
+        ):
+            is_open = self._override
+            source = "upstream"
+
+        return {
+            "is_open": bool(is_open),
+            "next_open": _iso(next_open),
+            "next_close": _iso(next_close),
+            "early_close": bool(sessions.table["early_close"].iloc[i]),
+            "source": source,
+        }
+
+    def _maybe_reconcile(self, now: pd.Timestamp):
+        if self.upstream is None:
+            return
+        with self._lock:
+            if self._reconciling or (
+                self._reconciled_at is not None
+                and now - self._reconciled_at < RECONCILE_INTERVAL
+            ):
+                return
+            self._reconciling = True
+            self._reconciled_at = now
+        threading.Thread(target=self._reconcile, daemon=True).start()
+
+    def _reconcile(self):
+        try:
+            upstream_open = bool(self.upstream())
+            now = pd.Timestamp.now(tz="UTC")
+            expected = self._locate(now)[-1]
+            if upstream_open != expected:
+                logger.warning(
+                    f"Upstream market status ({upstream_open}) disagrees with "
+                    f"the session table ({expected}), using upstream"
+                )
+                self._override = upstream_open
+                self._override_until = now + RECONCILE_INTERVAL
+            else:
+                self._override = None
+        except Exception as e:
+            # Keep the previous answer; the calendar is still authoritative
+            logger.warning(f"Upstream market status check failed: {e}")
+        finally:
+            with self._lock:
+                self._reconciling = False
+
+
+def _iso(epoch_ns: int) -> str:
+    return pd.Timestamp(int(epoch_ns), tz="UTC").isoformat()
@@ -0,0 +1,239 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics import bar_store as bar_store_module
+from analytics.bar_store import (
+    BarStore,
+    normalize_download,
+    period_start,
+    resample_bars,
+)
+
+
+def _yfinance_frame(index: pd.DatetimeIndex, seed: int = 0) -> pd.DataFrame:
+    """OHLCV bars shaped like a single-ticker yf.download result"""
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(size=len(index)))
+    return pd.DataFrame(
+        {
+            "Open": close + rng.normal(size=len(index)),
+            "High": close + 2,
+            "Low": close - 2,
+            "Close": close,
+            "Volume": rng.integers(1_000, 10_000, size=len(index)).astype(float),
+        },
+        index=index,
+    )
+
+
+def _direct_fetch(daily: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """
+    What yfinance returns when asked for 1wk/1mo bars directly: one bar per
+    week (Monday) or month (the 1st), stamped at New York midnight
+    """
+    dates = daily.index.tz_localize(None)
+    if interval == "1wk":
+        starts = dates - pd.to_timedelta(dates.dayofweek, unit="D")
+    else:
+        starts = dates.to_period("M").to_timestamp()
+    bars = {}
+    for start in sorted(set(starts)):
+        rows = daily[starts == start]
+        bars[start] = {
+            "Open": rows["Open"].iloc[0],
+            "High": rows["High"].max(),
+            "Low": rows["Low"].min(),
+            "Close": rows["Close"].iloc[-1],
+            "Volume": rows["Volume"].sum(),
+        }
+    frame = pd.DataFrame.from_dict(bars, orient="index")
+    frame.index = frame.index.tz_localize("America/New_York")
+    return frame
+
+
+# Spans both DST changes, and months starting on a weekend
+DAILY = _yfinance_frame(
+    pd.bdate_range("2024-01-02", "2024-12-31", tz="America/New_York")
+)
+
+
+def test_weekly_bars_match_a_direct_fetch():
+    derived = resample_bars(normalize_download(DAILY, "TEST"), "1wk")
+    direct = normalize_download(_direct_fetch(DAILY, "1wk"), "TEST")
+    pd.testing.assert_frame_equal(derived, direct, check_freq=False)
+    assert (derived.index.tz_convert("America/New_York").dayofweek == 0).all()
+
+
+def test_monthly_bars_match_a_direct_fetch():
+    derived = resample_bars(normalize_download(DAILY, "TEST"), "1mo")
+    direct = normalize_download(_direct_fetch(DAILY, "1mo"), "TEST")
+    pd.testing.assert_frame_equal(derived, direct, check_freq=False)
+    local = derived.index.tz_convert("America/New_York")
+    assert (local.day == 1).all() and (local.hour == 0).all()
+
+
+def test_intraday_bins_start_at_the_open():
+    index = pd.date_range(
+        "2024-03-11 09:30", "2024-03-11 15:59", freq="1min", tz="America/New_York"
+    )
+    bars = normalize_download(_yfinance_frame(index), "TEST")
+
+    hourly = resample_bars(bars, "1h")
+
+    local = hourly.index.tz_convert("America/New_York")
+    assert [t.strftime("%H:%M") for t in local] == [
+        "09:30",
+        "10:30",
+        "11:30",
+        "12:30",
+        "13:30",
+        "14:30",
+        "15:30",
+    ]
+    assert hourly["Volume"].sum() == bars["Volume"].sum()
+    assert hourly["Open"].iloc[0] == bars["Open"].iloc[0]
+    assert hourly["Close"].iloc[-1] == bars["Close"].iloc[-1]
+
+
+class FakeUpstream:
+    """
+    Stands in for yf.download: a daily bar on each of `days` for every
+    ticker, priced on an adjustment basis, with optional dividends
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.basis = 1.0
+        self.dividends = {}
+        self.days = pd.bdate_range(
+            end=pd.Timestamp.now(tz="America/New_York").normalize()
+            - pd.Timedelta(days=1),
+            periods=400,
+            tz="America/New_York",
+        )[:-1]
+
+    def add_day(self):
+        self.days = self.days.append(
+            pd.DatetimeIndex([self.days[-1] + pd.offsets.BDay()])
+        )
+
+    def download(
+        self, tickers, interval, group_by, progress, auto_adjust, actions, **kwargs
+    ):
+        self.calls.append({"tickers": list(tickers), "actions": actions, **kwargs})
+        assert auto_adjust and group_by == "ticker"
+        days = self.days
+        if "start" in kwargs:
+            days = days[days >= pd.Timestamp(kwargs["start"])]
+        else:
+            days = days[
+                days >= period_start(kwargs["period"], pd.Timestamp.now(tz="UTC"))
+            ]
+        frames = {}
+        for ticker in tickers:
+            price = (100 + np.arange(len(self.days), dtype=float))[
+                -len(days) :
+            ] * self.basis
+            frame = pd.DataFrame(
+                {
+                    "Open": price,
+                    "High": price + 1,
+                    "Low": price - 1,
+                    "Close": price,
+                    "Volume": 1e6,
+                },
+                index=days,
+            )
+            if actions:
+                frame["Dividends"] = [
+                    self.dividends.get((ticker, day), 0.0) for day in days
+                ]
+                frame["Stock Splits"] = 0.0
+            frames[ticker] = frame
+        return pd.concat(frames, axis=1)
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    fake = FakeUpstream()
+    monkeypatch.setattr(bar_store_module.yf, "download", fake.download)
+    return fake
+
+
+@pytest.fixture
+def store():
+    mongomock = pytest.importorskip("mongomock")
+    return BarStore(mongomock.MongoClient()["test"])
+
+
+def _make_stale(store):
+    store.coverage.update_many(
+        {},
+        {
+            "$set": {
+                "fetched_at": (
+                    pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=1)
+                ).to_pydatetime()
+            }
+        },
+    )
+
+
+def test_full_download_then_fresh_reads(store, upstream):
+    first = store.get_bars("AAPL", "1mo", "1d")
+    second = store.get_bars("AAPL", "1mo", "1d")
+
+    assert len(upstream.calls) == 1 and upstream.calls[0]["period"] == "1mo"
+    pd.testing.assert_frame_equal(first, second)
+    assert first.index[-1] == upstream.days[-1].tz_convert("UTC")
+
+
+def test_stale_bars_download_only_the_delta(store, upstream):
+    store.get_bars_many(["AAPL", "MSFT"], "1mo", "1d")
+    stored = store.bars.count_documents({})
+    upstream.add_day()
+    _make_stale(store)
+
+    bars = store.get_bars_many(["AAPL", "MSFT"], "1mo", "1d")
+
+    delta = upstream.calls[-1]
+    assert len(upstream.calls) == 2
+    assert sorted(delta["tickers"]) == ["AAPL", "MSFT"] and delta["actions"]
+    # From the last stored bar, which is downloaded again
+    assert pd.Timestamp(delta["start"]) == upstream.days[-2].tz_convert("UTC")
+    assert store.bars.count_documents({}) == stored + 2
+    assert bars["AAPL"].index[-1] == upstream.days[-1].tz_convert("UTC")
+
+
+def test_readjusted_history_is_refetched(store, upstream):
+    store.get_bars("AAPL", "1mo", "1d")
+    upstream.basis = 0.5
+    upstream.add_day()
+    _make_stale(store)
+
+    bars = store.get_bars("AAPL", "1mo", "1d")
+
+    assert [call.get("period") for call in upstream.calls] == ["1mo", None, "1mo"]
+    expected = (100 + np.arange(len(upstream.days), dtype=float)) * 0.5
+    np.testing.assert_allclose(bars["Close"], expected[-len(bars) :])
+
+
+def test_new_dividend_refetches_history(store, upstream):
+    store.get_bars("AAPL", "1mo", "1d")
+    upstream.add_day()
+    upstream.dividends[("AAPL", upstream.days[-1])] = 0.25
+    _make_stale(store)
+
+    store.get_bars("AAPL", "1mo", "1d")
+
+    assert [call.get("period") for call in upstream.calls] == ["1mo", None, "1mo"]
+
+
+def test_weekly_bars_are_derived_from_stored_daily_bars(store, upstream):
+    daily = store.get_bars("AAPL", "3mo", "1d")
+
+    weekly = store.get_bars("AAPL", "3mo", "1wk")
+
+    assert len(upstream.calls) == 1
+    pd.testing.assert_frame_equal(weekly, resample_bars(daily, "1wk"))
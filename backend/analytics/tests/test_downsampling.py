@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.downsampling import downsample_bars, lttb_indices, ohlc_buckets
+
+
+def _reference_lttb(x, y, threshold):
+    """Straightforward per-bucket LTTB (Steinarsson, 2013)"""
+    n = len(x)
+    every = (n - 2) / (threshold - 2)
+    selected = [0]
+    a = 0
+    for i in range(threshold - 2):
+        start = int(np.floor(i * every)) + 1
+        end = int(np.floor((i + 1) * every)) + 1
+        next_start = end
+        next_end = min(int(np.floor((i + 2) * every)) + 1, n)
+        avg_x = np.mean(x[next_start:next_end])
+        avg_y = np.mean(y[next_start:next_end])
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return np.array(selected)
+
+
+@pytest.mark.parametrize("n, threshold", [(1000, 100), (997, 37), (50, 3), (12, 11)])
+def test_lttb_matches_reference(n, threshold):
+    rng = np.random.default_rng(n)
+    x = np.cumsum(rng.uniform(0.5, 1.5, size=n))
+    y = np.cumsum(rng.normal(size=n))
+
+    indices = lttb_indices(x, y, threshold)
+
+    assert len(indices) == threshold
+    assert (np.diff(indices) > 0).all()
+    np.testing.assert_array_equal(indices, _reference_lttb(x, y, threshold))
+
+
+def test_lttb_keeps_everything_below_threshold():
+    x = np.arange(10.0)
+    np.testing.assert_array_equal(lttb_indices(x, x, 10), np.arange(10))
+    np.testing.assert_array_equal(lttb_indices(x, x, 2), np.arange(10))
+
+
+def test_lttb_keeps_a_spike():
+    y = np.zeros(500)
+    y[123] = 10.0
+    assert 123 in lttb_indices(np.arange(500.0), y, 20)
+
+
+def _bars(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(n)
+    close = 100 + np.cumsum(rng.normal(size=n))
+    return pd.DataFrame(
+        {
+            "Open": close + rng.normal(size=n),
+            "High": close + rng.uniform(1, 2, size=n),
+            "Low": close - rng.uniform(1, 2, size=n),
+            "Close": close,
+            "Volume": rng.integers(1, 100, size=n).astype(float),
+        },
+        index=pd.date_range("2024-01-02", periods=n, freq="1min", tz="UTC"),
+    )
+
+
+@pytest.mark.parametrize("n, max_points", [(1000, 100), (1001, 7), (10, 3)])
+def test_ohlc_buckets_aggregate_consecutive_bars(n, max_points):
+    bars = _bars(n)
+
+    candles = ohlc_buckets(bars, max_points)
+
+    assert len(candles) <= max_points
+    # Rebuild the buckets from the candle start times
+    bucket = np.searchsorted(candles.index, bars.index, side="right") - 1
+    expected = bars.groupby(bucket).agg(
+        {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+    )
+    expected.index = candles.index
+    pd.testing.assert_frame_equal(candles, expected)
+
+
+def test_ohlc_buckets_ignore_missing_volume():
+    bars = _bars(10)
+    bars.loc[bars.index[1], "Volume"] = np.nan
+    candles = ohlc_buckets(bars, 2)
+    assert candles["Volume"].iloc[0] == bars["Volume"].iloc[:5].sum()
+
+
+def test_downsample_bars_modes():
+    bars = _bars(300)
+    assert len(downsample_bars(bars, 30, "ohlc")) == 30
+    lttb = downsample_bars(bars, 30, "lttb")
+    assert len(lttb) == 30 and lttb.index.isin(bars.index).all()
+    assert downsample_bars(bars, None) is bars
+    with pytest.raises(ValueError):
+        downsample_bars(bars, 30, "mean")
@@ -0,0 +1,78 @@
+import json
+
+import msgpack
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from analytics.encoding import FORMAT_MEDIA_TYPES, encode_columnar, negotiate_format
+
+INDEX = pd.date_range("2024-03-08 14:30", periods=4, freq="1D", tz="UTC").tz_convert(
+    "America/New_York"
+)
+BARS = pd.DataFrame(
+    {
+        "Open": [1.0, 2.0, np.nan, 4.0],
+        "High": [1.5, 2.5, 3.5, 4.5],
+        "Low": [0.5, 1.5, 2.5, 3.5],
+        "Close": [1.2, 2.2, 3.2, 4.2],
+        "Volume": [100.0, 200.0, 300.0, 400.0],
+    },
+    index=INDEX.tz_convert("UTC"),
+)
+EPOCH_MS = [int(ts.timestamp() * 1000) for ts in INDEX]
+
+
+@pytest.mark.parametrize(
+    "requested, accept, expected",
+    [
+        (None, None, "json"),
+        ("ARROW", "application/x-msgpack", "arrow"),
+        (None, "text/html, application/msgpack;q=0.9", "msgpack"),
+        (None, "application/vnd.apache.arrow.stream", "arrow"),
+        (None, "*/*", "json"),
+        ("columnar", None, "columnar"),
+    ],
+)
+def test_negotiate_format(requested, accept, expected):
+    assert negotiate_format(requested, accept) == expected
+
+
+def test_unknown_requested_format():
+    with pytest.raises(ValueError):
+        negotiate_format("csv", None)
+
+
+def test_columnar_json_uses_null_for_missing_values():
+    payload, media_type = encode_columnar("TEST", BARS, INDEX, "columnar")
+    decoded = json.loads(payload)
+
+    assert media_type == "application/json"
+    assert decoded["ticker"] == "TEST" and decoded["time"] == EPOCH_MS
+    assert decoded["Open"] == [1.0, 2.0, None, 4.0]
+    assert decoded["Volume"] == BARS["Volume"].tolist()
+
+
+def test_msgpack_round_trip():
+    payload, media_type = encode_columnar("TEST", BARS, INDEX, "msgpack")
+    decoded = msgpack.unpackb(payload)
+
+    assert media_type == FORMAT_MEDIA_TYPES["msgpack"]
+    assert decoded["time"] == EPOCH_MS
+    np.testing.assert_array_equal(decoded["Open"], BARS["Open"])
+    assert decoded["Close"] == BARS["Close"].tolist()
+
+
+def test_arrow_round_trip():
+    payload, media_type = encode_columnar("TEST", BARS, INDEX, "arrow")
+    table = pa.ipc.open_stream(payload).read_all()
+
+    assert media_type == FORMAT_MEDIA_TYPES["arrow"]
+    assert table.schema.metadata == {b"ticker": b"TEST"}
+    assert table.column_names == ["time", *BARS.columns]
+    frame = table.to_pandas()
+    assert (frame["time"] == INDEX).all()
+    pd.testing.assert_frame_equal(
+        frame.drop(columns="time"), BARS.reset_index(drop=True)
+    )
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from analytics.model_registry import ModelRegistry
+
+
+def _closes(n: int, seed: int = 0) -> pd.DataFrame:
+    index = pd.bdate_range("2024-01-02", periods=n, tz="America/New_York")
+    close = 100 + np.cumsum(np.random.default_rng(seed).normal(size=n))
+    return pd.DataFrame({"Close": close}, index=index)
+
+
+def test_light_models_are_not_cached():
+    registry = ModelRegistry()
+    data = _closes(120)
+
+    registry.forecast("TEST", "6mo", "1d", data, model_type="naive")
+    registry.forecast("TEST", "6mo", "1d", data, model_type="naive")
+
+    stats = registry.stats()
+    assert stats["fits"] == 2
+    assert stats["entries"] == 0 and stats["bytes"] == 0
+
+
+def test_arima_is_cached_and_updated_with_new_bars():
+    registry = ModelRegistry()
+    data = _closes(121)
+
+    registry.forecast("TEST", "6mo", "1d", data.iloc[:-1])
+    registry.forecast("TEST", "6mo", "1d", data)
+
+    stats = registry.stats()
+    assert stats["fits"] == 1 and stats["updates"] == 1
+    assert stats["entries"] == 1 and stats["bytes"] > 0
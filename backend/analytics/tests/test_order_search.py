@@ -0,0 +1,48 @@
+import time
+
+import numpy as np
+import pytest
+
+from analytics import order_search
+from analytics.order_search import _neighbours, choose_d, stepwise_search
+
+RNG = np.random.default_rng(0)
+WHITE_NOISE = RNG.normal(size=500)
+RANDOM_WALK = 100 + np.cumsum(RNG.normal(size=500))
+
+
+def test_choose_d():
+    assert choose_d(WHITE_NOISE) == 0
+    assert choose_d(RANDOM_WALK) == 1
+    assert choose_d(np.ones(50)) == 0
+
+
+def test_neighbours_keep_d_and_stay_in_bounds():
+    assert set(_neighbours((0, 1, 0))) == {(1, 1, 0), (0, 1, 1), (1, 1, 1)}
+    for order in _neighbours((3, 0, 3)):
+        assert order[1] == 0 and order[0] <= 3 and order[2] <= 3
+
+
+def test_search_finds_an_order_with_the_chosen_d():
+    best = stepwise_search(RANDOM_WALK, (1, 0, 1), budget=60)
+    assert best is not None
+    order, aic, params = best
+    assert order[1] == 1 and np.isfinite(aic) and "sigma2" in params
+
+
+def test_budget_stops_running_fits():
+    long_series = 100 + np.cumsum(RNG.normal(size=20000))
+    started = time.monotonic()
+
+    stepwise_search(long_series, (2, 1, 2), budget=0.5)
+
+    assert time.monotonic() - started < 3
+    # The pool's workers were killed rather than left fitting
+    assert order_search._pool is None and order_search._searches == 0
+
+
+@pytest.fixture(autouse=True, scope="module")
+def _stop_pool():
+    yield
+    if order_search._pool is not None:
+        order_search._pool.shutdown(cancel_futures=True)
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+from analytics.sessions import (
+    MarketSessions,
+    NYSEHolidayCalendar,
+    SessionIndex,
+    build_session_table,
+)
+
+
+def _utc(timestamp: str) -> pd.Timestamp:
+    return pd.Timestamp(timestamp, tz="UTC")
+
+
+def test_session_table_holidays_early_closes_and_dst():
+    table = build_session_table(
+        NYSEHolidayCalendar(), pd.Timestamp("2024-03-01"), pd.Timestamp("2024-12-31")
+    )
+
+    # Good Friday, Juneteenth, Christmas
+    for holiday in ("2024-03-29", "2024-06-19", "2024-12-25"):
+        assert pd.Timestamp(holiday) not in table.index
+    # Columbus and Veterans Day are trading days
+    assert pd.Timestamp("2024-10-14") in table.index
+    assert pd.Timestamp("2024-11-11") in table.index
+
+    assert table.loc["2024-03-08", "open"] == _utc("2024-03-08 14:30")
+    assert table.loc["2024-03-11", "open"] == _utc("2024-03-11 13:30")
+    assert table.loc["2024-07-03", "close"] == _utc("2024-07-03 17:00")
+    assert table.loc["2024-11-29", "close"] == _utc("2024-11-29 18:00")
+    assert table["early_close"].sum() == 3
+
+
+def test_locate_finds_the_next_close():
+    sessions = SessionIndex(NYSEHolidayCalendar()).around(_utc("2024-03-28 12:00"))
+    instants = np.array(
+        [
+            _utc("2024-03-28 12:00").value,  # before Thursday's open
+            _utc("2024-03-28 15:00").value,  # during it
+            _utc("2024-03-28 20:00").value,  # at the close
+            _utc("2024-03-29 15:00").value,  # Good Friday
+        ]
+    )
+
+    i, is_open = sessions.locate(instants)
+
+    days = sessions.days[i]
+    assert list(days.strftime("%Y-%m-%d")) == [
+        "2024-03-28",
+        "2024-03-28",
+        "2024-04-01",
+        "2024-04-01",
+    ]
+    assert list(is_open) == [False, True, False, False]
+
+
+def test_index_grows_to_cover_later_lookups():
+    index = SessionIndex(NYSEHolidayCalendar())
+    first = index.around(_utc("2024-06-03 15:00"))
+    assert index.around(_utc("2024-06-04 15:00")) is first
+
+    later = index.around(_utc("2031-06-03 15:00"))
+
+    assert later is not first
+    assert later.covers_from <= first.covers_from
+    assert later.covers_to >= _utc("2031-06-03 15:00").value
+
+
+def test_market_status():
+    status = MarketSessions(SessionIndex(NYSEHolidayCalendar()))
+
+    early = status.status(_utc("2024-07-03 15:00"))
+    assert early["is_open"] and early["early_close"]
+    assert early["next_close"] == _utc("2024-07-03 17:00").isoformat()
+
+    good_friday = status.status(_utc("2024-03-29 15:00"))
+    assert not good_friday["is_open"]
+    assert good_friday["next_open"] == _utc("2024-04-01 13:30").isoformat()
+    assert good_friday["source"] == "calendar"
@@ -0,0 +1,69 @@
+import math
+import operator
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.order_search import recall_order
+from analytics.training_runner import FitCancelled, FitTimeout, TrainingRunner
+
+
+@pytest.fixture(scope="module")
+def runner():
+    runner = TrainingRunner(max_workers=1)
+    yield runner
+    runner.shutdown()
+
+
+def test_runs_in_a_worker_and_reuses_it(runner):
+    assert runner.run(math.sqrt, 16.0) == 4.0
+    assert runner.run(operator.add, 2, 3) == 5
+    assert runner.stats()["workers"] == 1
+
+
+def test_errors_come_back_as_runtime_errors(runner):
+    with pytest.raises(RuntimeError, match="ValueError"):
+        runner.run(math.sqrt, -1.0)
+    # The worker survives a failed fit
+    assert runner.run(math.sqrt, 4.0) == 2.0
+
+
+def test_deadline_kills_the_worker(runner):
+    started = time.monotonic()
+    with pytest.raises(FitTimeout):
+        runner.run(time.sleep, 30, deadline=0.1)
+    assert time.monotonic() - started < 5
+    assert runner.stats()["timeouts"] == 1
+    # A fresh worker takes the next fit
+    assert runner.run(math.sqrt, 9.0) == 3.0
+
+
+def test_cancel_kills_the_worker(runner):
+    cancel_at = time.monotonic() + 0.2
+    with pytest.raises(FitCancelled):
+        runner.run(time.sleep, 30, cancelled=lambda: time.monotonic() > cancel_at)
+    assert runner.stats()["cancelled"] == 1
+
+
+def test_train_arima_records_the_fit_here(runner):
+    index = pd.bdate_range("2024-01-02", periods=150, tz="America/New_York")
+    closes = 100 + np.cumsum(np.random.default_rng(0).normal(size=150))
+    data = pd.DataFrame({"Close": closes}, index=index)
+
+    forecaster = runner.train_arima(data, "6mo", "1d", ticker="RUNNERTEST", deadline=30)
+
+    assert forecaster is not None and forecaster.fit_stats is not None
+    assert recall_order("RUNNERTEST", "6mo", "1d") == forecaster.model_fit.model.order
+
+
+def test_shutdown_stops_all_workers():
+    runner = TrainingRunner(max_workers=2)
+    runner.run(math.sqrt, 1.0)
+    processes = [worker.process for worker in runner._workers]
+
+    runner.shutdown()
+
+    assert runner.stats()["workers"] == 0
+    assert processes and not any(process.is_alive() for process in processes)
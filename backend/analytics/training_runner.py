@@ -0,0 +1,292 @@
+# backend/analytics/training_runner.py
+import logging
+import multiprocessing
+import multiprocessing.util
+import os
+import queue
+import signal
+import threading
+import time
+import warnings
+from typing import Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+from analytics.arima_model import MarketCalendar, ModelConfig, TimeSeriesForecaster
+from analytics.order_search import recall_order, remember_order
+from analytics.param_store import param_store
+
+logger = logging.getLogger(__name__)
+
+TRAINING_WORKERS = min(2, os.cpu_count() or 1)
+# Seconds a request-time fit may take before the fallback model is used
+FIT_DEADLINE = float(os.getenv("FIT_DEADLINE_SECONDS", "5"))
+# Extra time granted after the deadline for the order search to hand back
+# its best candidate before the worker is killed
+KILL_GRACE = 1.0
+# How often a waiting fit checks for cancellation
+CANCEL_POLL = 0.05
+
+
+class FitTimeout(TimeoutError):
+    """The fit did not finish within its deadline; its worker was killed"""
+
+
+class FitCancelled(Exception):
+    """Everyone waiting for the fit went away; its worker was killed"""
+
+
+def _worker_loop(conn):
+    # Own process group, so killing the worker also takes down the order
+    # search pool it may have started
+    if hasattr(os, "setsid"):
+        os.setsid()
+    warnings.simplefilter("ignore")
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if task is None:
+            return
+        fn, args = task
+        try:
+            conn.send((True, fn(*args)))
+        except Exception as e:
+            # The exception itself may not pickle
+            conn.send((False, f"{type(e).__name__}: {e}"))
+
+
+def _train_arima(
+    data: pd.DataFrame,
+    period: str,
+    interval: str,
+    ticker: Optional[str],
+    config: ModelConfig,
+    budget: float,
+    start_order: Optional[tuple],
+    start_params: Optional[Dict[str, float]],
+) -> Tuple[Optional[TimeSeriesForecaster], Optional[dict]]:
+    forecaster = TimeSeriesForecaster(MarketCalendar(), config)
+    trained = forecaster.train(
+        data,
+        period,
+        interval,
+        ticker=ticker,
+        budget=budget,
+        start_order=start_order,
+        start_params=start_params,
+    )
+    # The fit report goes back too, since the worker's param_store counters
+    # are not the ones /stats/arima-fits reads
+    return (forecaster if trained else None), forecaster.fit_stats
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        # Not a daemon: the order search inside it starts its own pool
+        self.process = context.Process(
+            target=_worker_loop, args=(child_conn,), daemon=False
+        )
+        self.process.start()
+        child_conn.close()
+
+    def kill(self):
+        if hasattr(os, "killpg"):
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                # Not yet in its own group
+                pass
+        self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.kill()
+
+
+class TrainingRunner:
+    """
+    Runs model fits in persistent spawned worker processes that can be
+    killed mid-fit, which a thread or ProcessPoolExecutor task cannot.
+
+    A fit that outlives its deadline (plus KILL_GRACE) or whose caller
+    cancels has its worker killed and replaced, and raises FitTimeout or
+    FitCancelled. Fits are told their deadline, so the ARIMA order search
+    normally stops in time and returns the best order found so far.
+    """
+
+    def __init__(self, max_workers: int = TRAINING_WORKERS):
+        self.max_workers = max_workers
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = set()
+        self._stats = {"fits": 0, "timeouts": 0, "cancelled": 0, "failed": 0}
+
+    def _acquire(self, deadline: float) -> _Worker:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._workers) < self.max_workers:
+                worker = _Worker(self._context)
+                self._workers.add(worker)
+                return worker
+        try:
+            return self._idle.get(timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            raise FitTimeout("No training worker became free before the deadline")
+
+    def _discard(self, worker: _Worker):
+        with self._lock:
+            self._workers.discard(worker)
+        worker.kill()
+
+    def run(
+        self,
+        fn: Callable,
+        *args,
+        deadline: float = FIT_DEADLINE,
+        cancelled: Callable[[], bool] = None,
+    ):
+        """
+        Run fn(*args) in a worker process and return its result.
+
+        Args:
+            deadline: seconds before the worker is killed (after KILL_GRACE)
+            cancelled: polled while waiting; when it returns True the worker
+                is killed
+
+        Raises:
+            FitTimeout, FitCancelled, or RuntimeError if fn raised
+        """
+        kill_at = time.monotonic() + deadline + KILL_GRACE
+        worker = self._acquire(kill_at)
+        try:
+            worker.conn.send((fn, args))
+        except (BrokenPipeError, OSError):
+            # The worker died while idle; use a fresh one
+            self._discard(worker)
+            worker = self._acquire(kill_at)
+            worker.conn.send((fn, args))
+
+        while True:
+            remaining = kill_at - time.monotonic()
+            if remaining <= 0:
+                self._discard(worker)
+                self._count("timeouts")
+                raise FitTimeout(f"Fit did not finish within {deadline:.1f}s")
+            if cancelled is not None and cancelled():
+                self._discard(worker)
+                self._count("cancelled")
+                raise FitCancelled("Fit cancelled by its caller")
+            try:
+                ready = worker.conn.poll(min(CANCEL_POLL, remaining))
+                if ready:
+                    ok, result = worker.conn.recv()
+                    break
+            except (EOFError, OSError):
+                self._discard(worker)
+                self._count("failed")
+                raise RuntimeError("Training worker died")
+
+        self._idle.put(worker)
+        if not ok:
+            self._count("failed")
+            raise RuntimeError(result)
+        self._count("fits")
+        return result
+
+    def train_arima(
+        self,
+        data: pd.DataFrame,
+        period: str,
+        interval: str,
+        ticker: str = None,
+        config: ModelConfig = None,
+        deadline: float = FIT_DEADLINE,
+        cancelled: Callable[[], bool] = None,
+    ) -> Optional[TimeSeriesForecaster]:
+        """
+        Train a TimeSeriesForecaster in a worker, its order search limited
+        to the deadline. Returns None if training was unsuccessful.
+
+        The worker starts from the order and parameters remembered in this
+        process, and the fit it reports, the order it chose and the
+        parameters it estimated are recorded back here.
+        """
+        config = config or ModelConfig()
+        start_order = start_params = None
+        if ticker:
+            start_order = recall_order(
+                ticker, period, interval
+            ) or config.get_default_parameters(period, interval)
+            start_params = param_store.get(ticker, period, interval, start_order)
+
+        forecaster, fit_stats = self.run(
+            _train_arima,
+            data,
+            period,
+            interval,
+            ticker,
+            config,
+            deadline,
+            start_order,
+            start_params,
+            deadline=deadline,
+            cancelled=cancelled,
+        )
+
+        if fit_stats is not None:
+            param_store.record_fit(
+                fit_stats["warm_start"],
+                fit_stats["iterations"],
+                fit_stats["fit_ms"],
+                fit_stats["warm_start_failed"],
+            )
+        if forecaster is not None and ticker:
+            model = forecaster.model_fit.model
+            remember_order(ticker, period, interval, model.order)
+            # The worker has already saved them to Mongo
+            param_store.put(
+                ticker,
+                period,
+                interval,
+                model.order,
+                dict(zip(model.param_names, forecaster.model_fit.params)),
+                persist=False,
+            )
+        return forecaster
+
+    def _count(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "workers": len(self._workers)}
+
+    def shutdown(self):
+        with self._lock:
+            workers, self._workers = list(self._workers), set()
+        for worker in workers:
+            worker.stop()
+
+
+training_runner = TrainingRunner()
+# Run by multiprocessing's exit handler before it joins child processes, in
+# the main process and (unlike atexit) in spawned ones too, so the
+# non-daemon workers never keep their parent from exiting
+multiprocessing.util.Finalize(
+    training_runner, training_runner.shutdown, exitpriority=10
+)
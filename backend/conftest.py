@@ -0,0 +1,8 @@
+# backend/conftest.py
+import os
+
+# Unit tests never need the database; without this, a test that reaches
+# db.py would wait out pymongo's default 30 s server selection timeout
+os.environ.setdefault(
+    "MONGO_URI", "mongodb://localhost:1/?serverSelectionTimeoutMS=200"
+)
@@ -0,0 +1,10 @@
+# backend/db.py
+import os
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+load_dotenv()
+
+# Shared MongoDB connection for the API and the background jobs
+client = MongoClient(os.getenv("MONGO_URI"))
+db = client["stock_dashboard"]
@@ -0,0 +1,3 @@
+from .forecast_service import forecast_router
+
+__all__ = ["forecast_router"]
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from analytics.arima_model import ForecastModelFactory
+
+from .jobs import JOB_TIMEOUT, QueueFull, job_manager
+
+logger = logging.getLogger(__name__)
+forecast_router = APIRouter(prefix="/forecast", tags=["forecast"])
+
+# How often the event stream checks a job, and sends a keep-alive comment
+EVENT_POLL_SECONDS = 0.25
+KEEPALIVE_SECONDS = 15
+
+
+class ForecastJobRequest(BaseModel):
+    ticker: str
+    period: str
+    interval: str
+    max_points: Optional[int] = Field(None, ge=3)
+    model: str = "arima"
+
+
+class ForecastJobResponse(BaseModel):
+    job_id: str
+    status: str
+    ticker: str
+    period: str
+    interval: str
+    max_points: Optional[int] = None
+    model: str
+    cached: bool
+    created_at: str
+    finished_at: Optional[str] = None
+    result: Optional[Dict[str, List[Dict[str, Any]]]] = None
+    error: Optional[str] = None
+
+
+@forecast_router.post("/jobs", response_model=ForecastJobResponse, status_code=202)
+def create_forecast_job(request: ForecastJobRequest):
+    """
+    Queue a forecast and return its job. Identical pending jobs are shared
+    and recent results are returned as already-finished jobs.
+    """
+    if request.model.lower() not in ForecastModelFactory.available_models():
+        raise HTTPException(
+            status_code=400, detail=f"Unsupported model type: {request.model}"
+        )
+    try:
+        job = job_manager.submit(
+            request.ticker,
+            request.period,
+            request.interval,
+            request.max_points,
+            request.model,
+        )
+    except QueueFull as e:
+        raise HTTPException(
+            status_code=429, detail=str(e), headers={"Retry-After": "5"}
+        )
+    return job.to_dict()
+
+
+@forecast_router.get("/jobs/{job_id}", response_model=ForecastJobResponse)
+def get_forecast_job(job_id: str):
+    """Get the status of a forecast job, with its result once it is done"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Forecast job not found")
+    return job.to_dict()
+
+
+@forecast_router.get("/jobs/{job_id}/events")
+async def stream_forecast_job(job_id: str, request: Request):
+    """
+    Server-sent events for a forecast job: a "status" event whenever the
+    status changes and a final "done", "failed" or "timeout" event carrying
+    the full job.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Forecast job not found")
+
+    async def events():
+        last_status = None
+        idle = 0.0
+        # The job times out on its own; this only bounds a stuck stream
+        deadline = JOB_TIMEOUT.total_seconds() + KEEPALIVE_SECONDS
+        elapsed = 0.0
+        while elapsed < deadline:
+            if await request.is_disconnected():
+                return
+            snapshot = job.to_dict()
+            if job.finished:
+                yield f"event: {snapshot['status']}\ndata: {json.dumps(snapshot)}\n\n"
+                return
+            if snapshot["status"] != last_status:
+                last_status = snapshot["status"]
+                idle = 0.0
+                yield f"event: status\ndata: {json.dumps(snapshot)}\n\n"
+            elif idle >= KEEPALIVE_SECONDS:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(EVENT_POLL_SECONDS)
+            idle += EVENT_POLL_SECONDS
+            elapsed += EVENT_POLL_SECONDS
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@forecast_router.get("/stats")
+def forecast_job_stats():
+    """Counters for submitted, deduplicated, cached, rejected and timed-out jobs"""
+    return job_manager.stats()
@@ -0,0 +1,375 @@
+# backend/forecast/jobs.py
+import logging
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from analytics.bar_store import refresh_age
+from analytics.data_fetcher import fetch_stock_data
+from analytics.model_registry import model_registry
+from analytics.training_runner import KILL_GRACE
+
+logger = logging.getLogger(__name__)
+
+FORECAST_WORKERS = 2
+# Queued + running jobs accepted before callers get 429
+MAX_PENDING_JOBS = 16
+JOB_TIMEOUT = pd.Timedelta(seconds=60)
+# Longest ARIMA order search a job may run before keeping the best order
+# found; also capped by what is left of JOB_TIMEOUT
+JOB_FIT_DEADLINE = 30.0
+# Finished jobs stay pollable for this long
+JOB_RETENTION = pd.Timedelta(minutes=10)
+
+JobKey = Tuple[str, str, str, Optional[int], str]
+
+
+def closes_frame(bars: dict) -> pd.DataFrame:
+    """Close prices from one ticker's fetch_stock_data/fetch_batch_stock_data entry"""
+    # Timestamps carry New York offsets, which differ across DST changes
+    index = pd.to_datetime(list(bars["Close"].keys()), utc=True)
+    df = pd.DataFrame(index=index.tz_convert("America/New_York"))
+    df["Close"] = list(bars["Close"].values())
+    return df.dropna()
+
+
+def forecast_history(
+    ticker: str,
+    period: str,
+    interval: str,
+    history: pd.DataFrame,
+    max_points: Optional[int] = None,
+    model: str = "arima",
+    bands: bool = False,
+    simulations: int = 0,
+    deadline: Optional[float] = None,
+    cancel: Optional[threading.Event] = None,
+) -> dict:
+    """
+    Bring the cached model up to date with already-fetched history (or
+    train one) and forecast.
+
+    Args:
+        model: any ForecastModelFactory model type ("arima", "auto", "holt", ...)
+        bands: include the model's confidence bands
+        simulations: simulated paths summarized as fan quantiles (implies bands)
+        deadline, cancel: bound or abandon the model fit (see
+            ModelRegistry.forecast)
+
+    Returns:
+        {ticker: [{"time": ..., "value": ...}, ...]} starting at the last
+        historical point, plus column-wise "bands" when requested and the
+        model provides them
+
+    Raises:
+        ValueError: not enough data, or the model could not be trained
+    """
+    if len(history) < 10:
+        raise ValueError(f"Not enough data points for {ticker}: {len(history)}")
+
+    # Reuse the cached fitted model when possible, otherwise train one
+    result = model_registry.forecast(
+        ticker,
+        period,
+        interval,
+        history,
+        model_type=model,
+        simulations=simulations,
+        deadline=deadline,
+        cancel=cancel,
+    )
+
+    # Note: The to_dict() method returns data with the "forecast" ticker
+    # We need to replace it with the actual ticker
+    forecast_data = result.to_dict(
+        max_points=max_points, bands=bands or simulations > 0
+    )
+    forecast_data[ticker] = forecast_data.pop("forecast")
+    return forecast_data
+
+
+def run_forecast(
+    ticker: str,
+    period: str,
+    interval: str,
+    max_points: Optional[int] = None,
+    model: str = "arima",
+    bands: bool = False,
+    simulations: int = 0,
+    deadline: Optional[float] = None,
+    cancel: Optional[threading.Event] = None,
+) -> dict:
+    """
+    Fetch history and forecast it. Shared by /predict_arima and the
+    forecast job workers.
+    """
+    stock_data = fetch_stock_data(ticker=ticker, period=period, interval=interval)
+    return forecast_history(
+        ticker,
+        period,
+        interval,
+        closes_frame(stock_data[ticker]),
+        max_points,
+        model,
+        bands,
+        simulations,
+        deadline,
+        cancel,
+    )
+
+
+def _init_worker():
+    # Fit in the job worker itself: a training runner per job worker would
+    # nest a third level of processes, and its non-daemon workers would
+    # keep the job worker (and so the API on shutdown) from exiting
+    model_registry.isolate_fits = False
+
+
+def _run_job(fn, expires_at: float, *args) -> dict:
+    """
+    Run fn(*args) in a pool worker with its model fit limited to what is
+    left of the job's JOB_TIMEOUT (expires_at is a time.time() value), so a
+    timed-out job hands its worker back instead of fitting on
+    """
+    remaining = expires_at - time.time() - KILL_GRACE
+    if remaining <= 0:
+        raise TimeoutError("Job expired while queued")
+    return fn(*args, deadline=min(JOB_FIT_DEADLINE, remaining))
+
+
+class QueueFull(Exception):
+    """Raised when MAX_PENDING_JOBS jobs are already queued or running"""
+
+
+class ForecastJob:
+    def __init__(self, key: JobKey):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = "queued"
+        self.created_at = pd.Timestamp.now(tz="UTC")
+        self.finished_at: Optional[pd.Timestamp] = None
+        self.cached = False
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.future: Optional[Future] = None
+        # Resolves to the job itself once it is done, failed or timed out
+        self.done: Future = Future()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "timeout")
+
+    def to_dict(self) -> dict:
+        ticker, period, interval, max_points, model = self.key
+        status = self.status
+        if status == "queued" and self.future is not None and self.future.running():
+            status = "running"
+        return {
+            "job_id": self.id,
+            "status": status,
+            "ticker": ticker,
+            "period": period,
+            "interval": interval,
+            "max_points": max_points,
+            "model": model,
+            "cached": self.cached,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class ForecastJobManager:
+    """
+    Runs forecasts in a separate process pool so ARIMA fits never occupy
+    the API's request threads.
+
+    - identical pending jobs (same ticker, period, interval, max_points,
+      model) share one job
+    - results are cached per key for one bar length (bar_store.refresh_age)
+    - at most MAX_PENDING_JOBS jobs are queued or running; submit() and
+      submit_history() raise QueueFull beyond that
+    - jobs not finished within JOB_TIMEOUT are reported as timed out and a
+      queued job is cancelled. A running job cannot be interrupted from
+      here, but its ARIMA order search is limited to the rest of
+      JOB_TIMEOUT (at most JOB_FIT_DEADLINE) and keeps the best order
+      found by then, so its pool worker is freed shortly after the
+      timeout; its result is then discarded.
+    """
+
+    def __init__(self, max_workers: int = FORECAST_WORKERS):
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, ForecastJob] = {}
+        self._pending: Dict[JobKey, ForecastJob] = {}
+        self._results: Dict[JobKey, Tuple[dict, pd.Timestamp]] = {}
+        self._stats = {
+            "submitted": 0,
+            "deduplicated": 0,
+            "cache_hits": 0,
+            "rejected": 0,
+            "timeouts": 0,
+        }
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # Called with self._lock held
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return self._pool
+
+    def submit(
+        self,
+        ticker: str,
+        period: str,
+        interval: str,
+        max_points: Optional[int] = None,
+        model: str = "arima",
+    ) -> ForecastJob:
+        """Return a job for the forecast, reusing a pending or cached one"""
+        key = (ticker.upper(), period, interval, max_points, model.lower())
+        return self._submit(key, run_forecast, *key)
+
+    def submit_history(
+        self,
+        ticker: str,
+        period: str,
+        interval: str,
+        history: pd.DataFrame,
+        max_points: Optional[int] = None,
+        model: str = "arima",
+    ) -> ForecastJob:
+        """
+        Job forecasting already-fetched history (batch endpoints). Admitted,
+        deduplicated and cached exactly like submit(), so it raises
+        QueueFull too.
+        """
+        key = (ticker.upper(), period, interval, max_points, model.lower())
+        return self._submit(
+            key, forecast_history, key[0], period, interval, history, max_points, key[4]
+        )
+
+    def is_full(self) -> bool:
+        with self._lock:
+            return len(self._pending) >= MAX_PENDING_JOBS
+
+    def _submit(self, key: JobKey, fn, *args) -> ForecastJob:
+        now = pd.Timestamp.now(tz="UTC")
+
+        with self._lock:
+            self._prune(now)
+            self._stats["submitted"] += 1
+
+            pending = self._pending.get(key)
+            if pending is not None:
+                self._stats["deduplicated"] += 1
+                return pending
+
+            cached = self._results.get(key)
+            if cached is not None and now < cached[1]:
+                self._stats["cache_hits"] += 1
+                job = ForecastJob(key)
+                job.status, job.cached, job.result = "done", True, cached[0]
+                job.finished_at = now
+                job.done.set_result(job)
+                self._jobs[job.id] = job
+                return job
+
+            if len(self._pending) >= MAX_PENDING_JOBS:
+                self._stats["rejected"] += 1
+                raise QueueFull(f"{len(self._pending)} forecast jobs already pending")
+
+            job = ForecastJob(key)
+            expires_at = time.time() + JOB_TIMEOUT.total_seconds()
+            try:
+                job.future = self._get_pool().submit(_run_job, fn, expires_at, *args)
+            except BrokenProcessPool:
+                # A worker died; start a fresh pool for this and later jobs
+                logger.warning("Forecast worker pool broke, recreating it")
+                self._pool = None
+                job.future = self._get_pool().submit(_run_job, fn, expires_at, *args)
+
+            self._jobs[job.id] = job
+            self._pending[key] = job
+
+        job.future.add_done_callback(lambda future: self._finish(job, future))
+        timer = threading.Timer(JOB_TIMEOUT.total_seconds(), self._expire, (job,))
+        timer.daemon = True
+        timer.start()
+        return job
+
+    def get(self, job_id: str) -> Optional[ForecastJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _finish(self, job: ForecastJob, future: Future):
+        with self._lock:
+            if job.finished:
+                return
+            if future.cancelled():
+                job.status, job.error = "failed", "Job was cancelled"
+            elif future.exception() is not None:
+                job.status, job.error = "failed", str(future.exception())
+            else:
+                job.status, job.result = "done", future.result()
+                _, _, interval, _, _ = job.key
+                self._results[job.key] = (
+                    job.result,
+                    pd.Timestamp.now(tz="UTC") + refresh_age(interval),
+                )
+            job.finished_at = pd.Timestamp.now(tz="UTC")
+            self._pending.pop(job.key, None)
+        job.done.set_result(job)
+
+    def _expire(self, job: ForecastJob):
+        with self._lock:
+            if job.finished:
+                return
+            job.status = "timeout"
+            job.error = (
+                f"Forecast did not finish within {JOB_TIMEOUT.total_seconds():.0f}s"
+            )
+            job.finished_at = pd.Timestamp.now(tz="UTC")
+            self._pending.pop(job.key, None)
+            self._stats["timeouts"] += 1
+        job.done.set_result(job)
+
+        # Queued jobs are dropped; a running one finishes within its fit
+        # deadline and its result is discarded when it arrives
+        job.future.cancel()
+
+    def _prune(self, now: pd.Timestamp):
+        # Called with self._lock held
+        for job_id in [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished and now - job.finished_at > JOB_RETENTION
+        ]:
+            del self._jobs[job_id]
+        for key in [
+            key for key, (_, expires) in self._results.items() if now >= expires
+        ]:
+            del self._results[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "pending": len(self._pending),
+                "jobs": len(self._jobs),
+                "cached_results": len(self._results),
+            }
+
+
+job_manager = ForecastJobManager()
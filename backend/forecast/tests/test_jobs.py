@@ -0,0 +1,144 @@
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from analytics.model_registry import model_registry
+from forecast import jobs
+from forecast.jobs import ForecastJobManager, QueueFull
+
+HISTORY = pd.DataFrame(
+    {"Close": range(30)},
+    index=pd.bdate_range("2024-01-02", periods=30, tz="America/New_York"),
+)
+
+
+class FakeForecast:
+    """Replaces forecast_history; blocks until released"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+
+    def __call__(self, ticker, period, interval, history, max_points, model, deadline):
+        self.calls.append((ticker, deadline))
+        if not self.release.wait(timeout=5):
+            raise RuntimeError("never released")
+        if ticker == "FAIL":
+            raise ValueError("Not enough data points for FAIL")
+        return {ticker: [{"time": "2024-02-12", "value": 1.0}]}
+
+
+@pytest.fixture
+def forecast(monkeypatch):
+    fake = FakeForecast()
+    monkeypatch.setattr(jobs, "forecast_history", fake)
+    yield fake
+    fake.release.set()
+
+
+@pytest.fixture
+def manager():
+    manager = ForecastJobManager()
+    # Threads instead of spawned processes, so the fake can be patched in
+    manager._pool = ThreadPoolExecutor(max_workers=2)
+    yield manager
+    manager._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def test_identical_jobs_are_shared_and_results_cached(manager, forecast):
+    first = manager.submit_history("aapl", "1y", "1d", HISTORY)
+    second = manager.submit_history("AAPL", "1y", "1d", HISTORY)
+    assert second is first
+
+    forecast.release.set()
+    assert first.done.result(timeout=5).status == "done"
+
+    cached = manager.submit_history("AAPL", "1y", "1d", HISTORY)
+    assert cached is not first and cached.cached
+    assert cached.result == first.result
+    assert len(forecast.calls) == 1
+    stats = manager.stats()
+    assert stats["deduplicated"] == 1 and stats["cache_hits"] == 1
+
+
+def test_fit_deadline_is_capped(manager, forecast):
+    forecast.release.set()
+    manager.submit_history("AAPL", "1y", "1d", HISTORY).done.result(timeout=5)
+    _, deadline = forecast.calls[0]
+    assert 0 < deadline <= jobs.JOB_FIT_DEADLINE
+
+
+def test_failed_job_reports_the_error(manager, forecast):
+    forecast.release.set()
+    job = manager.submit_history("FAIL", "1y", "1d", HISTORY).done.result(timeout=5)
+    assert job.status == "failed" and "Not enough data" in job.error
+    # Failures are not cached
+    assert manager.submit_history("FAIL", "1y", "1d", HISTORY) is not job
+
+
+def test_queue_is_bounded(manager, forecast, monkeypatch):
+    monkeypatch.setattr(jobs, "MAX_PENDING_JOBS", 2)
+    manager.submit_history("A", "1y", "1d", HISTORY)
+    manager.submit_history("B", "1y", "1d", HISTORY)
+    assert manager.is_full()
+
+    with pytest.raises(QueueFull):
+        manager.submit_history("C", "1y", "1d", HISTORY)
+    # A duplicate of a pending job is still accepted
+    manager.submit_history("A", "1y", "1d", HISTORY)
+    assert manager.stats()["rejected"] == 1
+
+
+def test_jobs_time_out(manager, forecast, monkeypatch):
+    monkeypatch.setattr(
+        jobs, "JOB_TIMEOUT", pd.Timedelta(seconds=jobs.KILL_GRACE + 0.3)
+    )
+    job = manager.submit_history("AAPL", "1y", "1d", HISTORY)
+
+    assert job.done.result(timeout=5).status == "timeout"
+    assert not manager.is_full() and manager.stats()["timeouts"] == 1
+
+
+def test_expired_jobs_do_not_start():
+    with pytest.raises(TimeoutError):
+        jobs._run_job(FakeForecast(), time.time())
+
+
+def test_job_workers_fit_in_process(monkeypatch):
+    monkeypatch.setattr(model_registry, "isolate_fits", True)
+    jobs._init_worker()
+    assert not model_registry.isolate_fits
+
+
+def test_process_pool_job_and_clean_exit():
+    # A real spawned pool: the job must finish and the interpreter exit
+    # without waiting on processes the worker started
+    script = textwrap.dedent(
+        """
+        import numpy as np, pandas as pd
+        from forecast.jobs import job_manager
+
+        if __name__ == "__main__":
+            index = pd.bdate_range("2024-01-02", periods=200, tz="America/New_York")
+            rng = np.random.default_rng(0)
+            history = pd.DataFrame({"Close": 100 + np.cumsum(rng.normal(size=200))}, index=index)
+            job = job_manager.submit_history("TEST", "1y", "1d", history)
+            print(job.done.result(timeout=60).status)
+        """
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=Path(__file__).resolve().parents[2],
+        capture_output=True,
+        text=True,
+        timeout=90,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "done"
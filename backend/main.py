@@ -1,30 +1,56 @@
 from fastapi import FastAPI, Query, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from fastapi import Request
 from pydantic import BaseModel, EmailStr
-from pymongo import MongoClient
 from bson import ObjectId
 from dotenv import load_dotenv
-from typing import Optional
+from typing import Literal, Optional
 from passlib.context import CryptContext
 import os
 import time
+import asyncio
+import json
+import threading
 from email.message import EmailMessage
 import secrets
 import smtplib
 import ssl
-from analytics.data_fetcher import fetch_stock_data, get_market_status
+from analytics.data_fetcher import (
+    fetch_batch_stock_data,
+    fetch_stock_columnar,
+    fetch_stock_data,
+    get_coalescing_stats,
+    get_market_status,
+    get_ticker_info,
+    quote_cache,
+)
 import logging
-from analytics.arima_model import ForecastModelFactory, MarketCalendar, ModelConfig
-import pandas as pd
+from analytics.encoding import negotiate_format
+from analytics.arima_model import MAX_SIMULATIONS, ForecastModelFactory
+from analytics.model_registry import model_registry
+from analytics.param_store import param_store
+from analytics.training_runner import FIT_DEADLINE, FitCancelled, training_runner
 from options import options_router
 from news import news_router
-import yfinance as yf
+from news.article_cache import article_cache
+from news.robots import robots_cache
+from news.sentiment import sentiment_scorer
+from forecast import forecast_router
+from forecast.jobs import (
+    FORECAST_WORKERS,
+    JOB_TIMEOUT,
+    QueueFull,
+    closes_frame,
+    job_manager,
+    run_forecast,
+)
 from datetime import datetime, timezone
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from snaptrade_client import SnapTrade
 from bson.errors import InvalidId
+from db import db  # MongoDB connection
 
 logging.basicConfig(
     level=logging.INFO,
@@ -57,9 +83,7 @@ app.add_middleware(
 
 app.include_router(options_router)
 app.include_router(news_router)
-# MongoDB connection
-client = MongoClient(os.getenv("MONGO_URI"))
-db = client["stock_dashboard"]
+app.include_router(forecast_router)
 
 # Create a password hashing context (using bcrypt)
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -470,27 +494,99 @@ async def submit_survey(request: SurveySubmission):
 
 
 @app.get("/data")
-def fetch_financial_data(ticker: str, period: str = "1y", interval: str = "1d"):
+def fetch_financial_data(
+    request: Request,
+    ticker: str,
+    period: str = "1y",
+    interval: str = "1d",
+    fmt: Optional[str] = Query(None, alias="format"),
+    max_points: Optional[int] = Query(None, ge=3),
+    downsample: Literal["ohlc", "lttb"] = "ohlc",
+):
     """
     returns stock data for ticker
 
     ticker: str\n
     period: str = "1y"\n
     interval: str = "1d"\n
+    format: str = None ("json", "columnar", "msgpack" or "arrow"; otherwise taken from the Accept header)\n
+    max_points: int = None (bound the number of bars returned)\n
+    downsample: str = "ohlc" ("ohlc" merges bars into candles, "lttb" keeps the Close line shape)\n
 
-    returns: dict
+    returns: dict, or a columnar payload with one epoch-ms time array plus one array per field
     """
     try:
+        response_format = negotiate_format(fmt, request.headers.get("accept"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        if response_format != "json":
+            content, media_type = fetch_stock_columnar(
+                ticker=ticker,
+                period=period,
+                interval=interval,
+                fmt=response_format,
+                max_points=max_points,
+                downsample=downsample,
+            )
+            return Response(content=content, media_type=media_type)
+
         stock_data = fetch_stock_data(
             ticker=ticker,
             period=period,
             interval=interval,
+            max_points=max_points,
+            downsample=downsample,
         )
         return stock_data
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {e}")
 
 
+MAX_BATCH_TICKERS = 50
+
+
+@app.get("/data/batch")
+def fetch_batch_financial_data(
+    tickers: str,
+    period: str = "1y",
+    interval: str = "1d",
+    sparkline: bool = False,
+    points: int = Query(60, ge=2, le=1000),
+):
+    """
+    returns stock data for many tickers using one upstream download for cache misses
+
+    tickers: str (comma separated, e.g. "AAPL,MSFT")\n
+    period: str = "1y"\n
+    interval: str = "1d"\n
+    sparkline: bool = False (close prices only, downsampled to `points`)\n
+    points: int = 60\n
+
+    returns: dict keyed by ticker
+    """
+    ticker_list = [t.strip() for t in tickers.split(",") if t.strip()]
+    if not ticker_list:
+        raise HTTPException(status_code=400, detail="No tickers provided")
+    if len(ticker_list) > MAX_BATCH_TICKERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_TICKERS} tickers per batch request",
+        )
+
+    try:
+        return fetch_batch_stock_data(
+            tickers=ticker_list,
+            period=period,
+            interval=interval,
+            sparkline=sparkline,
+            points=points,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {e}")
+
+
 class QuoteRequest(BaseModel):
     ticker: str
 
@@ -501,8 +597,7 @@ def get_quote(request: QuoteRequest):
     returns quote data for asset
     """
     try:
-        stock = yf.Ticker(request.ticker)
-        info = stock.info
+        info = get_ticker_info(request.ticker)
 
         def format_date(epoch):
             return (
@@ -570,8 +665,7 @@ def get_about(request: QuoteRequest):
     returns description for asset
     """
     try:
-        stock = yf.Ticker(request.ticker)
-        info = stock.info
+        info = get_ticker_info(request.ticker, profile_only=True)
 
         def format_date(epoch):
             return (
@@ -617,11 +711,79 @@ def get_about(request: QuoteRequest):
 @app.get("/is_market_open")
 def is_market_open():
     """
-    Checks if the market is currently open via yfinance
+    Checks if the market is currently open, with the next open/close so
+    clients can schedule their next check
     """
     return get_market_status()
 
 
+@app.get("/stats/coalescing")
+def coalescing_stats():
+    """
+    Returns hit counters for the coalesced upstream market-data calls
+    """
+    return get_coalescing_stats()
+
+
+@app.get("/stats/quote-cache")
+def quote_cache_stats():
+    """
+    Returns hit/miss counters for the quote and fundamentals cache
+    """
+    return quote_cache.stats()
+
+
+@app.get("/stats/model-registry")
+def model_registry_stats():
+    """
+    Returns update/refit counters and memory use of the fitted-model cache
+    """
+    return model_registry.stats()
+
+
+@app.get("/stats/training")
+def training_stats():
+    """
+    Returns completed, timed-out, cancelled and failed fits of the killable
+    training workers
+    """
+    return training_runner.stats()
+
+
+@app.get("/stats/scraping")
+def scraping_stats():
+    """
+    Returns robots.txt cache counters and the domains currently skipped for
+    refusing to serve us
+    """
+    return robots_cache.stats()
+
+
+@app.get("/stats/article-cache")
+def article_cache_stats():
+    """
+    Returns hit/miss counters and memory use of the scraped-article cache
+    """
+    return article_cache.stats()
+
+
+@app.get("/stats/sentiment")
+def sentiment_stats():
+    """
+    Returns the sentiment backend with its memo hits and scoring throughput
+    """
+    return sentiment_scorer.stats()
+
+
+@app.get("/stats/arima-fits")
+def arima_fit_stats():
+    """
+    Returns warm- vs cold-started ARIMA fit counts with their mean optimizer
+    iterations and fit time
+    """
+    return param_store.stats()
+
+
 # ================================================================================================================================
 # === /predict endpoints ========================================================================================================
 # ================================================================================================================================
@@ -632,58 +794,166 @@ class ARIMATrainResponse(BaseModel, arbitrary_types_allowed=True):
     stock_data: dict
 
 
-@app.post("/predict_arima")
-def predict_arima(ticker: str, period: str, interval: str) -> dict:
-    """Predict future stock prices using the trained ARIMA model"""
+# How often a waiting forecast checks whether its client is still connected
+DISCONNECT_POLL_SECONDS = 0.25
 
-    try:
-        # Create forecaster components
-        market_calendar = MarketCalendar()
-        config = ModelConfig()
 
-        # Get forecaster via factory
-        forecaster = ForecastModelFactory.create_model(
-            "arima", market_calendar=market_calendar, config=config
-        )
+@app.post("/predict_arima")
+async def predict_arima(
+    request: Request,
+    ticker: str,
+    period: str,
+    interval: str,
+    max_points: Optional[int] = Query(None, ge=3),
+    model: str = "arima",
+    bands: bool = False,
+    simulations: int = Query(0, ge=0, le=MAX_SIMULATIONS),
+) -> dict:
+    """
+    Predict future stock prices. `model` picks the forecaster: "arima"
+    (default), a light model ("holt", "theta", "drift", ...) or "auto"
+    to choose one per series.
 
-        # Fetch stock data
-        stock_data = fetch_stock_data(
-            ticker=ticker,
-            period=period,
-            interval=interval,
-        )
+    With bands=true, ARIMA forecasts also return 80/95% confidence bands
+    column-wise under "bands"; simulations=N adds fan-chart quantiles
+    (p5...p95) of N simulated paths to them.
 
-        # Transform data to DataFrame
-        df = pd.DataFrame(
-            index=pd.to_datetime(list(stock_data[ticker]["Close"].keys()))
+    A model fit that takes longer than FIT_DEADLINE is killed and a light
+    fallback model is served instead; if the client disconnects, its fit is
+    cancelled.
+    """
+    cancel = threading.Event()
+    work = asyncio.ensure_future(
+        run_in_threadpool(
+            run_forecast,
+            ticker,
+            period,
+            interval,
+            max_points,
+            model,
+            bands,
+            simulations,
+            FIT_DEADLINE,
+            cancel,
         )
-        df["Close"] = list(stock_data[ticker]["Close"].values())
-        df = df.dropna()
+    )
 
-        if len(df) < 10:
-            raise ValueError(f"Not enough data points for {ticker}: {len(df)}")
+    try:
+        while not work.done():
+            await asyncio.wait({work}, timeout=DISCONNECT_POLL_SECONDS)
+            if not work.done() and await request.is_disconnected():
+                logger.info(f"Client disconnected, cancelling forecast for {ticker}")
+                cancel.set()
+                break
+        return await work
+
+    except FitCancelled:
+        # Nobody is listening any more; the status is for the access log
+        raise HTTPException(status_code=499, detail="Client disconnected")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal Server Error {e}")
 
-        # Train model
-        success = forecaster.train(df, period, interval)
 
-        if not success:
-            raise ValueError("Failed to train model")
+# Jobs of one batch request queued or running at once
+BATCH_JOBS_IN_FLIGHT = FORECAST_WORKERS
+# How often a batch ticker retries a full forecast queue
+QUEUE_POLL_SECONDS = 0.25
 
-        # Generate forecast
-        result = forecaster.forecast()
 
-        # Note: The to_dict() method returns data with the "forecast" ticker
-        # We need to replace it with the actual ticker
-        forecast_data = result.to_dict()
-        forecast_data[ticker] = forecast_data.pop("forecast")
+@app.post("/predict/batch")
+async def predict_batch(
+    ID: str,
+    period: str,
+    interval: str,
+    max_points: Optional[int] = Query(None, ge=3),
+    model: str = "arima",
+):
+    """
+    Forecast every ticker in the user's watchlist with the given model.
+
+    History for all tickers comes from one batch fetch (bar store reads plus
+    at most one multi-ticker download); models are fitted as forecast jobs,
+    sharing the job queue's admission limit, deduplication, result cache and
+    fit deadline. At most BATCH_JOBS_IN_FLIGHT of a batch's jobs are queued
+    at once, so a batch does not crowd out interactive jobs; a ticker that
+    finds the queue full waits for a slot (up to JOB_TIMEOUT). Returns 429
+    if the queue is already full. The response is NDJSON with one line per
+    ticker, written as soon as its forecast completes:
+    {"ticker": ..., "forecast": [...]} or {"ticker": ..., "error": ...}
+    """
+    if model.lower() not in ForecastModelFactory.available_models():
+        raise HTTPException(status_code=400, detail=f"Unsupported model type: {model}")
+    try:
+        watchlist = watchlists.find_one({"_id": ObjectId(ID)})
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid user ID")
 
-        return forecast_data
+    tickers = [
+        item["Ticker"].upper()
+        for item in (watchlist or {}).get("Tickers", [])
+        if item.get("Ticker")
+    ]
+    tickers = list(dict.fromkeys(tickers))[:MAX_BATCH_TICKERS]
+    if not tickers:
+        raise HTTPException(status_code=404, detail="Watchlist is empty")
+    if job_manager.is_full():
+        raise HTTPException(
+            status_code=429,
+            detail="Forecast queue is full",
+            headers={"Retry-After": "5"},
+        )
 
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        histories = await run_in_threadpool(
+            fetch_batch_stock_data, tickers, period, interval
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal Server Error {e}")
 
+    in_flight = asyncio.Semaphore(BATCH_JOBS_IN_FLIGHT)
+
+    async def forecast_one(ticker: str) -> dict:
+        async with in_flight:
+            waited = 0.0
+            while True:
+                try:
+                    job = job_manager.submit_history(
+                        ticker,
+                        period,
+                        interval,
+                        closes_frame(histories[ticker]),
+                        max_points,
+                        model,
+                    )
+                    break
+                except QueueFull:
+                    if waited >= JOB_TIMEOUT.total_seconds():
+                        return {"ticker": ticker, "error": "Forecast queue is full"}
+                    await asyncio.sleep(QUEUE_POLL_SECONDS)
+                    waited += QUEUE_POLL_SECONDS
+            job = await asyncio.wrap_future(job.done)
+
+        if job.status != "done":
+            return {"ticker": ticker, "error": job.error}
+        return {"ticker": ticker, "forecast": job.result[ticker]}
+
+    async def forecast_lines():
+        fits = []
+        for ticker in tickers:
+            if ticker not in histories:
+                yield (
+                    json.dumps({"ticker": ticker, "error": "No data available"}) + "\n"
+                )
+                continue
+            fits.append(forecast_one(ticker))
+
+        for done in asyncio.as_completed(fits):
+            yield json.dumps(await done) + "\n"
+
+    return StreamingResponse(forecast_lines(), media_type="application/x-ndjson")
+
 
 # --------------------------
 # Forgot Password Functionality
@@ -808,13 +1078,12 @@ async def reset_user_password(request_data: ResetPasswordRequest):
     return {"message": "Password has been reset successfully."}
 
 
-
-
 snaptrade = SnapTrade(
     consumer_key=os.getenv("SNAPTRADE_CONSUMER_KEY"),
     client_id=os.getenv("SNAPTRADE_CLIENT_ID"),
 )
 
+
 @app.get("/snaptrade/link-account")
 def get_link_url(user_id: str):
     try:
@@ -835,17 +1104,15 @@ def get_link_url(user_id: str):
             user_id=user_id,
             user_secret=user_secret,
             custom_redirect="http://localhost:3000/dashboard?from=snaptrade",
-            connection_portal_version="v4"
+            connection_portal_version="v4",
         )
 
-
         return {"url": login_response.body}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-
 @app.get("/snaptrade/holdings")
 def get_holdings(user_id: str):
     if not user_id:
@@ -874,10 +1141,10 @@ def get_holdings(user_id: str):
 def store_user_secret(user_id: str, user_secret: str):
     """Store SnapTrade userSecret in MongoDB users collection."""
     users.update_one(
-        {"_id": ObjectId(user_id)},
-        {"$set": {"snaptrade_user_secret": user_secret}}
+        {"_id": ObjectId(user_id)}, {"$set": {"snaptrade_user_secret": user_secret}}
     )
 
+
 def retrieve_user_secret_from_db(user_id: str) -> str:
     """Retrieve SnapTrade userSecret from MongoDB."""
     user = users.find_one({"_id": ObjectId(user_id)})
@@ -885,6 +1152,7 @@ def retrieve_user_secret_from_db(user_id: str) -> str:
         raise Exception("SnapTrade user secret not found.")
     return user["snaptrade_user_secret"]
 
+
 @app.get("/snaptrade/delete-user")
 def delete_snaptrade_user(user_id: str):
     try:
@@ -893,24 +1161,25 @@ def delete_snaptrade_user(user_id: str):
         )
 
         users.update_one(
-            {"_id": ObjectId(user_id)},
-            {"$unset": {"snaptrade_user_secret": ""}}
+            {"_id": ObjectId(user_id)}, {"$unset": {"snaptrade_user_secret": ""}}
         )
 
         return {
             "message": f"SnapTrade user {user_id} deleted successfully.",
-            "snaptrade_response": deleted_response.body
+            "snaptrade_response": deleted_response.body,
         }
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
 @app.get("/snaptrade/has-user-secret", response_model=bool)
 def has_user_secret(user_id: str) -> bool:
     """Return True if user has SnapTrade secret stored."""
     user = users.find_one({"_id": ObjectId(user_id)})
     return "snaptrade_user_secret" in user
 
+
 if __name__ == "__main__":
     import uvicorn
 
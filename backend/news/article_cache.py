@@ -0,0 +1,267 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import pandas as pd
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import PyMongoError
+
+from db import db
+
+logger = logging.getLogger(__name__)
+
+# In-process LRU in front of the shared Mongo collection
+ARTICLE_CACHE_ENTRIES = 512
+ARTICLE_CACHE_BYTES = 32 * 1024 * 1024
+# Longer extracted texts are cut before caching
+MAX_CACHED_CONTENT = 20000
+# Stored articles not read for this long are dropped by a Mongo TTL index
+ARTICLE_TTL = pd.Timedelta(days=30)
+# Beyond this many stored articles the least recently read are deleted,
+# checked every TRIM_EVERY stored articles. The TTL alone does not bound
+# the collection: every headline seen within ARTICLE_TTL is kept.
+MAX_STORED_ARTICLES = 20000
+TRIM_EVERY = 200
+# Reads refresh the stored access time at most this often
+TOUCH_INTERVAL = pd.Timedelta(days=1)
+# Articles that yielded no content are retried after this many seconds
+# (kept in memory only)
+FAILURE_TTL = 30 * 60
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = ("utm_", "guccounter", "guce_", "fbclid", "gclid", "ncid", ".tsrc")
+
+
+class CachedArticle(NamedTuple):
+    scrappable: bool
+    content: Optional[str]
+    sentiment: Optional[float]
+
+
+def canonical_url(url: str) -> str:
+    """
+    Normalize an article URL so links to the same article share one cache
+    entry: lowercase scheme and host, no fragment, no tracking parameters,
+    sorted query, no trailing slash.
+    """
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not name.lower().startswith(TRACKING_PARAMS)
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), "")
+    )
+
+
+def _as_utc(value) -> pd.Timestamp:
+    # pymongo returns naive UTC datetimes unless the client is tz-aware
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def _size(article: CachedArticle) -> int:
+    return len(article.content or "") + 64
+
+
+class ArticleCache:
+    """
+    Extracted article text and its sentiment keyed by canonical URL.
+
+    Published articles practically never change, so entries do not expire
+    on a schedule; they leave the in-process LRU when it exceeds its entry
+    or byte budget and leave the shared "article_cache" collection once
+    nobody has read them for ARTICLE_TTL, or when it holds more than
+    max_stored articles (least recently read first; access times are only
+    refreshed every TOUCH_INTERVAL, so that order is to within a day).
+    Articles that gave no content are only remembered in memory, for
+    FAILURE_TTL.
+
+    Methods block on Mongo; call them from a thread in async code.
+    """
+
+    def __init__(
+        self,
+        database=db,
+        max_entries: int = ARTICLE_CACHE_ENTRIES,
+        max_bytes: int = ARTICLE_CACHE_BYTES,
+        max_stored: int = MAX_STORED_ARTICLES,
+    ):
+        self.collection = database["article_cache"]
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_stored = max_stored
+        # url -> (article, expiry on the monotonic clock or None)
+        self._entries: "OrderedDict[str, Tuple[CachedArticle, Optional[float]]]" = (
+            OrderedDict()
+        )
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._indexes_ready = False
+        # Stored since the last trim; starts full so the first write trims
+        self._unchecked = TRIM_EVERY
+        self._stats = {
+            "memory_hits": 0,
+            "mongo_hits": 0,
+            "misses": 0,
+            "stored": 0,
+            "trimmed": 0,
+        }
+
+    def _ensure_indexes(self):
+        if self._indexes_ready:
+            return
+        self.collection.create_index(
+            [("accessed_at", ASCENDING)],
+            expireAfterSeconds=int(ARTICLE_TTL.total_seconds()),
+        )
+        self._indexes_ready = True
+
+    def get_many(self, urls: Iterable[str]) -> Dict[str, CachedArticle]:
+        """Cached articles for the URLs that have one, keyed by the given URL"""
+        by_key = {canonical_url(url): url for url in urls}
+        found: Dict[str, CachedArticle] = {}
+        now = time.monotonic()
+
+        with self._lock:
+            for key, url in by_key.items():
+                cached = self._entries.get(key)
+                if cached is None:
+                    continue
+                article, expires = cached
+                if expires is not None and now >= expires:
+                    self._drop(key)
+                    continue
+                self._entries.move_to_end(key)
+                found[url] = article
+            self._stats["memory_hits"] += len(found)
+
+        missing = [key for key, url in by_key.items() if url not in found]
+        if missing:
+            found.update(self._read(missing, by_key))
+        with self._lock:
+            self._stats["misses"] += len(by_key) - len(found)
+        return found
+
+    def _read(self, keys, by_key: Dict[str, str]) -> Dict[str, CachedArticle]:
+        try:
+            docs = list(self.collection.find({"_id": {"$in": keys}}))
+        except PyMongoError as e:
+            logger.warning(f"Article cache unavailable: {e}")
+            return {}
+
+        found = {}
+        stale = []
+        touch_before = pd.Timestamp.now(tz="UTC") - TOUCH_INTERVAL
+        for doc in docs:
+            article = CachedArticle(True, doc.get("content"), doc.get("sentiment"))
+            found[by_key[doc["_id"]]] = article
+            self._remember(doc["_id"], article, None)
+            accessed = doc.get("accessed_at")
+            if accessed is None or _as_utc(accessed) < touch_before:
+                stale.append(doc["_id"])
+
+        if stale:
+            # Keeps frequently read articles clear of the TTL index
+            try:
+                self.collection.update_many(
+                    {"_id": {"$in": stale}},
+                    {
+                        "$set": {
+                            "accessed_at": pd.Timestamp.now(tz="UTC").to_pydatetime()
+                        }
+                    },
+                )
+            except PyMongoError as e:
+                logger.warning(f"Could not refresh article cache access times: {e}")
+        with self._lock:
+            self._stats["mongo_hits"] += len(found)
+        return found
+
+    def put_many(self, articles: Dict[str, CachedArticle]):
+        """Cache scraped articles; ones without content stay in memory briefly"""
+        now = pd.Timestamp.now(tz="UTC").to_pydatetime()
+        operations = []
+        for url, article in articles.items():
+            key = canonical_url(url)
+            if not article.content:
+                self._remember(key, article, time.monotonic() + FAILURE_TTL)
+                continue
+            article = article._replace(content=article.content[:MAX_CACHED_CONTENT])
+            self._remember(key, article, None)
+            operations.append(
+                UpdateOne(
+                    {"_id": key},
+                    {
+                        "$set": {
+                            "content": article.content,
+                            "sentiment": article.sentiment,
+                            "cached_at": now,
+                            "accessed_at": now,
+                        }
+                    },
+                    upsert=True,
+                )
+            )
+
+        if not operations:
+            return
+        try:
+            self._ensure_indexes()
+            self.collection.bulk_write(operations, ordered=False)
+            with self._lock:
+                self._stats["stored"] += len(operations)
+                self._unchecked += len(operations)
+                trim = self._unchecked >= TRIM_EVERY
+                if trim:
+                    self._unchecked = 0
+            if trim:
+                self._trim()
+        except PyMongoError as e:
+            logger.warning(f"Could not store articles in the cache: {e}")
+
+    def _trim(self):
+        """Delete the least recently read articles beyond max_stored"""
+        excess = self.collection.estimated_document_count() - self.max_stored
+        if excess <= 0:
+            return
+        oldest = [
+            doc["_id"]
+            for doc in self.collection.find({}, {"_id": 1})
+            .sort("accessed_at", ASCENDING)
+            .limit(excess)
+        ]
+        deleted = self.collection.delete_many({"_id": {"$in": oldest}}).deleted_count
+        logger.info(f"Trimmed {deleted} least recently read articles from the cache")
+        with self._lock:
+            self._stats["trimmed"] += deleted
+
+    def _remember(self, key: str, article: CachedArticle, expires: Optional[float]):
+        size = _size(article)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (article, expires)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+
+    def _drop(self, key: str):
+        # Called with self._lock held
+        cached = self._entries.pop(key, None)
+        if cached is not None:
+            self._bytes -= _size(cached[0])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "bytes": self._bytes}
+
+
+article_cache = ArticleCache()
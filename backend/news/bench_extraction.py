@@ -0,0 +1,126 @@
+"""
+Benchmark article text extraction over a corpus of saved HTML pages.
+
+    python -m news.bench_extraction corpus/ --fetch https://example.com/story ...
+
+Every *.html file in the corpus directory is extracted with the current
+lxml extractor and with the previous BeautifulSoup implementation, and
+pages/s, MB/s and mean characters extracted are printed for both. --fetch
+downloads the given URLs into the corpus first (capped at MAX_HTML_BYTES,
+like the scraper).
+"""
+
+import argparse
+import asyncio
+import hashlib
+import re
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import aiohttp
+
+from .extraction import MAX_CONTENT_CHARS, extract_main_text, read_capped
+from .scraper import HEADERS, PAGE_TIMEOUT
+
+LEGACY_SELECTORS = [
+    "article",
+    ".article-content",
+    ".content",
+    "main",
+    "#content",
+    ".article-body",
+    ".story-body",
+    ".post-content",
+]
+
+
+def legacy_extract(html: bytes, max_chars: int = MAX_CONTENT_CHARS) -> Optional[str]:
+    """The selector-based BeautifulSoup extractor the scraper used before"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    for element in soup(["script", "style", "header", "footer", "nav"]):
+        element.extract()
+
+    for selector in LEGACY_SELECTORS:
+        content = soup.select_one(selector)
+        if content:
+            paragraphs = content.find_all("p")
+            if paragraphs:
+                text = " ".join(p.get_text().strip() for p in paragraphs)
+                return re.sub(r"\s+", " ", text)[:max_chars]
+
+    paragraphs = soup.find_all("p")
+    if paragraphs:
+        text = " ".join(p.get_text().strip() for p in paragraphs)
+        return re.sub(r"\s+", " ", text)[:max_chars]
+    return None
+
+
+async def fetch_corpus(urls: List[str], corpus: Path):
+    corpus.mkdir(parents=True, exist_ok=True)
+    async with aiohttp.ClientSession(headers=HEADERS) as session:
+        for url in urls:
+            try:
+                async with session.get(url, timeout=PAGE_TIMEOUT) as response:
+                    if response.status != 200:
+                        print(f"{url}: HTTP {response.status}, skipped")
+                        continue
+                    html = await read_capped(response)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"{url}: {e}, skipped")
+                continue
+            name = hashlib.sha1(url.encode()).hexdigest()[:16] + ".html"
+            (corpus / name).write_bytes(html)
+            print(f"{url}: {len(html) / 1024:.0f} KiB saved as {name}")
+
+
+def bench(extract: Callable, pages: List[bytes], max_chars: int, repeat: int) -> dict:
+    extracted = 0
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        texts = [extract(html, max_chars=max_chars) for html in pages]
+        best = min(best, time.perf_counter() - start)
+        extracted = sum(len(text or "") for text in texts)
+    total_bytes = sum(len(html) for html in pages)
+    return {
+        "pages/s": len(pages) / best,
+        "MB/s": total_bytes / best / 1e6,
+        "ms/page": best / len(pages) * 1000,
+        "mean chars": extracted / len(pages),
+        "empty": sum(1 for text in texts if not text),
+    }
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("corpus", type=Path, help="directory of saved .html pages")
+    parser.add_argument("--fetch", nargs="+", help="URLs to add to the corpus first")
+    parser.add_argument("--max-chars", type=int, default=MAX_CONTENT_CHARS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--no-legacy", action="store_true", help="skip the BeautifulSoup baseline"
+    )
+    args = parser.parse_args(argv)
+
+    if args.fetch:
+        asyncio.run(fetch_corpus(args.fetch, args.corpus))
+    pages = [path.read_bytes() for path in sorted(args.corpus.glob("*.html"))]
+    if not pages:
+        print(f"No .html files in {args.corpus}")
+        return
+
+    extractors = {"lxml": extract_main_text}
+    if not args.no_legacy:
+        extractors["legacy"] = legacy_extract
+    size = sum(len(html) for html in pages) / 1e6
+    print(f"{len(pages)} pages, {size:.1f} MB")
+    for name, extract in extractors.items():
+        result = bench(extract, pages, args.max_chars, args.repeat)
+        print(f"{name:>8}: " + ", ".join(f"{k} {v:,.1f}" for k, v in result.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import os
+import re
+from collections import defaultdict
+from typing import Optional
+
+import aiohttp
+import lxml.html
+from lxml import etree
+
+# Bytes of a page read before the rest is ignored; article text sits well
+# inside this, ads and inline data usually come after it
+MAX_HTML_BYTES = 1024 * 1024
+# Characters of article text kept
+MAX_CONTENT_CHARS = int(os.getenv("ARTICLE_MAX_CHARS", "2000"))
+READ_CHUNK_BYTES = 64 * 1024
+
+# Paragraphs shorter than this are bylines, captions or buttons
+MIN_PARAGRAPH_CHARS = 40
+# Dropped before scoring: never article text
+BOILERPLATE_TAGS = (
+    "script",
+    "style",
+    "noscript",
+    "header",
+    "footer",
+    "nav",
+    "aside",
+    "form",
+    "figure",
+    "iframe",
+    "svg",
+)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+async def read_capped(
+    response: aiohttp.ClientResponse, max_bytes: int = MAX_HTML_BYTES
+) -> bytes:
+    """Read a response body, stopping after max_bytes"""
+    chunks = []
+    size = 0
+    async for chunk in response.content.iter_chunked(READ_CHUNK_BYTES):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= max_bytes:
+            break
+    return b"".join(chunks)[:max_bytes]
+
+
+def truncate_text(text: str, max_chars: int = MAX_CONTENT_CHARS) -> str:
+    """Cut text to max_chars, at a word boundary when there is one nearby"""
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", max_chars - 100, max_chars)
+    return text[: cut if cut > 0 else max_chars]
+
+
+def extract_main_text(
+    html: bytes,
+    encoding: Optional[str] = None,
+    max_chars: int = MAX_CONTENT_CHARS,
+) -> Optional[str]:
+    """
+    Extract the main text of an article page.
+
+    Parses with lxml and scores in one pass over the paragraphs: each
+    paragraph's text length counts fully for its parent and half for its
+    grandparent, so the element holding most of the prose wins whatever
+    the site's class names are. Its paragraphs are joined in document
+    order and truncated to max_chars.
+
+    Args:
+        html: page bytes (possibly cut off by read_capped)
+        encoding: charset from the response headers, if any; otherwise
+            lxml reads the page's meta charset
+
+    Returns:
+        The article text, or None if the page has no usable paragraphs
+    """
+    if not html:
+        return None
+    parser = lxml.html.HTMLParser(encoding=encoding, remove_comments=True)
+    try:
+        root = lxml.html.document_fromstring(html, parser=parser)
+    except (etree.ParserError, ValueError):
+        return None
+    etree.strip_elements(root, *BOILERPLATE_TAGS, with_tail=False)
+
+    scores = defaultdict(float)
+    paragraphs = []
+    for paragraph in root.iter("p"):
+        text = _WHITESPACE.sub(" ", paragraph.text_content()).strip()
+        if len(text) < MIN_PARAGRAPH_CHARS:
+            continue
+        paragraphs.append((paragraph, text))
+        parent = paragraph.getparent()
+        if parent is None:
+            continue
+        scores[parent] += len(text)
+        grandparent = parent.getparent()
+        if grandparent is not None:
+            scores[grandparent] += len(text) / 2
+
+    if not paragraphs:
+        return None
+    if not scores:
+        return truncate_text(" ".join(text for _, text in paragraphs), max_chars)
+
+    best = max(scores, key=scores.get)
+    texts = []
+    length = 0
+    for paragraph, text in paragraphs:
+        if length > max_chars:
+            break
+        # Paragraphs inside the winning element, in document order
+        node = paragraph.getparent()
+        while node is not None and node is not best:
+            node = node.getparent()
+        if node is best:
+            texts.append(text)
+            length += len(text) + 1
+
+    return truncate_text(" ".join(texts), max_chars)
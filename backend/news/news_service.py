@@ -1,36 +1,25 @@
-from textblob import TextBlob
+import asyncio
+import json
 import yfinance as yf
 from datetime import datetime, timezone
 import pytz
-from typing import List, Optional, Set
-import re
-import requests
-from bs4 import BeautifulSoup
+from typing import List, Optional
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 import logging
 from pydantic import BaseModel
 
+from .article_cache import CachedArticle, article_cache
+from .scraper import close_session, scrape_articles, scrape_as_completed
+from .sentiment import sentiment_scorer
+
 # Create a logger
 logger = logging.getLogger(__name__)
 
 # Create a router with appropriate prefix and tag
 news_router = APIRouter(prefix="/news", tags=["news"])
-
-# Known sites that block or limit scraping
-NON_SCRAPPABLE_DOMAINS: Set[str] = {
-    "bloomberg.com",
-    "wsj.com",
-    "ft.com",
-    "barrons.com",
-    "marketwatch.com",
-    "fool.com",  # Sometimes allows, sometimes blocks
-    "seekingalpha.com",
-    "cnbc.com",  # Heavy JavaScript rendering
-    "forbes.com",  # Anti-bot measures
-    "reuters.com",  # Complex content loading
-    "investing.com",  # Sometimes blocks scrapers
-    "thestreet.com",  # Paywall
-}
+# Release the shared scraping connection pool
+news_router.add_event_handler("shutdown", close_session)
 
 
 # Pydantic model for news articles
@@ -46,105 +35,126 @@ class NewsArticle(BaseModel):
     is_scrappable: bool = False
 
 
-def is_scrappable(url: str) -> bool:
+def article_from_item(item: dict) -> NewsArticle:
     """
-    Check if a URL is likely to be scrappable
+    Build an article (not scraped, sentiment not yet scored) from one
+    yfinance news item
     """
-    try:
-        # Extract domain from URL
-        domain_match = re.search(r"https?://(?:www\.)?([^/]+)", url)
-        if not domain_match:
-            return False
-
-        domain = domain_match.group(1)
+    # Extract fields from Yahoo Finance data
+    content = item.get("content", {})
 
-        # Check against known non-scrappable domains
-        for blocked_domain in NON_SCRAPPABLE_DOMAINS:
-            if blocked_domain in domain:
-                return False
+    title = content.get("title", "")
+    summary = content.get("summary", "")
 
-        # Do a lightweight HEAD request to check for obvious blocks
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
+    # Get publication info
+    publisher = content.get("provider", {}).get("displayName", "Unknown")
 
-        # Use HEAD request first (lighter than GET)
-        response = requests.head(url, headers=headers, timeout=3)
+    # Get the URL - check multiple possible locations
+    url = None
+    if "canonicalUrl" in content and "url" in content["canonicalUrl"]:
+        url = content["canonicalUrl"]["url"]
+    elif "clickThroughUrl" in content:
+        url = content["clickThroughUrl"]
+    else:
+        url = "#"
 
-        # Check for common blocking status codes
-        if response.status_code in {403, 429, 503}:
-            return False
+    # Format timestamp
+    pub_date = content.get("pubDate")
+    eastern_tz = pytz.timezone("America/New_York")
 
-        # Check for robot.txt directives (simplified)
-        robots_url = f"https://{domain}/robots.txt"
+    if pub_date:
         try:
-            robots_response = requests.get(robots_url, timeout=2)
-            if robots_response.ok and "Disallow: /" in robots_response.text:
-                # Very basic check - ideally would use a proper robots.txt parser
-                return False
-        except Exception:
-            # If we can't check robots.txt, proceed cautiously
-            pass
-
-        return True
-    except Exception as e:
-        logger.warning(f"Error checking scrappability for {url}: {e}")
-        return False
-
-
-def extract_article_content(url: str) -> Optional[str]:
+            # Parse ISO format date
+            dt = datetime.fromisoformat(pub_date.replace("Z", "+00:00"))
+            # Convert to Eastern Time
+            eastern_time = dt.astimezone(eastern_tz)
+            published_time = eastern_time.strftime("%Y-%m-%d %I:%M %p ET")
+        except (ValueError, TypeError):
+            # Fallback to timestamp if available
+            if content.get("pubTime", 0):
+                # Create datetime from timestamp (which is in UTC)
+                dt = datetime.fromtimestamp(content.get("pubTime", 0), tz=timezone.utc)
+                # Convert to Eastern Time
+                eastern_time = dt.astimezone(eastern_tz)
+                published_time = eastern_time.strftime("%Y-%m-%d %I:%M %p ET")
+            else:
+                published_time = "Unknown date"
+    else:
+        # Fallback to timestamp
+        if content.get("pubTime", 0):
+            # Create datetime from timestamp (which is in UTC)
+            dt = datetime.fromtimestamp(content.get("pubTime", 0), tz=timezone.utc)
+            # Convert to Eastern Time
+            eastern_time = dt.astimezone(eastern_tz)
+            published_time = eastern_time.strftime("%Y-%m-%d %I:%M %p ET")
+        else:
+            published_time = "Unknown date"
+
+    image_url = None
+    if (
+        "thumbnail" in content
+        and content["thumbnail"]
+        and "resolutions" in content["thumbnail"]
+    ):
+        resolutions = content["thumbnail"]["resolutions"]
+        # Get the highest resolution image
+        if resolutions and len(resolutions) > 0:
+            # Sort by width to get the largest image
+            sorted_images = sorted(
+                resolutions, key=lambda x: x.get("width", 0), reverse=True
+            )
+            if sorted_images:
+                image_url = sorted_images[0].get("url")
+
+    # Initialize article with basic data
+    return NewsArticle(
+        title=title,
+        publisher=publisher,
+        link=url,
+        published=published_time,
+        sentiment=0.0,
+        summary=summary,
+        content=None,
+        imageUrl=image_url,  # Add the image URL
+        is_scrappable=False,
+    )
+
+
+def articles_from_items(news_items: List[dict], ticker: str) -> List[NewsArticle]:
     """
-    Extract the main content from a news article URL
+    Build articles from yfinance news items, skipping malformed ones, with
+    title + summary sentiment scored in one batch
     """
-    try:
-        # Add headers to mimic a browser
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-
-        response = requests.get(url, headers=headers, timeout=5)
-        if not response.ok:
-            return None
-
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        # Remove script and style elements
-        for script in soup(["script", "style", "header", "footer", "nav"]):
-            script.extract()
-
-        # Common article content selectors
-        content_selectors = [
-            "article",
-            ".article-content",
-            ".content",
-            "main",
-            "#content",
-            ".article-body",
-            ".story-body",
-            ".post-content",
-        ]
-
-        for selector in content_selectors:
-            content = soup.select_one(selector)
-            if content:
-                # Get all paragraphs
-                paragraphs = content.find_all("p")
-                if paragraphs:
-                    text = " ".join([p.get_text().strip() for p in paragraphs])
-                    # Clean up the text
-                    text = re.sub(r"\s+", " ", text)
-                    return text
-        # Fallback: get all paragraphs from the page body
-        paragraphs = soup.find_all("p")
-        if paragraphs:
-            text = " ".join([p.get_text().strip() for p in paragraphs])
-            text = re.sub(r"\s+", " ", text)
-            return text  # Limit to first 2000 chars
-
-        return None
-    except Exception as e:
-        logger.warning(f"Error extracting content from {url}: {e}")
-        return None
+    articles = []
+    for item in news_items:
+        try:
+            articles.append(article_from_item(item))
+        except Exception as e:
+            logger.warning(f"Error processing news item for {ticker}: {e}")
+            # Continue with next article instead of failing completely
+            continue
+
+    scores = sentiment_scorer.score_many(
+        f"{article.title} {article.summary}" for article in articles
+    )
+    for article, score in zip(articles, scores):
+        article.sentiment = score
+    return articles
+
+
+def apply_cached(article: NewsArticle, hit: CachedArticle):
+    article.is_scrappable, article.content = hit.scrappable, hit.content
+    if hit.sentiment is not None:
+        article.sentiment = hit.sentiment
+
+
+def full_text(article: NewsArticle) -> str:
+    return f"{article.title} {article.summary} {article.content}"
+
+
+def sort_articles(articles: List[NewsArticle]):
+    # Newest first
+    articles.sort(key=lambda x: x.published, reverse=True)
 
 
 @news_router.get("/{ticker}", response_model=List[NewsArticle])
@@ -160,6 +170,7 @@ async def get_news_sentiment(
     Parameters:
     - ticker: Stock ticker symbol
     - try_scrape: If True, attempts to scrape full article content for sites that allow it
+      (all articles concurrently, within SCRAPE_DEADLINE seconds)
     """
     try:
         logger.info(f"Fetching news for {ticker}, try_scrape={try_scrape}")
@@ -172,136 +183,162 @@ async def get_news_sentiment(
             logger.info(f"No news found for ticker {ticker}")
             return []
 
-        # Track scraping stats for logging
-        scraping_stats = {"total": 0, "scrappable": 0, "successful": 0}
-
-        articles = []
-        for item in news_items[:10]:  # Limit to 10 articles for performance
-            try:
-                # Extract fields from Yahoo Finance data
-                content = item.get("content", {})
-
-                title = content.get("title", "")
-                summary = content.get("summary", "")
-
-                # Get publication info
-                publisher = content.get("provider", {}).get("displayName", "Unknown")
-
-                # Get the URL - check multiple possible locations
-                url = None
-                if "canonicalUrl" in content and "url" in content["canonicalUrl"]:
-                    url = content["canonicalUrl"]["url"]
-                elif "clickThroughUrl" in content:
-                    url = content["clickThroughUrl"]
-                else:
-                    url = "#"
-
-                # Format timestamp
-                pub_date = content.get("pubDate")
-                eastern_tz = pytz.timezone("America/New_York")
-
-                if pub_date:
-                    try:
-                        # Parse ISO format date
-                        dt = datetime.fromisoformat(pub_date.replace("Z", "+00:00"))
-                        # Convert to Eastern Time
-                        eastern_time = dt.astimezone(eastern_tz)
-                        published_time = eastern_time.strftime("%Y-%m-%d %I:%M %p ET")
-                    except (ValueError, TypeError):
-                        # Fallback to timestamp if available
-                        if content.get("pubTime", 0):
-                            # Create datetime from timestamp (which is in UTC)
-                            dt = datetime.fromtimestamp(
-                                content.get("pubTime", 0), tz=timezone.utc
-                            )
-                            # Convert to Eastern Time
-                            eastern_time = dt.astimezone(eastern_tz)
-                            published_time = eastern_time.strftime(
-                                "%Y-%m-%d %I:%M %p ET"
-                            )
-                        else:
-                            published_time = "Unknown date"
-                else:
-                    # Fallback to timestamp
-                    if content.get("pubTime", 0):
-                        # Create datetime from timestamp (which is in UTC)
-                        dt = datetime.fromtimestamp(
-                            content.get("pubTime", 0), tz=timezone.utc
-                        )
-                        # Convert to Eastern Time
-                        eastern_time = dt.astimezone(eastern_tz)
-                        published_time = eastern_time.strftime("%Y-%m-%d %I:%M %p ET")
-                    else:
-                        published_time = "Unknown date"
-
-                image_url = None
-                if (
-                    "thumbnail" in content
-                    and content["thumbnail"]
-                    and "resolutions" in content["thumbnail"]
-                ):
-                    resolutions = content["thumbnail"]["resolutions"]
-                    # Get the highest resolution image
-                    if resolutions and len(resolutions) > 0:
-                        # Sort by width to get the largest image
-                        sorted_images = sorted(
-                            resolutions, key=lambda x: x.get("width", 0), reverse=True
+        # Limit to 10 articles for performance
+        articles = articles_from_items(news_items[:10], ticker)
+
+        # Check if we should try to scrape
+        if try_scrape:
+            urls = [article.link for article in articles if article.link != "#"]
+            # Articles scraped before (by any worker) need no network at all
+            cached = await asyncio.to_thread(article_cache.get_many, urls)
+            scraped = await scrape_articles([url for url in urls if url not in cached])
+
+            # Track scraping stats for logging
+            scraping_stats = {
+                "total": len(urls),
+                "cached": len(cached),
+                "finished": len(scraped),
+                "scrappable": 0,
+                "successful": 0,
+            }
+            fresh = []
+            for article in articles:
+                if article.link in cached:
+                    apply_cached(article, cached[article.link])
+                    continue
+                if article.link not in scraped:
+                    continue
+                article.is_scrappable, content_text = scraped[article.link]
+                scraping_stats["scrappable"] += article.is_scrappable
+                if content_text:
+                    scraping_stats["successful"] += 1
+                    article.content = content_text
+                fresh.append(article)
+
+            # Update sentiment with full content where it is available
+            with_content = [article for article in fresh if article.content]
+            scores = await asyncio.to_thread(
+                sentiment_scorer.score_many,
+                [full_text(article) for article in with_content],
+            )
+            for article, score in zip(with_content, scores):
+                article.sentiment = score
+            if fresh:
+                await asyncio.to_thread(
+                    article_cache.put_many,
+                    {
+                        article.link: CachedArticle(
+                            article.is_scrappable,
+                            article.content,
+                            article.sentiment if article.content else None,
                         )
-                        if sorted_images:
-                            image_url = sorted_images[0].get("url")
-
-                # Do sentiment analysis on title and summary
-                text_for_analysis = f"{title} {summary}"
-                sentiment = TextBlob(text_for_analysis).sentiment.polarity
-
-                # Initialize article with basic data
-                article = NewsArticle(
-                    title=title,
-                    publisher=publisher,
-                    link=url,
-                    published=published_time,
-                    sentiment=sentiment,
-                    summary=summary,
-                    content=None,
-                    imageUrl=image_url,  # Add the image URL
-                    is_scrappable=False,
+                        for article in fresh
+                    },
                 )
 
-                # Check if we should try to scrape
-                if try_scrape and url and url != "#":
-                    scraping_stats["total"] += 1
-                    article.is_scrappable = is_scrappable(url)
-
-                    if article.is_scrappable:
-                        scraping_stats["scrappable"] += 1
-                        content_text = extract_article_content(url)
-
-                        if content_text:
-                            scraping_stats["successful"] += 1
-                            article.content = content_text
-
-                            # Update sentiment with full content if available
-                            full_text = f"{title} {summary} {content_text}"
-                            article.sentiment = TextBlob(full_text).sentiment.polarity
-
-                articles.append(article)
-            except Exception as e:
-                logger.warning(f"Error processing news item for {ticker}: {e}")
-                # Continue with next article instead of failing completely
-                continue
-
-        # Sort by published date (newest first)
-        articles.sort(key=lambda x: x.published, reverse=True)
-
-        # Log scraping statistics
-        if try_scrape:
+            # Log scraping statistics
             logger.info(
                 f"Scraping stats for {ticker}: Total={scraping_stats['total']}, "
+                f"Cached={scraping_stats['cached']}, "
+                f"Finished={scraping_stats['finished']}, "
                 f"Scrappable={scraping_stats['scrappable']}, "
                 f"Successful={scraping_stats['successful']}"
             )
 
+        # Sort by published date (newest first)
+        sort_articles(articles)
+
         return articles
     except Exception as e:
         logger.error(f"Error fetching news for {ticker}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to fetch news: {str(e)}")
+
+
+def _event(name: str, data: dict, sse: bool) -> str:
+    if sse:
+        return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({"event": name, **data}) + "\n"
+
+
+@news_router.get("/{ticker}/stream")
+async def stream_news_sentiment(
+    ticker: str,
+    try_scrape: bool = Query(
+        True, description="Scrape full article content and stream it as it arrives"
+    ),
+    stream_format: str = Query(
+        "ndjson",
+        alias="format",
+        pattern="^(ndjson|sse)$",
+        description="ndjson lines or server-sent events",
+    ),
+):
+    """
+    Streaming variant of /news/{ticker}, as NDJSON lines (each with an
+    "event" field) or server-sent events:
+
+    - "articles": every article with headline + summary sentiment, sent as
+      soon as the news list is fetched
+    - "article": one per article enriched from the article cache or by
+      scraping, with its content and full-text sentiment, in completion
+      order (only with try_scrape)
+    - "done": the links in final (newest first) order, plus counters
+    """
+    try:
+        news_items = await asyncio.to_thread(lambda: yf.Ticker(ticker).news)
+    except Exception as e:
+        logger.error(f"Error fetching news for {ticker}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to fetch news: {str(e)}")
+
+    # Limit to 10 articles for performance
+    articles = articles_from_items((news_items or [])[:10], ticker)
+    sort_articles(articles)
+    sse = stream_format == "sse"
+
+    async def events():
+        yield _event("articles", {"articles": [a.model_dump() for a in articles]}, sse)
+        stats = {"total": 0, "cached": 0, "finished": 0, "successful": 0}
+        fresh = {}
+        if try_scrape:
+            by_link = {}
+            for article in articles:
+                if article.link != "#":
+                    by_link.setdefault(article.link, []).append(article)
+            stats["total"] = len(by_link)
+
+            cached = await asyncio.to_thread(article_cache.get_many, list(by_link))
+            stats["cached"] = len(cached)
+            for link, hit in cached.items():
+                for article in by_link[link]:
+                    apply_cached(article, hit)
+                yield _event("article", {"article": by_link[link][0].model_dump()}, sse)
+
+            misses = [link for link in by_link if link not in cached]
+            async for link, (scrappable, content) in scrape_as_completed(misses):
+                stats["finished"] += 1
+                stats["successful"] += bool(content)
+                for article in by_link[link]:
+                    article.is_scrappable, article.content = scrappable, content
+                    if content:
+                        article.sentiment = sentiment_scorer.score(full_text(article))
+                article = by_link[link][0]
+                fresh[link] = CachedArticle(
+                    scrappable, content, article.sentiment if content else None
+                )
+                yield _event("article", {"article": article.model_dump()}, sse)
+
+        yield _event(
+            "done",
+            {"order": [article.link for article in articles], "stats": stats},
+            sse,
+        )
+        logger.info(f"Streamed news for {ticker}: {stats}")
+        # Stored after the client has everything it needs
+        if fresh:
+            await asyncio.to_thread(article_cache.put_many, fresh)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Set
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# How long a fetched robots.txt is trusted
+ROBOTS_TTL = 6 * 3600
+# How long a failed robots.txt fetch (timeout, 5xx) is remembered before
+# trying again; the domain is treated as allowed meanwhile
+ROBOTS_ERROR_TTL = 15 * 60
+ROBOTS_TIMEOUT = aiohttp.ClientTimeout(total=2)
+
+# Responses that mean the site is refusing us
+BLOCKING_STATUSES = {403, 429, 503}
+# A domain that refuses us is skipped for BLOCK_BASE seconds, doubling with
+# each further refusal up to BLOCK_MAX; one strike is forgotten per
+# STRIKE_DECAY seconds without a refusal
+BLOCK_BASE = 10 * 60
+BLOCK_MAX = 24 * 3600
+STRIKE_DECAY = 6 * 3600
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# Known sites that block or limit scraping
+NON_SCRAPPABLE_DOMAINS: Set[str] = {
+    "bloomberg.com",
+    "wsj.com",
+    "ft.com",
+    "barrons.com",
+    "marketwatch.com",
+    "fool.com",  # Sometimes allows, sometimes blocks
+    "seekingalpha.com",
+    "cnbc.com",  # Heavy JavaScript rendering
+    "forbes.com",  # Anti-bot measures
+    "reuters.com",  # Complex content loading
+    "investing.com",  # Sometimes blocks scrapers
+    "thestreet.com",  # Paywall
+}
+
+
+class _Policy:
+    def __init__(self, parser: Optional[RobotFileParser], ttl: float):
+        # None means "could not tell", which allows everything
+        self.parser = parser
+        self.expires = time.monotonic() + ttl
+
+
+class _Strikes:
+    def __init__(self):
+        self.count = 0
+        self.last = 0.0
+        self.blocked_until = 0.0
+
+
+class RobotsCache:
+    """
+    Per-domain scraping policy:
+
+    - NON_SCRAPPABLE_DOMAINS plus an adaptive blocklist of domains that
+      recently answered 403/429/503, with exponential backoff that decays
+    - robots.txt parsed with urllib.robotparser, cached for ROBOTS_TTL
+      (missing robots.txt allows all, 401/403 disallows all) and failures
+      cached for ROBOTS_ERROR_TTL
+
+    so a domain is probed at most once per TTL however many articles or
+    requests point at it.
+    """
+
+    def __init__(self):
+        self._policies: Dict[str, _Policy] = {}
+        self._strikes: Dict[str, _Strikes] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stats = {
+            "robots_hits": 0,
+            "robots_fetches": 0,
+            "robots_errors": 0,
+            "disallowed": 0,
+            "blocked": 0,
+            "strikes": 0,
+        }
+
+    def is_blocked(self, domain: str) -> bool:
+        """Static blocklist, or refused us recently"""
+        if any(blocked in domain for blocked in NON_SCRAPPABLE_DOMAINS):
+            return True
+        strikes = self._strikes.get(domain)
+        return strikes is not None and time.monotonic() < strikes.blocked_until
+
+    def report_status(self, domain: str, status: int):
+        """Learn from a response: blocking statuses add a strike to the domain"""
+        if status not in BLOCKING_STATUSES:
+            return
+        now = time.monotonic()
+        strikes = self._strikes.setdefault(domain, _Strikes())
+        decayed = int((now - strikes.last) // STRIKE_DECAY) if strikes.count else 0
+        strikes.count = max(0, strikes.count - decayed) + 1
+        strikes.last = now
+        duration = min(BLOCK_BASE * 2 ** (strikes.count - 1), BLOCK_MAX)
+        strikes.blocked_until = now + duration
+        self._stats["strikes"] += 1
+        logger.info(
+            f"{domain} answered {status}, skipping it for {duration / 60:.0f} min"
+        )
+
+    async def allowed(self, session: aiohttp.ClientSession, url: str, domain: str):
+        """Whether the domain is not blocked and its robots.txt allows the URL"""
+        if self.is_blocked(domain):
+            self._stats["blocked"] += 1
+            return False
+
+        policy = self._policies.get(domain)
+        if policy is not None and time.monotonic() < policy.expires:
+            self._stats["robots_hits"] += 1
+        else:
+            # Concurrent articles on one domain share a single fetch
+            inflight = self._inflight.get(domain)
+            if inflight is None:
+                scheme = urlsplit(url).scheme or "https"
+                inflight = asyncio.ensure_future(self._fetch(session, domain, scheme))
+                self._inflight[domain] = inflight
+                inflight.add_done_callback(lambda _: self._inflight.pop(domain, None))
+            policy = await asyncio.shield(inflight)
+
+        if policy.parser is not None and not policy.parser.can_fetch(USER_AGENT, url):
+            self._stats["disallowed"] += 1
+            return False
+        return True
+
+    async def _fetch(
+        self, session: aiohttp.ClientSession, domain: str, scheme: str
+    ) -> _Policy:
+        self._stats["robots_fetches"] += 1
+        parser = RobotFileParser(f"{scheme}://{domain}/robots.txt")
+        try:
+            async with session.get(parser.url, timeout=ROBOTS_TIMEOUT) as response:
+                if response.status in (401, 403):
+                    parser.disallow_all = True
+                elif 400 <= response.status < 500:
+                    parser.allow_all = True
+                elif response.status != 200:
+                    raise aiohttp.ClientResponseError(
+                        response.request_info, (), status=response.status
+                    )
+                else:
+                    parser.parse((await response.text(errors="replace")).splitlines())
+            policy = _Policy(parser, ROBOTS_TTL)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.debug(f"Could not read robots.txt for {domain}: {e}")
+            self._stats["robots_errors"] += 1
+            policy = _Policy(None, ROBOTS_ERROR_TTL)
+
+        self._policies[domain] = policy
+        return policy
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            **self._stats,
+            "cached_domains": len(self._policies),
+            "blocked_domains": sorted(
+                domain
+                for domain, strikes in self._strikes.items()
+                if now < strikes.blocked_until
+            ),
+        }
+
+
+robots_cache = RobotsCache()
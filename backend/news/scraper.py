@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import re
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from .extraction import MAX_CONTENT_CHARS, extract_main_text, read_capped
+from .robots import USER_AGENT, robots_cache
+
+logger = logging.getLogger(__name__)
+
+# Whole scraping stage; articles still in flight after this are skipped
+SCRAPE_DEADLINE = 8.0
+# Concurrent requests per domain, and in total across the shared pool
+PER_DOMAIN_LIMIT = 2
+MAX_CONNECTIONS = 20
+PAGE_TIMEOUT = aiohttp.ClientTimeout(total=5)
+
+HEADERS = {"User-Agent": USER_AGENT}
+
+_DOMAIN_PATTERN = re.compile(r"https?://(?:www\.)?([^/]+)")
+
+_session: Optional[aiohttp.ClientSession] = None
+_domain_limits: Dict[str, asyncio.Semaphore] = {}
+
+
+def url_domain(url: str) -> Optional[str]:
+    match = _DOMAIN_PATTERN.search(url)
+    return match.group(1).lower() if match else None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """
+    The shared HTTP session (connection pool, DNS cache, keep-alive) for all
+    scraping. Created on first use inside the running event loop.
+    """
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            headers=HEADERS,
+            connector=aiohttp.TCPConnector(limit=MAX_CONNECTIONS, ttl_dns_cache=300),
+        )
+        _domain_limits.clear()
+    return _session
+
+
+async def close_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+def _domain_limit(domain: str) -> asyncio.Semaphore:
+    limit = _domain_limits.get(domain)
+    if limit is None:
+        limit = _domain_limits[domain] = asyncio.Semaphore(PER_DOMAIN_LIMIT)
+    return limit
+
+
+async def is_scrappable(url: str) -> bool:
+    """
+    Check if a URL may be scraped: its domain is not blocked (statically or
+    for refusing us recently) and its robots.txt allows it. Answers from
+    the per-domain policy cache without network traffic when it can.
+    """
+    domain = url_domain(url)
+    if not domain:
+        return False
+    async with _domain_limit(domain):
+        return await robots_cache.allowed(get_session(), url, domain)
+
+
+async def extract_article_content(
+    url: str, max_chars: int = MAX_CONTENT_CHARS
+) -> Optional[str]:
+    """
+    Download an article (at most MAX_HTML_BYTES of it) and extract up to
+    max_chars of its main text. Parsing runs in a thread so it does not
+    stall the other downloads.
+    """
+    domain = url_domain(url)
+    try:
+        async with _domain_limit(domain):
+            async with get_session().get(url, timeout=PAGE_TIMEOUT) as response:
+                if response.status != 200:
+                    robots_cache.report_status(domain, response.status)
+                    return None
+                html = await read_capped(response)
+                encoding = response.charset
+        return await asyncio.to_thread(extract_main_text, html, encoding, max_chars)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.warning(f"Error extracting content from {url}: {e}")
+        return None
+
+
+async def scrape_article(url: str) -> Tuple[bool, Optional[str]]:
+    """(is_scrappable, content or None) for one article"""
+    if not await is_scrappable(url):
+        return False, None
+    content = await extract_article_content(url)
+    # A refusal to serve the page means it was not scrappable after all
+    return not robots_cache.is_blocked(url_domain(url)), content
+
+
+async def scrape_as_completed(
+    urls: List[str], deadline: float = SCRAPE_DEADLINE
+) -> AsyncIterator[Tuple[str, Tuple[bool, Optional[str]]]]:
+    """
+    Scrape all articles concurrently (at most PER_DOMAIN_LIMIT requests per
+    domain at a time), yielding (url, (is_scrappable, content)) as each one
+    finishes. Articles still in flight after `deadline` seconds, or when
+    the caller stops iterating, are cancelled.
+    """
+    tasks = {asyncio.ensure_future(scrape_article(url)): url for url in set(urls)}
+    pending = set(tasks)
+    loop = asyncio.get_running_loop()
+    stop_at = loop.time() + deadline
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=max(0.0, stop_at - loop.time()),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                logger.info(
+                    f"Scraping deadline reached, skipping {len(pending)} of {len(tasks)} articles"
+                )
+                break
+            for task in done:
+                if task.exception() is not None:
+                    logger.warning(f"Error scraping {tasks[task]}: {task.exception()}")
+                    continue
+                yield tasks[task], task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def scrape_articles(
+    urls: List[str], deadline: float = SCRAPE_DEADLINE
+) -> Dict[str, Tuple[bool, Optional[str]]]:
+    """
+    Scrape all articles concurrently. Returns {url: (is_scrappable, content)}
+    for the articles finished within `deadline` seconds; the rest are
+    cancelled.
+    """
+    return {url: result async for url, result in scrape_as_completed(urls, deadline)}
@@ -0,0 +1,83 @@
+import pandas as pd
+import pytest
+
+from news import article_cache as article_cache_module
+from news.article_cache import ArticleCache, CachedArticle, canonical_url
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        (
+            "HTTPS://Finance.Yahoo.com/news/story.html?utm_source=x&b=2&a=1#top",
+            "https://finance.yahoo.com/news/story.html?a=1&b=2",
+        ),
+        ("https://example.com/a/b/", "https://example.com/a/b"),
+        ("https://example.com", "https://example.com/"),
+        (
+            "https://example.com/s?guccounter=1&fbclid=abc&.tsrc=rss&id=7",
+            "https://example.com/s?id=7",
+        ),
+        ("  https://example.com/s?q=  ", "https://example.com/s?q="),
+    ],
+)
+def test_canonical_url(url, expected):
+    assert canonical_url(url) == expected
+
+
+def test_canonical_url_shares_one_key_for_tracking_variants():
+    plain = "https://example.com/news/1"
+    assert canonical_url(plain + "?utm_medium=rss") == canonical_url(plain + "/")
+
+
+@pytest.fixture
+def database():
+    mongomock = pytest.importorskip("mongomock")
+    return mongomock.MongoClient()["test"]
+
+
+def _article(text: str) -> CachedArticle:
+    return CachedArticle(True, text, 0.5)
+
+
+def test_round_trip_through_mongo(database):
+    ArticleCache(database).put_many(
+        {"https://example.com/a?utm_source=x": _article("text")}
+    )
+    fresh = ArticleCache(database)
+
+    found = fresh.get_many(["https://example.com/a", "https://example.com/b"])
+
+    assert found == {"https://example.com/a": _article("text")}
+    assert fresh.stats()["mongo_hits"] == 1
+    assert fresh.stats()["misses"] == 1
+
+
+def test_failures_are_not_stored(database):
+    cache = ArticleCache(database)
+    cache.put_many({"https://example.com/a": CachedArticle(False, None, None)})
+    assert database["article_cache"].count_documents({}) == 0
+    assert cache.get_many(["https://example.com/a"])
+
+
+def test_stored_articles_are_capped_least_recently_read_first(database, monkeypatch):
+    monkeypatch.setattr(article_cache_module, "TRIM_EVERY", 1)
+    cache = ArticleCache(database, max_stored=3)
+    now = pd.Timestamp.now(tz="UTC")
+    for i, days_ago in enumerate([0, 3, 2]):
+        cache.put_many({f"https://example.com/{i}": _article(f"text {i}")})
+        database["article_cache"].update_one(
+            {"_id": f"https://example.com/{i}"},
+            {
+                "$set": {
+                    "accessed_at": (now - pd.Timedelta(days=days_ago)).to_pydatetime()
+                }
+            },
+        )
+
+    cache.put_many({"https://example.com/3": _article("text 3")})
+    cache.put_many({"https://example.com/4": _article("text 4")})
+
+    stored = {doc["_id"] for doc in database["article_cache"].find()}
+    assert stored == {f"https://example.com/{i}" for i in (0, 3, 4)}
+    assert cache.stats()["trimmed"] == 2
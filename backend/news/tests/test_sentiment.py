@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from news.sentiment import FINANCE_LEXICON, SentimentScorer, _lexicon
+
+TEXTS = [
+    "Shares surge after the company beat estimates",
+    "Revenue did not surge; the stock fell sharply",
+    "Analysts said nothing",
+    "",
+    "Guidance was cut. Not",
+    "Strong quarter",
+]
+
+
+def test_batch_scores_match_single_scores():
+    batch = _lexicon.score(TEXTS)
+    single = [_lexicon.score([text])[0] for text in TEXTS]
+    np.testing.assert_allclose(batch, single)
+    assert len(batch) == len(TEXTS)
+
+
+def test_nul_characters_do_not_split_documents():
+    texts = ["record\x00profit", "\x00", "shares \x00\x00 fell", "rally"]
+
+    scores = _lexicon.score(texts)
+
+    assert len(scores) == len(texts)
+    np.testing.assert_allclose(scores[0], _lexicon.score(["record profit"])[0])
+    assert scores[1] == 0.0
+    np.testing.assert_allclose(scores[3], _lexicon.score(["rally"])[0])
+
+
+def test_negation_stays_within_its_document():
+    # A trailing negator must not flip the first word of the next document
+    scores = _lexicon.score(["results were not", "surge"])
+    assert scores[1] == _lexicon.score(["surge"])[0] > 0
+
+
+def test_negation_and_intensifiers():
+    (plain, negated, far, intensified) = _lexicon.score(
+        [
+            "shares surge",
+            "shares did not surge",
+            "not that this one was a surge",
+            "shares surge sharply and very strong",
+        ]
+    )
+    assert plain > 0 > negated
+    # Beyond NEGATION_WINDOW tokens the negator no longer applies
+    assert far > 0
+    assert intensified > plain
+
+
+def test_inflections_and_apostrophes():
+    base = _lexicon.score(["the stock will rise"])[0]
+    for form in ("rises", "rising", "rose", "risen"):
+        assert _lexicon.score([f"the stock {form}"])[0] == pytest.approx(base)
+    typographic, plain = _lexicon.score(["it didn’t rally", "it didn't rally"])
+    assert typographic == plain < 0
+
+
+def test_scores_are_bounded():
+    positive = " ".join(word for word, weight in FINANCE_LEXICON.items() if weight > 0)
+    negative = " ".join(word for word, weight in FINANCE_LEXICON.items() if weight < 0)
+    scores = _lexicon.score([positive * 5, negative * 5])
+    assert 0.9 < scores[0] < 1 and -1 < scores[1] < -0.9
+    assert len(_lexicon.score([])) == 0
+
+
+def test_scorer_memoizes_by_content():
+    scorer = SentimentScorer(memo_entries=2)
+
+    first = scorer.score_many(["rally", "slump", "rally"])
+    assert scorer.stats()["scored"] == 2
+
+    assert scorer.score_many(["slump", "rally"]) == first[1::-1]
+    assert scorer.stats()["hits"] == 2
+    scorer.score("beat")
+    assert scorer.stats()["memo_entries"] == 2
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        SentimentScorer("vader")
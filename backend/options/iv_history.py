@@ -0,0 +1,404 @@
+# backend/options/iv_history.py
+import argparse
+import datetime as dt
+import logging
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import CollectionInvalid
+
+from analytics.data_fetcher import get_option_chain, get_option_expirations
+from analytics.sessions import nyse_sessions
+from db import db
+
+logger = logging.getLogger(__name__)
+
+# Number of expiries summarized per snapshot (front of the curve only)
+SNAPSHOT_EXPIRIES = 8
+# Moneyness of the wings used for the skew summary (90% put / 110% call)
+PUT_WING_MONEYNESS = 0.9
+CALL_WING_MONEYNESS = 1.1
+# Constant maturity (in days) used for the headline ATM IV
+CONSTANT_MATURITY_DAYS = 30
+# Yahoo reports ~0 IV for strikes without quotes; ignore those
+MIN_VALID_IV = 0.005
+# Scheduled snapshots are taken this long before the session's close
+SNAPSHOT_LEAD = pd.Timedelta(minutes=15)
+# Same as the iv_cron cadence, so exactly one scheduled run falls inside it
+SNAPSHOT_WINDOW = pd.Timedelta(minutes=5)
+# Triggered snapshots are refused this soon after the previous one started
+MIN_SNAPSHOT_INTERVAL = pd.Timedelta(minutes=10)
+
+_run_lock = threading.Lock()
+_running = False
+_last_started: Optional[pd.Timestamp] = None
+
+_collection = None
+
+
+def get_snapshot_collection():
+    """
+    Return the IV snapshot collection, creating the Mongo time-series
+    collection and its (ticker, timestamp) index on first use.
+    """
+    global _collection
+    if _collection is not None:
+        return _collection
+
+    if "iv_snapshots" not in db.list_collection_names():
+        try:
+            db.create_collection(
+                "iv_snapshots",
+                timeseries={
+                    "timeField": "timestamp",
+                    "metaField": "ticker",
+                    "granularity": "hours",
+                },
+            )
+        except CollectionInvalid:
+            # Created concurrently by another worker
+            pass
+
+    collection = db["iv_snapshots"]
+    collection.create_index([("ticker", ASCENDING), ("timestamp", DESCENDING)])
+    _collection = collection
+    return _collection
+
+
+def _interpolate_iv(chain: pd.DataFrame, strike: float) -> Optional[float]:
+    """
+    Linearly interpolate implied volatility at a strike.
+
+    Parameters:
+    chain: calls or puts DataFrame from yfinance option_chain
+    strike: strike to interpolate at (clamped to the listed range)
+
+    Returns:
+    Implied volatility or None when the chain has no usable quotes
+    """
+    if chain is None or chain.empty:
+        return None
+
+    valid = chain[chain["impliedVolatility"] > MIN_VALID_IV]
+    if valid.empty:
+        return None
+
+    valid = valid.sort_values("strike")
+    return float(
+        np.interp(
+            strike,
+            valid["strike"].to_numpy(dtype=float),
+            valid["impliedVolatility"].to_numpy(dtype=float),
+        )
+    )
+
+
+def summarize_expiry(
+    calls: pd.DataFrame, puts: pd.DataFrame, spot: float, expiration: str
+) -> Dict:
+    """
+    Compact per-expiry summary: ATM IV plus the 90%/110% wing IVs and their spread.
+
+    Parameters:
+    calls: calls DataFrame for the expiry
+    puts: puts DataFrame for the expiry
+    spot: current underlying price
+    expiration: expiry date as YYYY-MM-DD
+
+    Returns:
+    Dict with expiration, days, atm_iv, put_wing_iv, call_wing_iv and skew
+    """
+    exp_date = dt.datetime.strptime(expiration, "%Y-%m-%d")
+    days = max((exp_date - dt.datetime.now()).days, 1)
+
+    atm_values = [
+        iv
+        for iv in (_interpolate_iv(calls, spot), _interpolate_iv(puts, spot))
+        if iv is not None
+    ]
+    atm_iv = float(np.mean(atm_values)) if atm_values else None
+
+    put_wing_iv = _interpolate_iv(puts, spot * PUT_WING_MONEYNESS)
+    call_wing_iv = _interpolate_iv(calls, spot * CALL_WING_MONEYNESS)
+    skew = (
+        put_wing_iv - call_wing_iv
+        if put_wing_iv is not None and call_wing_iv is not None
+        else None
+    )
+
+    return {
+        "expiration": expiration,
+        "days": days,
+        "atm_iv": atm_iv,
+        "put_wing_iv": put_wing_iv,
+        "call_wing_iv": call_wing_iv,
+        "skew": skew,
+    }
+
+
+def constant_maturity_iv(
+    expiries: List[Dict], target_days: int = CONSTANT_MATURITY_DAYS
+) -> Optional[float]:
+    """
+    Interpolate ATM IV at a constant maturity using linear interpolation in
+    total variance (iv^2 * T) between the bracketing expiries.
+    """
+    points = sorted(
+        (e["days"], e["atm_iv"]) for e in expiries if e["atm_iv"] is not None
+    )
+    if not points:
+        return None
+
+    days = np.array([p[0] for p in points], dtype=float)
+    ivs = np.array([p[1] for p in points], dtype=float)
+
+    if target_days <= days[0]:
+        return float(ivs[0])
+    if target_days >= days[-1]:
+        return float(ivs[-1])
+
+    total_variance = np.interp(target_days, days, ivs**2 * days)
+    return float(np.sqrt(total_variance / target_days))
+
+
+def capture_snapshot(
+    ticker: str, max_expiries: int = SNAPSHOT_EXPIRIES
+) -> Optional[Dict]:
+    """
+    Capture ATM IV and the per-expiry skew summary for a ticker.
+
+    Returns:
+    Snapshot document (not yet stored) or None when no options are listed
+    """
+    stock = yf.Ticker(ticker)
+    history = stock.history(period="1d")
+    if history.empty:
+        logger.warning(f"No price data for IV snapshot of {ticker}")
+        return None
+    spot = float(history["Close"].iloc[-1])
+
+    expiration_dates = get_option_expirations(ticker)
+    if not expiration_dates:
+        logger.info(f"No options listed for {ticker}, skipping IV snapshot")
+        return None
+
+    expiries = []
+    for expiration in expiration_dates[:max_expiries]:
+        try:
+            chain = get_option_chain(ticker, expiration)
+            expiries.append(summarize_expiry(chain.calls, chain.puts, spot, expiration))
+        except Exception as e:
+            logger.warning(f"Skipping {ticker} {expiration} in IV snapshot: {e}")
+
+    if not expiries:
+        return None
+
+    return {
+        "ticker": ticker.upper(),
+        "timestamp": dt.datetime.now(dt.timezone.utc),
+        "spot": spot,
+        "atm_iv": constant_maturity_iv(expiries),
+        "expiries": expiries,
+    }
+
+
+def store_snapshot(snapshot: Dict) -> None:
+    """Insert a snapshot document into the time-series collection"""
+    get_snapshot_collection().insert_one(dict(snapshot))
+
+
+def get_watchlisted_tickers() -> List[str]:
+    """Distinct tickers across all user watchlists"""
+    return sorted(
+        {
+            ticker.upper()
+            for ticker in db["watchlists"].distinct("Tickers.Ticker")
+            if ticker
+        }
+    )
+
+
+def snapshot_watchlists() -> Dict[str, int]:
+    """
+    Snapshot every watchlisted ticker. Intended to run on a schedule
+    (see options/iv_cron) or via POST /options/iv-history/snapshot.
+
+    Returns:
+    Counts of stored and skipped tickers
+    """
+    stats = {"stored": 0, "skipped": 0}
+    for ticker in get_watchlisted_tickers():
+        try:
+            snapshot = capture_snapshot(ticker)
+            if snapshot is None or snapshot["atm_iv"] is None:
+                stats["skipped"] += 1
+                continue
+            store_snapshot(snapshot)
+            stats["stored"] += 1
+        except Exception as e:
+            stats["skipped"] += 1
+            logger.warning(f"IV snapshot failed for {ticker}: {e}")
+
+    logger.info(
+        f"IV snapshot run: stored={stats['stored']}, skipped={stats['skipped']}"
+    )
+    return stats
+
+
+def snapshot_due(now: Optional[pd.Timestamp] = None) -> bool:
+    """
+    Whether `now` falls in the SNAPSHOT_WINDOW that starts SNAPSHOT_LEAD
+    before the current session's close, read from the NYSE session index
+    (so early closes and DST are accounted for)
+    """
+    now = now or pd.Timestamp.now(tz="UTC")
+    sessions = nyse_sessions.around(now)
+    i, is_open = sessions.locate(np.array([now.value]))
+    if not is_open[0]:
+        return False
+    window_start = pd.Timestamp(int(sessions.closes[i[0]]), tz="UTC") - SNAPSHOT_LEAD
+    return window_start <= now < window_start + SNAPSHOT_WINDOW
+
+
+def claim_snapshot_run(now: Optional[pd.Timestamp] = None) -> bool:
+    """
+    Reserve a triggered snapshot run: False while one is running or within
+    MIN_SNAPSHOT_INTERVAL of the last one starting. A successful claim must
+    be followed by run_claimed_snapshot().
+    """
+    global _running, _last_started
+    now = now or pd.Timestamp.now(tz="UTC")
+    with _run_lock:
+        if _running or (
+            _last_started is not None and now - _last_started < MIN_SNAPSHOT_INTERVAL
+        ):
+            return False
+        _running, _last_started = True, now
+        return True
+
+
+def run_claimed_snapshot() -> Dict[str, int]:
+    global _running
+    try:
+        return snapshot_watchlists()
+    finally:
+        with _run_lock:
+            _running = False
+
+
+def get_daily_atm_iv(ticker: str, lookback_days: int) -> pd.Series:
+    """
+    Daily ATM IV series (last snapshot per New York trading date).
+
+    The $match stage is served by the (ticker, timestamp) index, so the
+    lookup cost is bounded by the lookback window, not the history size.
+    """
+    start = dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=lookback_days)
+    pipeline = [
+        {
+            "$match": {
+                "ticker": ticker.upper(),
+                "timestamp": {"$gte": start},
+                "atm_iv": {"$ne": None},
+            }
+        },
+        {"$sort": {"timestamp": 1}},
+        {
+            "$group": {
+                "_id": {
+                    "$dateToString": {
+                        "format": "%Y-%m-%d",
+                        "date": "$timestamp",
+                        "timezone": "America/New_York",
+                    }
+                },
+                "atm_iv": {"$last": "$atm_iv"},
+            }
+        },
+        {"$sort": {"_id": 1}},
+    ]
+    rows = list(get_snapshot_collection().aggregate(pipeline))
+    return pd.Series(
+        [row["atm_iv"] for row in rows],
+        index=[row["_id"] for row in rows],
+        dtype=float,
+    )
+
+
+def get_iv_rank(ticker: str, lookback_days: int = 365) -> Dict:
+    """
+    IV rank and IV percentile of the latest ATM IV over the lookback window.
+
+    IV rank: position of the current IV between the window low and high (0-100)
+    IV percentile: share of prior days with a lower IV (0-100)
+    """
+    series = get_daily_atm_iv(ticker, lookback_days)
+    result = {
+        "ticker": ticker.upper(),
+        "lookbackDays": lookback_days,
+        "observations": int(len(series)),
+        "currentIv": None,
+        "ivLow": None,
+        "ivHigh": None,
+        "ivRank": None,
+        "ivPercentile": None,
+    }
+    if series.empty:
+        return result
+
+    values = series.to_numpy()
+    current = values[-1]
+    low, high = values.min(), values.max()
+
+    result["currentIv"] = float(current)
+    result["ivLow"] = float(low)
+    result["ivHigh"] = float(high)
+    result["ivRank"] = (
+        float(100 * (current - low) / (high - low)) if high > low else None
+    )
+    if len(values) > 1:
+        result["ivPercentile"] = float(100 * np.mean(values[:-1] < current))
+
+    return result
+
+
+def get_term_structure_history(ticker: str, days: int = 30) -> List[Dict]:
+    """Stored snapshots (newest first) with their per-expiry summaries"""
+    start = dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=days)
+    cursor = (
+        get_snapshot_collection()
+        .find(
+            {"ticker": ticker.upper(), "timestamp": {"$gte": start}},
+            {"_id": 0, "timestamp": 1, "spot": 1, "atm_iv": 1, "expiries": 1},
+        )
+        .sort("timestamp", DESCENDING)
+    )
+
+    return [
+        {
+            "timestamp": doc["timestamp"].replace(tzinfo=dt.timezone.utc).isoformat(),
+            "spot": doc.get("spot"),
+            "atmIv": doc.get("atm_iv"),
+            "expiries": doc.get("expiries", []),
+        }
+        for doc in cursor
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Snapshot ATM IV and skew")
+    parser.add_argument(
+        "--scheduled",
+        action="store_true",
+        help="only snapshot inside the window before today's close (for cron)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.scheduled and not snapshot_due():
+        raise SystemExit(0)
+    print(snapshot_watchlists())
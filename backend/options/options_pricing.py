@@ -9,6 +9,8 @@ from typing import (
 
 import logging as logging
 
+from analytics.data_fetcher import get_ticker_info
+
 
 def get_risk_free_rate(days_to_expiry: int) -> float:
     """
@@ -273,7 +275,7 @@ def get_dividend_info(stock_ticker) -> Dict:
     Dict with dividend information
     """
     try:
-        info = stock_ticker.info
+        info = get_ticker_info(stock_ticker.ticker)
         dividends = {}
 
         # Dividend yield
@@ -1,5 +1,6 @@
 import yfinance as yf
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from typing import (
     List,
     Optional,
@@ -12,6 +13,12 @@ import pandas as pd
 import logging
 import datetime as dt
 
+from analytics.data_fetcher import (
+    fetch_stock_frame,
+    get_option_chain,
+    get_option_expirations,
+)
+
 # Import our enhanced pricing models
 from .options_pricing import (
     calculate_option_price_crr_with_dividends,
@@ -19,6 +26,13 @@ from .options_pricing import (
     get_dividend_info,
     generate_binomial_tree_visualization,
 )
+from .iv_history import (
+    MIN_SNAPSHOT_INTERVAL,
+    claim_snapshot_run,
+    get_iv_rank as query_iv_rank,
+    get_term_structure_history as query_term_structure_history,
+    run_claimed_snapshot,
+)
 
 logger = logging.getLogger(__name__)
 options_router = APIRouter(prefix="/options", tags=["options"])
@@ -132,6 +146,33 @@ class BinomialTreeResponse(BaseModel):
     parameters: BinomialTreeParams
 
 
+class IVRankResponse(BaseModel):
+    ticker: str
+    lookbackDays: int
+    observations: int  # number of trading days with a stored snapshot
+    currentIv: Optional[float] = None
+    ivLow: Optional[float] = None
+    ivHigh: Optional[float] = None
+    ivRank: Optional[float] = None  # 0-100
+    ivPercentile: Optional[float] = None  # 0-100
+
+
+class ExpirySkew(BaseModel):
+    expiration: str
+    days: int
+    atm_iv: Optional[float] = None
+    put_wing_iv: Optional[float] = None  # IV at 90% moneyness (puts)
+    call_wing_iv: Optional[float] = None  # IV at 110% moneyness (calls)
+    skew: Optional[float] = None  # put wing minus call wing
+
+
+class IVSnapshot(BaseModel):
+    timestamp: str
+    spot: Optional[float] = None
+    atmIv: Optional[float] = None  # 30-day constant maturity ATM IV
+    expiries: List[ExpirySkew]
+
+
 @options_router.get("/{ticker}", response_model=OptionsResponse)
 async def get_options_chain(ticker: str, expiration_date: Optional[str] = None):
     """Get options chain data for a specific ticker"""
@@ -139,15 +180,16 @@ async def get_options_chain(ticker: str, expiration_date: Optional[str] = None):
         # Fetch the stock data
         stock = yf.Ticker(ticker)
 
-        # Get current stock price
-        current_price = stock.history(period="1d")["Close"].iloc[-1]
+        # Get current stock price (shared with concurrent requests)
+        history = await run_in_threadpool(fetch_stock_frame, ticker, "1d", "1d")
+        current_price = history["Close"].iloc[-1]
 
         # Get dividend information
-        dividend_info = get_dividend_info(stock)
+        dividend_info = await run_in_threadpool(get_dividend_info, stock)
         div_yield = dividend_info.get("yield", 0)
 
-        # Get all available expiration dates
-        expiration_dates = stock.options
+        # Get all available expiration dates (shared with concurrent requests)
+        expiration_dates = await run_in_threadpool(get_option_expirations, ticker)
 
         if not expiration_dates or len(expiration_dates) == 0:
             logging.warning(f"No options data available for {ticker}")
@@ -171,7 +213,7 @@ async def get_options_chain(ticker: str, expiration_date: Optional[str] = None):
             )
 
         # Get the options chain for the specified expiration date
-        options = stock.option_chain(expiration_date)
+        options = await run_in_threadpool(get_option_chain, ticker, expiration_date)
 
         # Handle the case where options might be empty
         if (
@@ -354,13 +396,15 @@ async def get_options_chain(ticker: str, expiration_date: Optional[str] = None):
 async def get_volatility_surface(ticker: str, expiration_date: Optional[str] = None):
     """Get implied volatility surface data for visualization."""
     try:
-        # Fetch the stock data
-        stock = yf.Ticker(ticker)
-        history = stock.history(period="1d")
-        current_price = history["Close"].iloc[-1] if not history.empty else 0.0
+        try:
+            history = await run_in_threadpool(fetch_stock_frame, ticker, "1d", "1d")
+            current_price = history["Close"].iloc[-1]
+        except ValueError:
+            # No bars for the ticker
+            current_price = 0.0
 
         # Get all expiration dates
-        expiration_dates = stock.options
+        expiration_dates = await run_in_threadpool(get_option_expirations, ticker)
         if not expiration_dates:
             return {"surface": {}, "currentPrice": current_price}
 
@@ -487,10 +531,11 @@ async def get_binomial_tree(
     try:
         # Fetch the stock data
         stock = yf.Ticker(ticker)
-        current_price = stock.history(period="1d")["Close"].iloc[-1]
+        history = await run_in_threadpool(fetch_stock_frame, ticker, "1d", "1d")
+        current_price = history["Close"].iloc[-1]
 
         # Get option data to extract implied volatility
-        options = stock.option_chain(expiration_date)
+        options = await run_in_threadpool(get_option_chain, ticker, expiration_date)
 
         # Calculate days to expiration
         exp_date = dt.datetime.strptime(expiration_date, "%Y-%m-%d")
@@ -499,7 +544,7 @@ async def get_binomial_tree(
 
         # Get risk-free rate and dividend info
         r = get_risk_free_rate(days_to_expiry)
-        dividend_info = get_dividend_info(stock)
+        dividend_info = await run_in_threadpool(get_dividend_info, stock)
         div_yield = dividend_info.get("yield", 0)
 
         # Find the option with the closest strike
@@ -549,3 +594,44 @@ async def get_binomial_tree(
         raise HTTPException(
             status_code=500, detail=f"Error generating binomial tree: {str(e)}"
         )
+
+
+@options_router.get("/{ticker}/iv-rank", response_model=IVRankResponse)
+def get_iv_rank(ticker: str, lookback_days: int = 365):
+    """Get IV rank and IV percentile from the stored IV snapshots"""
+    try:
+        return query_iv_rank(ticker, lookback_days)
+    except Exception as e:
+        logging.error(f"Error computing IV rank for {ticker}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500, detail=f"Error computing IV rank: {str(e)}"
+        )
+
+
+@options_router.get("/{ticker}/term-structure", response_model=List[IVSnapshot])
+def get_term_structure_history(ticker: str, days: int = 30):
+    """Get the stored ATM IV term structure and skew history"""
+    try:
+        return query_term_structure_history(ticker, days)
+    except Exception as e:
+        logging.error(
+            f"Error fetching term structure history for {ticker}: {str(e)}",
+            exc_info=True,
+        )
+        raise HTTPException(
+            status_code=500, detail=f"Error fetching term structure history: {str(e)}"
+        )
+
+
+@options_router.post("/iv-history/snapshot")
+def trigger_iv_snapshot(background_tasks: BackgroundTasks):
+    """Snapshot ATM IV and skew for every watchlisted ticker in the background"""
+    # Each run scans every watchlisted chain, so repeated triggers collapse
+    if not claim_snapshot_run():
+        raise HTTPException(
+            status_code=429,
+            detail="An IV snapshot is running or was started less than "
+            f"{MIN_SNAPSHOT_INTERVAL.total_seconds() / 60:.0f} minutes ago",
+        )
+    background_tasks.add_task(run_claimed_snapshot)
+    return {"message": "IV snapshot started."}
@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+
+from options import iv_history
+from options.iv_history import claim_snapshot_run, run_claimed_snapshot, snapshot_due
+
+
+@pytest.mark.parametrize(
+    "now, due",
+    [
+        # Regular close, 16:00 New York in summer (20:00 UTC) and winter (21:00 UTC)
+        ("2024-07-02 19:45", True),
+        ("2024-07-02 19:49:59", True),
+        ("2024-07-02 19:50", False),
+        ("2024-07-02 19:40", False),
+        ("2024-12-02 20:45", True),
+        ("2024-12-02 19:45", False),
+        # Early closes at 13:00 New York
+        ("2024-07-03 16:45", True),
+        ("2024-07-03 19:45", False),
+        ("2024-11-29 17:45", True),
+        # Holiday and weekend
+        ("2024-12-25 20:45", False),
+        ("2024-07-06 19:45", False),
+    ],
+)
+def test_snapshot_due_before_each_close(now, due):
+    assert snapshot_due(pd.Timestamp(now, tz="UTC")) is due
+
+
+def test_triggered_snapshots_collapse(monkeypatch):
+    runs = []
+    monkeypatch.setattr(iv_history, "snapshot_watchlists", lambda: runs.append(1))
+    monkeypatch.setattr(iv_history, "_last_started", None)
+    now = pd.Timestamp("2024-07-02 15:00", tz="UTC")
+
+    assert claim_snapshot_run(now)
+    # Refused while running and shortly after
+    assert not claim_snapshot_run(now)
+    run_claimed_snapshot()
+    assert not claim_snapshot_run(now + pd.Timedelta(minutes=5))
+    assert claim_snapshot_run(now + iv_history.MIN_SNAPSHOT_INTERVAL)
+    run_claimed_snapshot()
+    assert len(runs) == 2
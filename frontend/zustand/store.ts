@@ -538,7 +538,7 @@ export const useStore = create<Store>((set, get) => ({
       }
 
       const marketStatus = await response.json();
-      set({ isMarketOpen: marketStatus });
+      set({ isMarketOpen: marketStatus.is_open });
     } catch (error) {
       console.error("ERROR: Failed to fetch market status:", error);
       set({ isMarketOpen: false });